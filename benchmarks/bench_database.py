@@ -0,0 +1,216 @@
+"""
+基准测试 - 数据库写入吞吐与读延迟
+
+对比两种实现：
+  - 旧做法：每次调用新建连接、回滚日志模式、逐条提交
+  - Database：长连接 + WAL + 写线程合并提交
+测量单线程/多线程插入吞吐，持续写入时 get_recent_records 的读延迟，
+以及表已满（每次插入都要淘汰一条）时单次插入耗时随 max_records 的变化。
+用法: python benchmarks/bench_database.py [插入条数]
+"""
+import sys
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import config
+from database import Database
+
+INSERTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+WRITER_THREADS = 4
+READ_ROUNDS = 300
+FULL_TABLE_SIZES = [1000, 10000, 100000]
+FULL_TABLE_INSERTS = 200
+
+
+class LegacyDatabase:
+    """旧实现的写法：每个方法新建连接并立即提交"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS clipboard_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_type TEXT NOT NULL,
+                content TEXT NOT NULL,
+                image_path TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                corrected TEXT,
+                correction_status TEXT DEFAULT 'pending',
+                copy_count INTEGER NOT NULL DEFAULT 1,
+                content_hash TEXT
+            )
+        """)
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_hash ON clipboard_records (content_hash)")
+        conn.commit()
+        conn.close()
+
+    def add_record(self, content_type: str, content: str, image_path: str = None) -> int:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.cursor()
+        content_hash = Database.content_hash_for(content_type, content, image_path)
+        cursor.execute("""
+            INSERT INTO clipboard_records (content_type, content, image_path, content_hash)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(content_hash) DO UPDATE SET
+                timestamp = CURRENT_TIMESTAMP,
+                copy_count = copy_count + 1
+        """, (content_type, content, image_path, content_hash))
+        record_id = cursor.lastrowid
+        cursor.execute("SELECT COUNT(*) FROM clipboard_records")
+        count = cursor.fetchone()[0]
+        if count > config.max_records:
+            cursor.execute("""
+                SELECT id FROM clipboard_records ORDER BY timestamp ASC LIMIT ?
+            """, (count - config.max_records,))
+            cursor.executemany("DELETE FROM clipboard_records WHERE id = ?", cursor.fetchall())
+        conn.commit()
+        conn.close()
+        return record_id
+
+    def get_recent_records(self, limit: int = 50):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        rows = conn.execute("""
+            SELECT id, content_type, content, image_path, timestamp, corrected, correction_status,
+                   copy_count
+            FROM clipboard_records ORDER BY timestamp DESC LIMIT ?
+        """, (limit,)).fetchall()
+        conn.close()
+        return rows
+
+    def close(self):
+        pass
+
+
+def make_text(i: int) -> str:
+    """生成一段不重复的剪贴板文本"""
+    return f"第 {i} 条剪贴板内容：" + "今天天气不错，适合写代码。" * 8
+
+
+def bench_single(db, offset: int) -> float:
+    """单线程连续插入，返回每秒条数"""
+    start = time.perf_counter()
+    for i in range(INSERTS):
+        db.add_record("text", make_text(offset + i))
+    return INSERTS / (time.perf_counter() - start)
+
+
+def bench_threads(db, offset: int) -> float:
+    """多线程同时插入，返回每秒条数"""
+    per_thread = INSERTS // WRITER_THREADS
+
+    def worker(base):
+        for i in range(per_thread):
+            db.add_record("text", make_text(base + i))
+
+    threads = [threading.Thread(target=worker, args=(offset + t * per_thread,)) for t in range(WRITER_THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return per_thread * WRITER_THREADS / (time.perf_counter() - start)
+
+
+def bench_reads_under_writes(db, offset: int):
+    """后台持续插入时测量读延迟，返回 (p50, p99, 最大) 毫秒"""
+    stop = threading.Event()
+
+    def writer():
+        i = offset
+        while not stop.is_set():
+            db.add_record("text", make_text(i))
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    samples = []
+    try:
+        for _ in range(READ_ROUNDS):
+            start = time.perf_counter()
+            db.get_recent_records(50)
+            samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.002)
+    finally:
+        stop.set()
+        thread.join()
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], samples[-1]
+
+
+def prefill(db, size: int):
+    """直接批量写入 size 条记录（时间戳递增）"""
+    conn = db._connect() if isinstance(db, Database) else sqlite3.connect(db.db_path)
+    conn.execute("BEGIN")
+    conn.executemany("""
+        INSERT INTO clipboard_records (content_type, content, content_hash, timestamp)
+        VALUES ('text', ?, ?, datetime('now', ?))
+    """, [(make_text(i), f"fill:{i}", f"-{size - i} seconds") for i in range(size)])
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def bench_full_table(tmp: str):
+    """表已满时的单次插入耗时（毫秒）"""
+    original = config.max_records
+    print(f"\n表已满时插入 {FULL_TABLE_INSERTS} 条（每条都触发淘汰）")
+    print(f"{'max_records':>12} {'旧做法':>10} {'Database':>10}")
+    try:
+        for size in FULL_TABLE_SIZES:
+            config.max_records = size
+            timings = []
+            for name, factory in (
+                ("legacy", lambda p: LegacyDatabase(p)),
+                ("new", lambda p: Database(p)),
+            ):
+                db_path = Path(tmp) / f"full_{name}_{size}.db"
+                db = factory(db_path)
+                prefill(db, size)
+                if name == "new":
+                    # 预填绕过了 add_record，重建计数
+                    db.close()
+                    conn = sqlite3.connect(db_path)
+                    conn.execute("DELETE FROM record_counter")
+                    conn.commit()
+                    conn.close()
+                    db = Database(db_path)
+                start = time.perf_counter()
+                for i in range(FULL_TABLE_INSERTS):
+                    db.add_record("text", make_text(size + i))
+                timings.append((time.perf_counter() - start) / FULL_TABLE_INSERTS * 1000)
+                db.close()
+            print(f"{size:>12} {timings[0]:>8.2f}ms {timings[1]:>8.2f}ms")
+    finally:
+        config.max_records = original
+
+
+def main():
+    print(f"插入 {INSERTS} 条，max_records={config.max_records}\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (
+            ("旧做法", lambda: LegacyDatabase(Path(tmp) / "legacy.db")),
+            ("Database", lambda: Database(Path(tmp) / "records.db")),
+        ):
+            db = factory()
+            single = bench_single(db, 0)
+            threaded = bench_threads(db, INSERTS)
+            p50, p99, worst = bench_reads_under_writes(db, INSERTS * 2)
+            db.close()
+            print(f"[{name}]")
+            print(f"  单线程插入: {single:8.0f} 条/秒")
+            print(f"  {WRITER_THREADS} 线程插入: {threaded:8.0f} 条/秒")
+            print(f"  写入时读取: p50 {p50:.2f}ms  p99 {p99:.2f}ms  最大 {worst:.2f}ms")
+
+        bench_full_table(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+基准测试 - 不同历史规模下的数据库性能（输出 JSON，便于版本间对比）
+
+为每个规模生成一份合成历史（短/中/长文本混合，约 1% 为图片记录），测量：
+  - add_record 吞吐与延迟（表已满，每次插入都触发淘汰/归档）
+  - get_recent_records 延迟
+  - update_correction、delete_record 延迟
+  - 后台持续写入时 get_recent_records 的延迟
+结果以 JSON 写到标准输出或 --output 指定的文件，进度信息写到标准错误。
+用法: python benchmarks/bench_db_suite.py [--sizes 10000,100000,1000000] [--output result.json]
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import config
+from database import Database
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+POPULATE_BATCH = 5000
+ADD_OPS = 1000
+READ_OPS = 300
+UPDATE_OPS = 300
+DELETE_OPS = 300
+CONCURRENT_READS = 300
+
+WORDS = ["剪贴板", "数据库", "今天", "天气", "代码", "会议纪要", "报销单", "python", "sqlite",
+         "window", "search", "index", "error", "thread", "query", "memory", "，", "。", "\n"]
+
+# (比例, 最少字数, 最多字数)：短文本为主，少量长文本会被压缩存储
+TEXT_SIZES = [(0.70, 20, 200), (0.25, 200, 4000), (0.05, 4000, 64000)]
+IMAGE_RATIO = 0.01
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def make_text(rng: random.Random, i: int) -> str:
+    """按 TEXT_SIZES 的分布生成一段文本"""
+    roll = rng.random()
+    for ratio, low, high in TEXT_SIZES:
+        if roll < ratio:
+            break
+        roll -= ratio
+    length = rng.randint(low, high)
+    # 先生成一小段再重复，长文本也不用逐词随机
+    chunk = "".join(rng.choice(WORDS) for _ in range(min(length, 400) // 3 + 1))
+    return (chunk * (length // len(chunk) + 1))[:length] + f" #{i}"
+
+
+def make_record(rng: random.Random, i: int, tmp: Path) -> Dict:
+    """生成一条记录（时间戳按 i 每条递增一秒，淘汰顺序与生成顺序一致）"""
+    timestamp = (BASE_TIME + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.000")
+    if rng.random() < IMAGE_RATIO:
+        digest = f"{i:032x}"
+        return {
+            "content_type": "image",
+            "content": f"[图片: {digest}.png]",
+            "image_path": str(tmp / "images" / digest[:2] / f"{digest}.png"),
+            "timestamp": timestamp,
+        }
+    return {"content_type": "text", "content": make_text(rng, i), "image_path": None, "timestamp": timestamp}
+
+
+def populate(db: Database, size: int, tmp: Path) -> float:
+    """用批量导入写入 size 条记录，返回用时（秒）"""
+    rng = random.Random(size)
+    start = time.perf_counter()
+    for base in range(0, size, POPULATE_BATCH):
+        records = [make_record(rng, i, tmp) for i in range(base, min(base + POPULATE_BATCH, size))]
+        db.add_records_bulk(records)
+        if base and base % 100000 == 0:
+            log(f"  已生成 {base} 条")
+    return time.perf_counter() - start
+
+
+def summarize(samples: List[float]) -> Dict:
+    """延迟样本（毫秒）的统计"""
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        "count": count,
+        "mean_ms": round(sum(samples) / count, 3),
+        "p50_ms": round(samples[count // 2], 3),
+        "p99_ms": round(samples[min(count - 1, int(count * 0.99))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def timed(action, rounds: int) -> List[float]:
+    """执行 rounds 次 action(i)，返回每次的耗时（毫秒）"""
+    samples = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        action(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_add(db: Database, size: int) -> Dict:
+    """表已满时逐条插入"""
+    rng = random.Random(1)
+    texts = [make_text(rng, size + i) for i in range(ADD_OPS)]
+    start = time.perf_counter()
+    samples = timed(lambda i: db.add_record("text", texts[i]), ADD_OPS)
+    result = summarize(samples)
+    result["ops_per_sec"] = round(ADD_OPS / (time.perf_counter() - start), 1)
+    return result
+
+
+def bench_recent(db: Database) -> Dict:
+    return summarize(timed(lambda i: db.get_recent_records(50), READ_OPS))
+
+
+def pick_ids(db: Database, count: int) -> List[int]:
+    """从主表随机取 count 个记录 ID"""
+    conn = db._connect()
+    try:
+        rows = conn.execute(
+            "SELECT id FROM clipboard_records WHERE content_type = 'text' ORDER BY random() LIMIT ?", (count,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+def bench_update(db: Database) -> Dict:
+    ids = pick_ids(db, UPDATE_OPS)
+    return summarize(timed(lambda i: db.update_correction(ids[i], f"纠错结果 {i}"), len(ids)))
+
+
+def bench_delete(db: Database) -> Dict:
+    ids = pick_ids(db, DELETE_OPS)
+    return summarize(timed(lambda i: db.delete_record(ids[i]), len(ids)))
+
+
+def bench_read_while_write(db: Database, size: int) -> Dict:
+    """后台线程持续 add_record 时的读延迟"""
+    stop = threading.Event()
+    writes = [0]
+
+    def writer():
+        rng = random.Random(2)
+        i = size * 2
+        while not stop.is_set():
+            db.add_record("text", make_text(rng, i))
+            i += 1
+            writes[0] += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    start = time.perf_counter()
+    try:
+        samples = []
+        for _ in range(CONCURRENT_READS):
+            begin = time.perf_counter()
+            db.get_recent_records(50)
+            samples.append((time.perf_counter() - begin) * 1000)
+            time.sleep(0.002)
+    finally:
+        stop.set()
+        thread.join()
+    result = summarize(samples)
+    result["writes_per_sec"] = round(writes[0] / (time.perf_counter() - start), 1)
+    return result
+
+
+def run_size(size: int) -> Dict:
+    """对一个规模跑完所有测量"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db = Database(tmp / "records.db")
+        log(f"[{size}] 生成数据")
+        populate_seconds = populate(db, size, tmp)
+        db_bytes = (tmp / "records.db").stat().st_size
+
+        result = {"size": size, "populate_seconds": round(populate_seconds, 2), "db_bytes": db_bytes}
+        for name, action in (
+            ("add_record", lambda: bench_add(db, size)),
+            ("get_recent_records", lambda: bench_recent(db)),
+            ("update_correction", lambda: bench_update(db)),
+            ("delete_record", lambda: bench_delete(db)),
+            ("read_while_write", lambda: bench_read_while_write(db, size)),
+        ):
+            log(f"[{size}] {name}")
+            result[name] = action()
+        result["records_after"] = db.count_records()
+        result["archived_after"] = db.count_archived()
+        db.close()
+    return result
+
+
+def git_revision() -> str:
+    """当前代码版本（不在 git 仓库中时为空）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库基准测试")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="历史规模，逗号分隔")
+    parser.add_argument("--output", help="结果 JSON 文件（默认输出到标准输出）")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    original = config.max_records
+    results = []
+    try:
+        for size in sizes:
+            # 表刚好满，之后每次 add_record 都要淘汰一条
+            config.max_records = size
+            results.append(run_size(size))
+    finally:
+        config.max_records = original
+
+    report = {
+        "benchmark": "bench_db_suite",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "config": {
+            "archive_enabled": config.archive_enabled,
+            "compress_threshold": config.compress_threshold,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        log(f"结果已写入 {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
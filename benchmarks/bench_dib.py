@@ -0,0 +1,65 @@
+"""
+基准测试 - DIB 解码的内存拷贝与耗时
+
+对比旧实现（拼接 BMP 文件头 + BytesIO + PIL BMP 解码）与 dib.decode_dib。
+tracemalloc 统计 Python 层的临时分配（即被省掉的整块拷贝），PIL 内部的像素缓冲两者相同。
+用法: python benchmarks/bench_dib.py
+"""
+import sys
+import io
+import os
+import time
+import struct
+import tracemalloc
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from PIL import Image
+from dib import decode_dib
+
+SIZES = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+
+
+def make_dib(width: int, height: int) -> bytes:
+    """构造 32 位 BI_RGB 的 DIB"""
+    header = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 32, 0, 0, 0, 0, 0, 0)
+    return header + os.urandom(width * height * 4)
+
+
+def old_decode(dib_data: bytes):
+    """旧实现：固定偏移 54 的 BMP 文件头"""
+    bmp_header = b'BM' + struct.pack('<I', 0) + struct.pack('<H', 0) + struct.pack('<H', 0) + struct.pack('<I', 54)
+    image = Image.open(io.BytesIO(bmp_header + dib_data))
+    image.load()
+    return image
+
+
+def measure(func, data):
+    """返回 (毫秒, Python 层峰值分配 MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(data)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    print(f"{'尺寸':<8}{'DIB(MB)':>9}{'旧耗时':>10}{'旧拷贝MB':>10}{'新耗时':>10}{'新拷贝MB':>10}")
+    for name, (w, h) in SIZES.items():
+        data = make_dib(w, h)
+        old_ms, old_peak = measure(old_decode, data)
+        new_ms, new_peak = measure(decode_dib, data)
+        print(f"{name:<8}{len(data) / 1024 / 1024:>9.1f}{old_ms:>8.0f}ms{old_peak:>10.1f}"
+              f"{new_ms:>8.0f}ms{new_peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
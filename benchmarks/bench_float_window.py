@@ -0,0 +1,168 @@
+"""
+基准测试 - 浮窗的显示延迟和调整大小的帧耗时
+
+  - 热键到可见：对比浮窗从内存缓存（监听线程解码好的图片）和从磁盘 PNG 读取两种情况
+  - 拖动边缘调整大小：每帧（一次鼠标移动 + 重绘）的耗时，对比每帧平滑缩放原图的旧做法
+可在无显示环境下运行: QT_QPA_PLATFORM=offscreen python benchmarks/bench_float_window.py
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import struct
+import numpy as np
+from PIL import Image, ImageDraw
+from PyQt5.QtCore import Qt, QEvent, QEventLoop, QPoint
+from PyQt5.QtGui import QMouseEvent, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+SIZES = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+ROUNDS = 5
+RESIZE_SIZES = {
+    "4K": (3840, 2160),
+    "8K": (7680, 2160),  # 双 4K 显示器截图
+}
+RESIZE_FRAMES = 120  # 一次拖动中的鼠标移动事件数
+
+
+def make_screenshot(width: int, height: int) -> Image.Image:
+    """简单的界面截图"""
+    image = Image.new("RGB", (width, height), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    for y in range(60, height - 60, 30):
+        draw.rectangle([80, y, width // 2 + (y * 7) % (width // 3), y + 14], fill=(30, 30, 30))
+    return image
+
+
+def to_dib(image: Image.Image) -> bytes:
+    """转成剪贴板上常见的 32 位自下而上 DIB"""
+    header = struct.pack("<IiiHHIIiiII", 40, image.width, image.height, 1, 32, 0, 0, 0, 0, 0, 0)
+    return header + image.transpose(Image.FLIP_TOP_BOTTOM).tobytes("raw", "BGRX")
+
+
+def time_to_first_paint(app, image_path: str) -> float:
+    """创建浮窗并等到图片第一次绘制完成（毫秒，不算解码完成前的缩略图）"""
+    from gui.image_float_window import ImageFloatWindow, float_window_manager
+
+    painted = []
+    original_paint = ImageFloatWindow.paintEvent
+
+    def paint_and_mark(window, event):
+        original_paint(window, event)
+        if not painted and window.shared.pixmap is not None:
+            painted.append(time.perf_counter())
+
+    # 浮窗在管理器里创建后立即显示，只能替换类上的方法来记录第一次绘制
+    ImageFloatWindow.paintEvent = paint_and_mark
+    start = time.perf_counter()
+    try:
+        window = float_window_manager.show_image(image_path, requested_at=start)
+    # 图片在后台线程解码，等待期间不空转，免得和解码线程抢 CPU
+        while not painted:
+            app.processEvents(QEventLoop.WaitForMoreEvents)
+    finally:
+        ImageFloatWindow.paintEvent = original_paint
+    window.close()
+    return (painted[0] - start) * 1000
+
+
+def mouse_event(kind, pos: QPoint) -> QMouseEvent:
+    """左键鼠标事件"""
+    buttons = Qt.NoButton if kind == QEvent.MouseButtonRelease else Qt.LeftButton
+    return QMouseEvent(kind, pos, Qt.LeftButton, buttons, Qt.NoModifier)
+
+
+def resize_frame_times(app, image_path: str, smooth_every_frame: bool = False):
+    """拖动右下角把浮窗放大再缩小，返回 (生成金字塔的耗时, 每帧耗时列表, 松开鼠标后的耗时)（毫秒）
+
+    smooth_every_frame 模拟旧做法：每次鼠标移动都把原图平滑缩放成新图片。
+    """
+    from gui.image_float_window import float_window_manager
+
+    window = float_window_manager.show_image(image_path)
+    while window.shared.pixmap is None:
+        app.processEvents(QEventLoop.WaitForMoreEvents)
+    if smooth_every_frame:
+        # 旧做法：持有原尺寸图片，不需要金字塔
+        window.shared.set_pixmap(QPixmap(image_path))
+        window.shared.mip_levels = [window.shared.pixmap]
+        window._on_image_changed()
+    app.processEvents()
+    # 金字塔在浮窗显示后的空闲时间生成，单独计时
+    begin = time.perf_counter()
+    window.shared.build_mip_levels()
+    build = (time.perf_counter() - begin) * 1000 if not smooth_every_frame else 0.0
+    width, height = window.width(), window.height()
+    window.mousePressEvent(mouse_event(QEvent.MouseButtonPress, QPoint(width - 2, height - 2)))
+
+    frames = []
+    for i in range(RESIZE_FRAMES):
+        # 前一半放大、后一半缩小，每帧移动几个像素
+        step = i if i < RESIZE_FRAMES // 2 else RESIZE_FRAMES - i
+        pos = QPoint(width - 2 + step * 6, height - 2 + step * 4)
+        begin = time.perf_counter()
+        window.mouseMoveEvent(mouse_event(QEvent.MouseMove, pos))
+        # 放大超过已解码的分辨率时原尺寸图片在后台解码，完成后在某一帧里换上
+        app.processEvents()
+        if smooth_every_frame:
+            window.setPixmap(window.shared.pixmap.scaled(
+                window._image_rect().size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+            ))
+            window.resizing = False
+        window.repaint()
+        frames.append((time.perf_counter() - begin) * 1000)
+
+    begin = time.perf_counter()
+    window.mouseReleaseEvent(mouse_event(QEvent.MouseButtonRelease, pos))
+    window.repaint()
+    release = (time.perf_counter() - begin) * 1000
+    window.close()
+    return build, frames, release
+
+
+def bench_resize(app, tmp: Path):
+    """调整大小的帧耗时"""
+    print(f"\n拖动调整大小（{RESIZE_FRAMES} 帧）")
+    print(f"{'尺寸':<6}{'做法':<14}{'金字塔(ms)':>10}{'p50(ms)':>9}{'p99(ms)':>9}{'max(ms)':>9}{'松开(ms)':>10}")
+    for name, size in RESIZE_SIZES.items():
+        path = str(tmp / f"resize-{name}.png")
+        make_screenshot(*size).save(path, "PNG", compress_level=1)
+        for label, smooth in (("每帧平滑缩放", True), ("金字塔快速缩放", False)):
+            build, frames, release = resize_frame_times(app, path, smooth)
+            frames = np.array(frames)
+            print(f"{name:<6}{label:<14}{build:>10.1f}{np.percentile(frames, 50):>9.2f}{np.percentile(frames, 99):>9.2f}"
+                  f"{frames.max():>9.2f}{release:>10.1f}")
+
+
+def main():
+    app = QApplication(sys.argv)
+    from image_cache import image_cache
+    from qimage_convert import dib_to_qimage
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'尺寸':<8}{'内存缓存(ms)':>14}{'磁盘 PNG(ms)':>14}")
+        for name, size in SIZES.items():
+            image = make_screenshot(*size)
+            path = str(Path(tmp) / f"{name}.png")
+            image.save(path, "PNG", compress_level=1)
+
+            # 监听线程在截图时完成的工作，不计入热键延迟
+            image_cache.put(path, dib_to_qimage(to_dib(image)))
+            cached = min(time_to_first_paint(app, path) for _ in range(ROUNDS))
+            image_cache.discard(path)
+            disk = min(time_to_first_paint(app, path) for _ in range(ROUNDS))
+            print(f"{name:<8}{cached:>14.1f}{disk:>14.1f}")
+
+        bench_resize(app, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
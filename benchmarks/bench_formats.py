@@ -0,0 +1,76 @@
+"""
+基准测试 - 多格式剪贴板的检测耗时（仅 Windows）
+
+往剪贴板放入一段文本和 N 种自定义格式（每种 1 MB），对比：
+  - 只读元数据（list_formats，当前做法）
+  - 逐个读取全部数据（旧做法的上限）
+前者的耗时应与数据大小无关，只随格式数量线性增长。
+用法: python benchmarks/bench_formats.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import win32clipboard
+from clipboard_formats import list_formats, read_format
+
+FORMAT_COUNTS = [1, 4, 16]
+PAYLOAD_SIZE = 1024 * 1024
+ROUNDS = 20
+
+
+def fill_clipboard(count: int):
+    """写入文本 + count 种自定义格式，返回格式名列表"""
+    names = [f"AIClipboard.Bench{i}" for i in range(count)]
+    payload = b"x" * PAYLOAD_SIZE
+    win32clipboard.OpenClipboard()
+    try:
+        win32clipboard.EmptyClipboard()
+        win32clipboard.SetClipboardText("bench", win32clipboard.CF_UNICODETEXT)
+        for name in names:
+            win32clipboard.SetClipboardData(win32clipboard.RegisterClipboardFormat(name), payload)
+    finally:
+        win32clipboard.CloseClipboard()
+    return names
+
+
+def time_read(action) -> float:
+    """打开剪贴板执行 action，返回平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        win32clipboard.OpenClipboard()
+        try:
+            action()
+        finally:
+            win32clipboard.CloseClipboard()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    print(f"每种格式 {PAYLOAD_SIZE // 1024} KB，{ROUNDS} 轮平均\n")
+    print(f"{'格式数':>6} {'只读元数据':>12} {'读取全部数据':>14}")
+    for count in FORMAT_COUNTS:
+        names = fill_clipboard(count)
+
+        def metadata_only():
+            list_formats(names)
+
+        def fetch_all():
+            for fmt in list_formats(names):
+                read_format(fmt["id"])
+
+        lazy_ms = time_read(metadata_only)
+        eager_ms = time_read(fetch_all)
+        print(f"{count:>6} {lazy_ms:>10.2f}ms {eager_ms:>12.2f}ms")
+
+    win32clipboard.OpenClipboard()
+    win32clipboard.EmptyClipboard()
+    win32clipboard.CloseClipboard()
+
+
+if __name__ == "__main__":
+    main()
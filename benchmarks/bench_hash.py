@@ -0,0 +1,61 @@
+"""
+基准测试 - 剪贴板内容哈希耗时
+
+模拟 4K / 8K 截图的 32 位 DIB 数据，对比旧的抽样哈希与全量摘要（sha256 / blake2b）的耗时。
+用法: python benchmarks/bench_hash.py
+"""
+import sys
+import os
+import time
+import hashlib
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from content_hash import digest_bytes
+
+SIZES = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+}
+
+ROUNDS = 5
+
+
+def make_dib(width: int, height: int) -> bytes:
+    """构造一个 BITMAPINFOHEADER + 32 位像素的 DIB"""
+    return b"\x28" + b"\x00" * 39 + os.urandom(width * height * 4)
+
+
+def best_of(func, data) -> float:
+    """多次运行取最快一次（毫秒）"""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def old_hash(data):
+    """旧实现：长度 + 前 100 字节"""
+    return f"image:{len(data)}:{hash(data[:100])}"
+
+
+def main():
+    print(f"{'尺寸':<8}{'大小(MB)':>10}{'旧抽样':>10}{'digest':>10}{'blake2b':>10}{'GB/s':>8}")
+    for name, (w, h) in SIZES.items():
+        data = make_dib(w, h)
+        t_old = best_of(old_hash, data)
+        t_digest = best_of(digest_bytes, data)
+        t_b2 = best_of(lambda d: hashlib.blake2b(d).hexdigest(), data)
+        size_mb = len(data) / 1024 / 1024
+        print(f"{name:<8}{size_mb:>10.1f}{t_old:>8.2f}ms{t_digest:>8.1f}ms{t_b2:>8.1f}ms"
+              f"{len(data) / (t_digest / 1000) / 1e9:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+基准测试 - 历史记录导出/导入吞吐
+
+生成 N 条记录（默认 100 万，约 1% 为图片记录），测量：
+  - 导出为 JSONL + 图片的 zip
+  - 导入到空数据库
+  - 再次导入同一个备份（全部按内容摘要去重）
+用法: python benchmarks/bench_history_io.py [记录数]
+"""
+import sys
+import random
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import config
+from database import Database
+from history_io import export_history, import_history
+
+RECORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+BATCH = 10000
+IMAGE_EVERY = 100
+
+WORDS = ["剪贴板", "数据库", "今天", "天气", "代码", "python", "sqlite", "window", "会议纪要", "测试"]
+
+
+def populate(db: Database, image_root: Path):
+    """批量写入记录和假图片文件"""
+    rng = random.Random(7)
+    conn = db._connect()
+    for base in range(0, RECORDS, BATCH):
+        rows = []
+        for i in range(base, min(base + BATCH, RECORDS)):
+            if i % IMAGE_EVERY == 0:
+                digest = f"{i:032x}"
+                path = image_root / digest[:2] / f"{digest}.png"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b"\x89PNG" + bytes(rng.getrandbits(8) for _ in range(256)))
+                rows.append(("image", f"[图片: {path.name}]", str(path), f"image:{digest}", None))
+            else:
+                text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))) + f" #{i}"
+                corrected = text.upper() if i % 10 == 0 else None
+                rows.append(("text", text, None, f"bench:{i}", corrected))
+        conn.execute("BEGIN")
+        conn.executemany("""
+            INSERT INTO clipboard_records (content_type, content, image_path, content_hash, corrected)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        conn.execute("COMMIT")
+    conn.close()
+
+
+def measure(label: str, action):
+    """执行 action 并打印吞吐"""
+    stats = action()
+    rate = stats["records"] / stats["seconds"]
+    print(f"{label:<12} {stats['records']:>9} 条 {stats['seconds']:>7.1f}s {rate:>9.0f} 条/秒")
+    return stats
+
+
+def main():
+    # 导入时不淘汰，测的是写入本身
+    config.max_records = RECORDS * 2
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source_images = tmp / "images_src"
+        source = Database(tmp / "source.db")
+        start = time.perf_counter()
+        populate(source, source_images)
+        print(f"生成 {RECORDS} 条记录用时 {time.perf_counter() - start:.1f}s\n")
+
+        backup = tmp / "backup.zip"
+        measure("导出", lambda: export_history(backup, source, source_images))
+        print(f"{'':<12} 备份大小 {backup.stat().st_size / 1024 / 1024:.1f} MB")
+        source.close()
+
+        target_images = tmp / "images_dst"
+        target = Database(tmp / "target.db")
+        stats = measure("导入", lambda: import_history(backup, target, target_images))
+        stats = measure("重复导入", lambda: import_history(backup, target, target_images))
+        print(f"{'':<12} 重复导入新增 {stats['inserted']} 条，目标库共 {target.count_records()} 条")
+        target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+基准测试 - 图片存储格式对比
+
+对比 png / webp / raw_zstd 在不同压缩力度下的编码耗时、解码耗时和文件大小。
+默认使用合成的 4K 界面截图，也可以传入真实截图路径:
+    python benchmarks/bench_image_encode.py [截图1.png 截图2.png ...]
+"""
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from PIL import Image, ImageDraw
+from image_encoder import encode_image, load_image, extension_for
+
+# (格式, 力度)
+CANDIDATES = [
+    ("png", 1),
+    ("png", 6),
+    ("webp", 0),
+    ("webp", 4),
+    ("raw_zstd", 1),
+    ("raw_zstd", 3),
+    ("raw_zstd", 9),
+]
+
+
+def make_screenshot(width: int = 3840, height: int = 2160) -> Image.Image:
+    """合成一张类似桌面截图的图片：窗口、文字行和渐变背景"""
+    rng = random.Random(42)
+    image = Image.new("RGB", (width, height), (236, 239, 244))
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 4):
+        shade = 200 + (y * 40 // height)
+        draw.line([(0, y), (width // 6, y)], fill=(shade, shade, 255))
+    for _ in range(12):
+        x0, y0 = rng.randrange(width // 2), rng.randrange(height // 2)
+        x1, y1 = x0 + rng.randrange(600, width // 2), y0 + rng.randrange(400, height // 2)
+        draw.rectangle([x0, y0, x1, y1], fill=(255, 255, 255), outline=(180, 180, 180), width=2)
+        for line_y in range(y0 + 40, y1 - 20, 28):
+            line_x = x0 + 20
+            while line_x < x1 - 80:
+                word = rng.randrange(20, 90)
+                draw.rectangle([line_x, line_y, line_x + word, line_y + 14], fill=(40, 40, 40))
+                line_x += word + 12
+    return image
+
+
+def measure(image: Image.Image, image_format: str, effort: int, work_dir: Path):
+    """返回 (编码毫秒, 解码毫秒, 字节数)"""
+    path = work_dir / f"bench_{image_format}_{effort}{extension_for(image_format)}"
+    start = time.perf_counter()
+    encode_image(image, path, image_format, effort)
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    load_image(path)
+    decode_ms = (time.perf_counter() - start) * 1000
+    return encode_ms, decode_ms, path.stat().st_size
+
+
+def main():
+    if len(sys.argv) > 1:
+        images = [(Path(p).name, Image.open(p).convert("RGB")) for p in sys.argv[1:]]
+    else:
+        images = [("synthetic-4K", make_screenshot())]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        for name, image in images:
+            raw_size = image.width * image.height * len(image.getbands())
+            print(f"\n{name}: {image.width}x{image.height}, 原始 {raw_size / 1024 / 1024:.1f} MB")
+            print(f"{'格式':<12}{'力度':>4}{'编码(ms)':>10}{'解码(ms)':>10}{'大小(KB)':>10}{'压缩比':>8}")
+            for image_format, effort in CANDIDATES:
+                try:
+                    encode_ms, decode_ms, size = measure(image, image_format, effort, work_dir)
+                except Exception as e:
+                    print(f"{image_format:<12}{effort:>4}  不可用: {e}")
+                    continue
+                print(f"{image_format:<12}{effort:>4}{encode_ms:>10.0f}{decode_ms:>10.0f}"
+                      f"{size / 1024:>10.0f}{raw_size / size:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
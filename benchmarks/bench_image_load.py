@@ -0,0 +1,119 @@
+"""
+基准测试 - 大截图打开浮窗的峰值内存和显示延迟
+
+对比两种做法（每种在单独的子进程里运行，峰值内存互不影响）：
+  - 原尺寸解码：主线程整张解码为 QPixmap，再平滑缩放到窗口尺寸（旧做法）
+  - 按尺寸解码：只读文件头定窗口尺寸，后台线程用 QImageReader 按窗口尺寸解码（浮窗管理器）
+峰值内存为子进程解码前后峰值 RSS 的差值（Linux 读 /proc 的 VmHWM，其他系统用 resource 模块）。
+用法: QT_QPA_PLATFORM=offscreen python benchmarks/bench_image_load.py
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+SIZES = {
+    "4K": (3840, 2160),
+    "双 4K": (7680, 2160),
+    "8K": (7680, 4320),
+}
+MODES = {"full": "原尺寸解码", "scaled": "按尺寸解码"}
+
+
+def make_screenshot(width: int, height: int):
+    """简单的界面截图"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (width, height), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    for y in range(60, height - 60, 30):
+        draw.rectangle([80, y, width // 2 + (y * 7) % (width // 3), y + 14], fill=(30, 30, 30))
+    return image
+
+
+def peak_rss_mb() -> float:
+    """进程到目前为止的峰值内存（MB）"""
+    # Linux 上 ru_maxrss 会继承父进程 fork 时的峰值，VmHWM 在 exec 后重新统计
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的单位是字节，Linux 是 KB
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(mode: str, image_path: str) -> dict:
+    """子进程：打开一次图片，返回显示延迟和峰值内存增量"""
+    from PyQt5.QtCore import QEventLoop, QSize, Qt
+    from PyQt5.QtGui import QPixmap
+    from PyQt5.QtWidgets import QApplication, QLabel
+
+    app = QApplication(sys.argv)
+    from gui.image_float_window import float_window_manager
+
+    # 先把 Qt 的图片插件等加载好，不计入增量
+    float_window_manager.show_image("missing.png").close()
+    app.processEvents()
+    before = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "full":
+        screen_size = QApplication.primaryScreen().availableSize()
+        max_size = QSize(int(screen_size.width() * 0.5), int(screen_size.height() * 0.7))
+        window = QLabel()
+        pixmap = QPixmap(image_path)
+        window.setPixmap(pixmap.scaled(max_size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        window.show()
+        app.processEvents()
+        loaded = lambda: True
+    else:
+        window = float_window_manager.show_image(image_path)
+        loaded = lambda: window.shared.pixmap is not None
+    # 等图片画出来（后台解码期间不空转）
+    while not loaded():
+        app.processEvents(QEventLoop.WaitForMoreEvents)
+    app.processEvents()
+    elapsed = (time.perf_counter() - start) * 1000
+    return {"ms": elapsed, "rss": peak_rss_mb() - before}
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--case":
+        print(json.dumps(run_case(sys.argv[2], sys.argv[3])))
+        return
+
+    if not Path("/proc/self/status").exists() and importlib.util.find_spec("resource") is None:
+        print("需要 /proc（Linux）或 resource 模块（macOS）统计峰值内存")
+        return
+
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'尺寸':<8}{'做法':<12}{'显示(ms)':>10}{'峰值内存增量(MB)':>18}")
+        for name, size in SIZES.items():
+            path = str(Path(tmp) / f"{size[0]}x{size[1]}.png")
+            make_screenshot(*size).save(path, "PNG", compress_level=1)
+            for mode, label in MODES.items():
+                output = subprocess.run(
+                    [sys.executable, __file__, "--case", mode, path],
+                    env=env, capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{name:<8}{label:<12}{result['ms']:>10.1f}{result['rss']:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
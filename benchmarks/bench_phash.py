@@ -0,0 +1,64 @@
+"""
+基准测试 - 感知哈希与近似重复查询的耗时
+
+用法: python benchmarks/bench_phash.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+from PIL import Image, ImageDraw
+from perceptual_hash import dhash, RecentHashIndex
+
+SIZES = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+INDEX_SIZES = [32, 256, 4096]
+ROUNDS = 20
+
+
+def make_screenshot(width: int, height: int, cursor: bool = False) -> Image.Image:
+    """简单的界面截图，cursor=True 时多画一个光标"""
+    image = Image.new("RGB", (width, height), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    for y in range(60, height - 60, 30):
+        draw.rectangle([80, y, width // 2 + (y * 7) % (width // 3), y + 14], fill=(30, 30, 30))
+    if cursor:
+        draw.rectangle([width // 2, height // 2, width // 2 + 2, height // 2 + 20], fill=(0, 0, 0))
+    return image
+
+
+def timed(func, *args) -> float:
+    """多次运行取平均（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(*args)
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+
+def main():
+    print("哈希耗时")
+    for name, size in SIZES.items():
+        image = make_screenshot(*size)
+        with_cursor = make_screenshot(*size, cursor=True)
+        bits = int(np.unpackbits(np.bitwise_xor(dhash(image), dhash(with_cursor)).view(np.uint8)).sum())
+        print(f"  {name:<6} {timed(dhash, image):6.2f} ms  (光标闪烁的汉明距离: {bits})")
+
+    print("查询耗时")
+    rng = np.random.default_rng(0)
+    query = dhash(make_screenshot(*SIZES["1080p"]))
+    for count in INDEX_SIZES:
+        index = RecentHashIndex(count)
+        for i in range(count):
+            index.add(rng.integers(0, 2 ** 63, size=query.shape, dtype=np.uint64), (1920, 1080), str(i))
+        print(f"  {count:>5} 条 {timed(index.find, query, (1920, 1080), 6) * 1000:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+基准测试 - 全文搜索延迟
+
+生成 N 条中英混合的记录（默认 100 万），测量 Database.search 对常见词、罕见词、
+多词、短词（二元索引）以及翻页的耗时。生成的数据库会保留，再次运行时直接复用。
+用法: python benchmarks/bench_search.py [记录数] [数据库路径]
+"""
+import sys
+import random
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from database import Database
+
+RECORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+DB_PATH = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(tempfile.gettempdir()) / f"bench_search_{RECORDS}.db"
+ROUNDS = 5
+BATCH = 10000
+
+CJK_WORDS = ["天气", "代码", "剪贴板", "数据库", "今天", "我们", "测试", "性能", "搜索", "窗口",
+             "图片", "文本", "纠错", "模型", "用户", "会议纪要", "报销单"]
+EN_WORDS = ["python", "sqlite", "clipboard", "window", "search", "index", "record", "image",
+            "error", "thread", "query", "memory"]
+
+QUERIES = [
+    ("常见中文词", "剪贴板"),
+    ("常见英文词", "sqlite"),
+    ("两个词", "clipboard 数据库"),
+    ("罕见词", "#123456"),
+    ("两字词", "天气"),
+    ("两字罕见词", "qz"),
+    ("两字不相邻", "ye"),
+    ("单字", "天"),
+    ("长词加短词", "剪贴板 天"),
+]
+
+
+def make_text(rng: random.Random, i: int) -> str:
+    """生成一条记录正文"""
+    parts = []
+    for _ in range(rng.randint(5, 25)):
+        if rng.random() < 0.6:
+            parts.append(rng.choice(CJK_WORDS))
+        else:
+            parts.append(f" {rng.choice(EN_WORDS)} ")
+    return "".join(parts) + f" #{i}"
+
+
+def populate(db: Database):
+    """批量写入记录，每批在同一事务中建立全文索引（新库的 id 从 1 开始连续分配）"""
+    rng = random.Random(42)
+    conn = db._connect()
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    for base in range(0, RECORDS, BATCH):
+        rows = [("text", make_text(rng, i), f"bench:{i}") for i in range(base, min(base + BATCH, RECORDS))]
+        cursor.execute("BEGIN")
+        cursor.executemany(
+            "INSERT INTO clipboard_records (content_type, content, content_hash) VALUES (?, ?, ?)", rows
+        )
+        db._fts_add(cursor, range(base + 1, base + len(rows) + 1))
+        cursor.execute("COMMIT")
+    conn.close()
+    print(f"写入 {RECORDS} 条用时 {time.perf_counter() - start:.1f}s")
+
+
+def time_query(db: Database, query: str):
+    """返回 (平均毫秒, 最大毫秒, 结果数)"""
+    timings = []
+    results = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        results = db.search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sum(timings) / len(timings), max(timings), len(results)
+
+
+def main():
+    fresh = not DB_PATH.exists()
+    db = Database(DB_PATH)
+    if fresh:
+        populate(db)
+    print(f"数据库: {DB_PATH}（{db.count_records()} 条，FTS5={'是' if db.fts_enabled else '否'}）\n")
+
+    print(f"{'查询':<16} {'平均':>9} {'最大':>9} {'结果数':>6}")
+    for label, query in QUERIES:
+        average, worst, count = time_query(db, query)
+        print(f"{label:<16} {average:>7.1f}ms {worst:>7.1f}ms {count:>6}")
+
+    # 翻页：连续取 5 页
+    start = time.perf_counter()
+    after = None
+    pages = 0
+    for _ in range(5):
+        page = db.search("剪贴板", after=after)
+        if not page:
+            break
+        after = page[-1]["cursor"]
+        pages += 1
+    print(f"\n翻页 {pages} 页平均 {(time.perf_counter() - start) * 1000 / max(pages, 1):.1f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+基准测试 - 相似记录索引
+
+生成 N 条文本记录（默认 10 万，长短混合），其中一部分是同一段落改写后的版本，测量：
+  - 从数据库重建索引的用时和索引文件大小
+  - 查询延迟（p50 / p99）
+  - 改写版本能否排进前 10（召回率）
+用法: python benchmarks/bench_similarity.py [记录数]
+"""
+import sys
+import random
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+from config.settings import config
+import database
+from similarity_index import SimilarityIndex
+
+RECORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+BATCH = 5000
+QUERIES = 300
+VARIANT_EVERY = 50  # 每隔这么多条插入一段之前某条的改写版本
+
+
+def make_vocabulary(rng: random.Random, size: int = 20000) -> list:
+    """合成词表：1~4 个常用汉字组成的词，夹杂少量英文单词"""
+    words = []
+    for _ in range(size):
+        if rng.random() < 0.15:
+            words.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9))) + " ")
+        else:
+            words.append("".join(chr(0x4E00 + rng.randrange(3500)) for _ in range(rng.randint(1, 4))))
+    return words + ["，", "。", "的", "了", "和", "是"]
+
+
+VOCABULARY = make_vocabulary(random.Random(1))
+# 词频近似 Zipf 分布
+WEIGHTS = [1.0 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def make_text(rng: random.Random) -> str:
+    """随机段落：大多是短文本，少量长文本"""
+    length = rng.choice([8, 15, 30, 60, 120, 400])
+    return "".join(rng.choices(VOCABULARY, WEIGHTS, k=length))
+
+
+def reword(rng: random.Random, text: str) -> str:
+    """改写：随机替换约 10% 的字、删掉一小段并在开头加几个字"""
+    words = list(text)
+    for _ in range(max(1, len(words) // 10)):
+        i = rng.randrange(len(words))
+        words[i] = rng.choice(VOCABULARY)
+    start = rng.randrange(len(words))
+    del words[start:start + len(words) // 20]
+    return "修改后：" + "".join(words)
+
+
+def populate(db) -> tuple:
+    """写入记录，返回 (全部文本, [(原记录序号, 改写版本序号)])"""
+    rng = random.Random(3)
+    texts, pairs = [], []
+    for i in range(RECORDS):
+        if i and i % VARIANT_EVERY == 0:
+            source = rng.randrange(i)
+            texts.append(reword(rng, texts[source]))
+            pairs.append((source, i))
+        else:
+            texts.append(make_text(rng) + f" #{i}")
+    for base in range(0, RECORDS, BATCH):
+        db.add_records_bulk([
+            {"content_type": "text", "content": text, "timestamp": f"2024-01-01 00:00:00.{i:09d}"}
+            for i, text in enumerate(texts[base:base + BATCH], base)
+        ])
+    return texts, pairs
+
+
+def main():
+    config.max_records = RECORDS * 2
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        database.db = database.Database(tmp / "records.db")
+        texts, pairs = populate(database.db)
+        # 批量导入按 id 顺序写入，序号 i 对应 id i + 1
+        index = SimilarityIndex(tmp / "similarity")
+
+        start = time.perf_counter()
+        index.build()
+        size = sum(path.stat().st_size for path in (tmp / "similarity").glob("*.npy"))
+        print(f"重建 {RECORDS} 条: {time.perf_counter() - start:.1f}s，索引文件 {size / 1024 / 1024:.1f} MB")
+
+        rng = random.Random(5)
+        samples, found = [], 0
+        for source, variant in rng.sample(pairs, min(QUERIES, len(pairs))):
+            begin = time.perf_counter()
+            hits = index.similar(texts[variant], 10, exclude_id=variant + 1)
+            samples.append((time.perf_counter() - begin) * 1000)
+            found += any(record_id == source + 1 for record_id, _ in hits)
+        samples = np.array(samples)
+        print(f"查询 {len(samples)} 次: p50 {np.percentile(samples, 50):.2f}ms  "
+              f"p99 {np.percentile(samples, 99):.2f}ms  max {samples.max():.2f}ms")
+        print(f"改写版本命中前 10: {found}/{len(samples)}")
+        database.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+剪贴板格式模块 - 格式枚举、大小探测与按需读取
+
+检测时只枚举格式并读取元数据（名称、大小），小数据顺带读取；
+大数据（HTML、RTF 等）延后到用户打开记录或剪贴板稳定一段时间后再读。
+以下函数都要求调用方已经打开剪贴板。
+"""
+import ctypes
+from typing import Dict, List, Optional
+import win32clipboard
+import win32con
+from content_hash import digest_bytes
+
+# 标准格式没有注册名，手动映射
+STANDARD_FORMAT_NAMES = {
+    win32con.CF_TEXT: "CF_TEXT",
+    win32con.CF_BITMAP: "CF_BITMAP",
+    win32con.CF_OEMTEXT: "CF_OEMTEXT",
+    win32con.CF_DIB: "CF_DIB",
+    win32con.CF_UNICODETEXT: "CF_UNICODETEXT",
+    win32con.CF_ENHMETAFILE: "CF_ENHMETAFILE",
+    win32con.CF_HDROP: "CF_HDROP",
+    win32con.CF_LOCALE: "CF_LOCALE",
+    win32con.CF_DIBV5: "CF_DIBV5",
+}
+
+# 数据以 GDI 句柄而不是全局内存传递的格式，无法按字节读取
+_HANDLE_FORMATS = {win32con.CF_BITMAP, win32con.CF_ENHMETAFILE, win32con.CF_PALETTE}
+
+_kernel32 = ctypes.windll.kernel32
+_kernel32.GlobalSize.argtypes = [ctypes.c_void_p]
+_kernel32.GlobalSize.restype = ctypes.c_size_t
+
+
+def format_name(format_id: int) -> str:
+    """格式 ID 转名称"""
+    name = STANDARD_FORMAT_NAMES.get(format_id)
+    if name:
+        return name
+    try:
+        return win32clipboard.GetClipboardFormatName(format_id)
+    except Exception:
+        return f"#{format_id}"
+
+
+def format_size(format_id: int) -> int:
+    """不复制数据，直接读取全局内存块大小；取不到时返回 -1"""
+    if format_id in _HANDLE_FORMATS:
+        return -1
+    try:
+        handle = win32clipboard.GetClipboardDataHandle(format_id)
+        return int(_kernel32.GlobalSize(handle)) if handle else -1
+    except Exception:
+        return -1
+
+
+def list_formats(wanted) -> List[Dict]:
+    """列出剪贴板上需要记录的格式（只读元数据）"""
+    wanted = set(wanted)
+    formats = []
+    format_id = win32clipboard.EnumClipboardFormats(0)
+    while format_id:
+        name = format_name(format_id)
+        if name in wanted:
+            formats.append({
+                "id": format_id,
+                "name": name,
+                "size": format_size(format_id),
+                "digest": None,
+                "data": None,
+                "status": "deferred",
+            })
+        format_id = win32clipboard.EnumClipboardFormats(format_id)
+    return formats
+
+
+def read_format(format_id: int) -> Optional[bytes]:
+    """读取一种格式的数据为字节"""
+    data = win32clipboard.GetClipboardData(format_id)
+    if data is None:
+        return None
+    if format_id == win32con.CF_HDROP:
+        # 文件列表返回为路径元组
+        return "\n".join(data).encode("utf-8")
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    return bytes(data)
+
+
+def fetch_into(fmt: Dict) -> bool:
+    """读取数据并填入格式记录，成功返回 True"""
+    data = read_format(fmt["id"])
+    if data is None:
+        return False
+    fmt["data"] = data
+    fmt["size"] = len(data)
+    fmt["digest"] = digest_bytes(data)
+    fmt["status"] = "fetched"
+    return True
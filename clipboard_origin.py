@@ -0,0 +1,76 @@
+"""
+剪贴板来源标记 - 识别本程序自己写入剪贴板的内容
+"""
+import threading
+import time
+from typing import Optional
+from content_hash import digest_text
+
+
+class ClipboardOrigin:
+    """本程序写入剪贴板时打上来源标记，监听器据此跳过，不再重复记录和纠错"""
+
+    # 自定义剪贴板格式，随文本一起写入，内容为来源记录 ID
+    FORMAT_NAME = "AIClipboard.Origin"
+
+    # 未能打上格式标记时（退回 pyperclip），按内容摘要识别的有效期（秒）
+    MARK_TTL = 10.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.marks = {}  # 摘要 -> (来源记录 ID, 写入时间)
+        self.format_id: Optional[int] = None
+
+    def get_format(self) -> int:
+        """注册并返回来源标记格式"""
+        if self.format_id is None:
+            import win32clipboard
+            self.format_id = win32clipboard.RegisterClipboardFormat(self.FORMAT_NAME)
+        return self.format_id
+
+    def copy_text(self, text: str, source_record_id: Optional[int] = None):
+        """由本程序复制文本到剪贴板"""
+        try:
+            import win32clipboard
+            import win32con
+            tag = str(source_record_id or 0).encode("ascii")
+            win32clipboard.OpenClipboard()
+            try:
+                win32clipboard.EmptyClipboard()
+                win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, text)
+                win32clipboard.SetClipboardData(self.get_format(), tag)
+            finally:
+                win32clipboard.CloseClipboard()
+        except Exception as e:
+            print(f"[来源标记] 写入标记失败，改用 pyperclip: {e}")
+            self.mark(text, source_record_id)
+            import pyperclip
+            pyperclip.copy(text)
+
+    def mark(self, text: str, source_record_id: Optional[int] = None):
+        """记住即将写入的内容摘要"""
+        with self.lock:
+            now = time.time()
+            self.marks = {k: v for k, v in self.marks.items() if now - v[1] < self.MARK_TTL}
+            self.marks[digest_text(text)] = (source_record_id, now)
+
+    def consume(self, digest: str) -> bool:
+        """监听器检测到新文本时调用：是本程序写入的则消费掉标记并返回 True"""
+        with self.lock:
+            mark = self.marks.pop(digest, None)
+        return mark is not None and time.time() - mark[1] < self.MARK_TTL
+
+    def read_tag(self) -> Optional[int]:
+        """读取剪贴板上的来源标记（调用方须已打开剪贴板），没有则返回 None"""
+        import win32clipboard
+        fmt = self.get_format()
+        if not win32clipboard.IsClipboardFormatAvailable(fmt):
+            return None
+        try:
+            return int(win32clipboard.GetClipboardData(fmt) or 0)
+        except ValueError:
+            return 0
+
+
+# 全局来源标记实例
+clipboard_origin = ClipboardOrigin()
@@ -1,6 +1,7 @@
 """
 剪贴板监听模块 - 最简化版本
 """
+import queue
 import threading
 import time
 import win32clipboard
@@ -8,27 +9,53 @@ import win32con
 from datetime import datetime
 from pathlib import Path
 from typing import Callable, Optional
-from PIL import Image
-import hashlib
-import io
+from config.settings import config
+from content_hash import digest_bytes, digest_text
+from clipboard_origin import clipboard_origin
+from image_encoder import image_encoder
+from image_store import image_store
+from image_cache import image_cache
+from dib import decode_dib
+from perceptual_hash import dhash, RecentHashIndex
+from clipboard_formats import list_formats, fetch_into
 
 
 class ClipboardWatcher:
     """剪贴板监听器"""
 
+    DEFERRED_FETCH_ATTEMPTS = 3  # 延后格式连续读取失败几次后放弃
+
     def __init__(self, callback: Callable):
         """
         Args:
-            callback: 剪贴板变化时的回调函数，接收 (content_type, content, image_path)
+            callback: 剪贴板变化时的回调函数，接收 (content_type, content, image_path)，
+                      返回记录 ID（未记录时返回 None）
         """
         self.callback = callback
         self.running = False
         self.thread: Optional[threading.Thread] = None
+        self.consumer_thread: Optional[threading.Thread] = None  # 哈希与记录线程
         self.last_hash = None
-        self.image_dir = Path.home() / ".clipboard-polisher" / "images"
-        self.image_dir.mkdir(parents=True, exist_ok=True)
-        self.last_call_time = 0  # 上次回调时间
-        self.call_cooldown = 2.0  # 回调冷却时间（秒）
+        self.last_sequence = None  # 上次看到的剪贴板序列号
+        self.poll_interval = 0.1  # 轮询间隔（秒），只读序列号，开销可忽略
+        # 检测线程 -> 消费线程 的有界事件队列
+        self.events: "queue.Queue" = queue.Queue(maxsize=config.capture_queue_size)
+        self.events_lock = threading.Lock()
+        self.queued_bytes = 0  # 队列中事件的数据总大小，超过 capture_queue_bytes 时丢弃最旧的
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            "enqueued": 0,    # 检测到并入队的事件
+            "coalesced": 0,   # 连发时按策略合并掉的事件
+            "dropped": 0,     # 队列满被丢弃的事件
+            "duplicates": 0,  # 与上一条内容相同而跳过的事件
+            "near_duplicates": 0,  # 与最近截图几乎相同、合并到已有记录的事件
+            "own_writes": 0,  # 本程序自己写入剪贴板而跳过的事件
+            "recorded": 0,    # 交给回调记录的事件
+        }
+        self.recent_images = RecentHashIndex(config.near_duplicate_window)  # 最近截图的感知哈希
+        # 最近一条记录中尚未读取的大格式：{"record_id", "sequence", "captured_at", "formats"}
+        self.deferred: Optional[dict] = None
+        self.deferred_lock = threading.RLock()
         self.log_path = Path.home() / ".clipboard-polisher" / "watcher.log"
 
     def _log(self, message):
@@ -37,19 +64,36 @@ class ClipboardWatcher:
             f.write(f"{datetime.now().strftime('%H:%M:%S')} {message}\n")
         print(message)
 
-    def _get_hash(self):
-        """获取剪贴板内容的哈希"""
+    def _read_clipboard(self):
+        """读取剪贴板内容，返回 (content_type, content, formats)
+
+        本程序自己写入的内容返回 ("own", 来源记录 ID, None)。
+        formats 为需要额外记录的格式元数据，小数据顺带读取，大数据留待以后按需读取。
+        """
         try:
             win32clipboard.OpenClipboard()
 
+            # 本程序写入的内容带有来源标记，不读取数据
+            source_id = clipboard_origin.read_tag()
+            if source_id is not None:
+                win32clipboard.CloseClipboard()
+                return "own", source_id, None
+
+            # 格式元数据（不触碰大数据）
+            formats = list_formats(config.capture_formats)
+            for fmt in formats:
+                if 0 <= fmt["size"] <= config.format_eager_size:
+                    fetch_into(fmt)
+
             # 检查格式
             has_text = win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT)
             has_dib = win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB)
+            has_files = win32clipboard.IsClipboardFormatAvailable(win32con.CF_HDROP)
 
             if has_text:
                 content = win32clipboard.GetClipboardData()
                 win32clipboard.CloseClipboard()
-                return f"text:{hash(content)}", "text", content
+                return "text", content, formats
 
             elif has_dib:
                 # 获取 DIB 数据
@@ -57,10 +101,15 @@ class ClipboardWatcher:
                 win32clipboard.CloseClipboard()
 
                 if dib_data:
-                    # 使用简单哈希：只取数据长度和前100字节
-                    hash_part = dib_data[:100] if len(dib_data) > 100 else dib_data
-                    h = f"image:{len(dib_data)}:{hash(hash_part)}"
-                    return h, "image", dib_data
+                    return "image", dib_data, formats
+
+            elif has_files:
+                # 资源管理器复制的文件列表
+                paths = win32clipboard.GetClipboardData(win32con.CF_HDROP)
+                win32clipboard.CloseClipboard()
+
+                if paths:
+                    return "files", "\n".join(paths), formats
 
             win32clipboard.CloseClipboard()
             return None, None, None
@@ -72,79 +121,69 @@ class ClipboardWatcher:
                 pass
             return None, None, None
 
-    def _save_image(self, dib_data):
-        """保存图片"""
-        try:
-            import struct
-
-            # BMP 文件头
-            bmp_header = b'BM'
-            bmp_header += struct.pack('<I', 0)
-            bmp_header += struct.pack('<H', 0)
-            bmp_header += struct.pack('<H', 0)
-            bmp_header += struct.pack('<I', 54)
+    def _get_hash(self, content_type, content):
+        """计算内容的全量摘要（在消费线程中执行）"""
+        if content_type == "image":
+            # 对 DIB 整体做摘要，按 memoryview 分块读取，不复制数据
+            return f"image:{digest_bytes(content)}"
+        return f"{content_type}:{digest_text(content)}"
 
-            bmp_data = bmp_header + dib_data
-            image = Image.open(io.BytesIO(bmp_data))
+    def _save_image(self, dib_data, digest):
+        """保存图片 - 按内容摘要存储；与最近截图几乎相同时复用已有图片"""
+        try:
+            # 完全相同的图片已存在，直接复用
+            if image_store.find(digest) is not None:
+                return image_store.store(digest, dib_data)
 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            image_path = self.image_dir / f"clip_{timestamp}.png"
-            image.save(str(image_path), "PNG")
+            image = decode_dib(dib_data)
+            image_hash = None
+            if config.near_duplicate_distance > 0:
+                image_hash = dhash(image)
+                match = self.recent_images.find(image_hash, image.size, config.near_duplicate_distance)
+                if match and image_store.reuse(match[0]):
+                    self._count("near_duplicates")
+                    self._log(f"[近似重复] 距离={match[1]}，合并到 {Path(match[0]).name}")
+                    return match[0]
 
-            return str(image_path)
+            image_path = image_store.store(digest, image)
+            # 在监听线程里准备好 QImage，热键浮窗不必等编码完成再从磁盘读
+            from qimage_convert import dib_to_qimage
+            image_cache.put(image_path, dib_to_qimage(dib_data))
+            if image_hash is not None:
+                self.recent_images.add(image_hash, image.size, image_path)
+            return image_path
         except Exception as e:
             self._log(f"保存图片失败: {e}")
             return None
 
     def _watch_loop(self):
-        """监听循环"""
+        """监听循环（只做变化检测，不做重活）"""
         self._log("剪贴板监听已启动")
 
         while self.running:
             try:
-                current_hash, content_type, content = self._get_hash()
-
-                if not current_hash:
-                    time.sleep(0.5)
+                # 序列号不变说明剪贴板没有变化，无需读取数据
+                sequence = win32clipboard.GetClipboardSequenceNumber()
+                if sequence == self.last_sequence:
+                    time.sleep(self.poll_interval)
                     continue
+                self.last_sequence = sequence
 
-                # 检查哈希是否相同
-                if current_hash == self.last_hash:
-                    time.sleep(0.5)
+                content_type, content, formats = self._read_clipboard()
+                if not content_type:
+                    time.sleep(self.poll_interval)
                     continue
 
-                # 新内容
-                self._log(f"[新内容] 类型={content_type}, 哈希={current_hash[:20]}")
-                self.last_hash = current_hash
-
-                # 处理图片
-                image_path = None
-                if content_type == "image":
-                    image_path = self._save_image(content)
-                    if image_path:
-                        try:
-                            from global_hotkey import global_hotkey
-                            global_hotkey.set_last_image(image_path)
-                            content = f"[图片: {Path(image_path).name}]"
-                        except:
-                            content = "[图片]"
-                else:
-                    content = str(content)
-
-                # 检查冷却时间
-                current_time = time.time()
-                if current_time - self.last_call_time < self.call_cooldown:
-                    self._log(f"[冷却] 跳过回调，剩余 {self.call_cooldown - (current_time - self.last_call_time):.1f} 秒")
-                    time.sleep(self.call_cooldown - (current_time - self.last_call_time))
+                if content_type == "own":
+                    self._count("own_writes")
+                    self._log(f"[跳过] 本程序写入的内容 (来源记录 {content})")
+                    time.sleep(self.poll_interval)
                     continue
 
-                # 调用回调
-                self._log(f"[回调] 调用回调函数")
-                self.last_call_time = time.time()
-                self.callback(content_type, content, image_path)
+                # 哈希与后续处理交给消费线程，检测不等待
+                self._enqueue((content_type, content, formats, sequence))
 
-                # 冷却
-                time.sleep(0.5)
+                time.sleep(self.poll_interval)
 
             except Exception as e:
                 self._log(f"监听错误: {e}")
@@ -152,10 +191,262 @@ class ClipboardWatcher:
                 self._log(traceback.format_exc())
                 time.sleep(1)
 
+    def _count(self, key: str, amount: int = 1):
+        """累加计数器"""
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def get_stats(self) -> dict:
+        """获取捕获计数器快照"""
+        with self.stats_lock:
+            return dict(self.stats)
+
+    @staticmethod
+    def _event_size(event) -> int:
+        """事件占用的数据大小（字节，文本按字数估算）"""
+        content_type, content, formats, _ = event
+        size = len(content) if content else 0
+        for fmt in formats or []:
+            if fmt.get("data"):
+                size += len(fmt["data"])
+        return size
+
+    def _enqueue(self, event):
+        """把事件 (content_type, content, formats, sequence) 放入队列
+
+        队列条数或数据总大小超出上限时丢弃最旧的事件（从不阻塞检测线程）；
+        单条事件超过字节上限时仍然保留，只是先清空队列。
+        """
+        size = self._event_size(event)
+        budget = config.capture_queue_bytes
+        while True:
+            with self.events_lock:
+                over_budget = budget > 0 and self.queued_bytes + size > budget and not self.events.empty()
+                if not over_budget:
+                    try:
+                        self.events.put_nowait(event)
+                        self.queued_bytes += size
+                        self._count("enqueued")
+                        return
+                    except queue.Full:
+                        pass
+            try:
+                self._dequeue()
+                self._count("dropped")
+                reason = "数据超过大小上限" if over_budget else "已满"
+                self._log(f"[丢弃] 事件队列{reason}，丢弃最旧的一条")
+            except queue.Empty:
+                pass
+
+    def _dequeue(self, timeout: float = None):
+        """从队列取出一个事件（timeout 为 None 时不等待），队列为空时抛出 queue.Empty"""
+        if timeout is None:
+            event = self.events.get_nowait()
+        else:
+            event = self.events.get(timeout=timeout)
+        with self.events_lock:
+            self.queued_bytes -= self._event_size(event)
+        return event
+
+    def _next_batch(self):
+        """取出一批连发事件，按配置的策略合并"""
+        try:
+            batch = [self._dequeue(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        policy = config.capture_burst_policy
+        if policy == "debounce":
+            # 等到安静一段时间后只保留最后一条
+            while True:
+                try:
+                    batch.append(self._dequeue(timeout=config.capture_debounce))
+                except queue.Empty:
+                    break
+        else:
+            # 取出当前已排队的所有事件
+            while True:
+                try:
+                    batch.append(self._dequeue())
+                except queue.Empty:
+                    break
+
+        if policy == "debounce":
+            kept = batch[-1:]
+        elif policy == "keep_last":
+            kept = batch[-max(1, config.capture_burst_keep):]
+        else:
+            kept = batch
+
+        if len(kept) < len(batch):
+            self._count("coalesced", len(batch) - len(kept))
+            self._log(f"[合并] 连发 {len(batch)} 条，保留 {len(kept)} 条 (策略={policy})")
+        return kept
+
+    def _consume_loop(self):
+        """消费循环：哈希、去重、保存图片、回调；空闲时补读延后的格式"""
+        while self.running or not self.events.empty():
+            try:
+                batch = self._next_batch()
+                if not batch:
+                    self._fetch_deferred()
+                    continue
+                for event in batch:
+                    self._process_clip(*event)
+            except Exception as e:
+                # 消费线程退出后队列会被填满、新内容全部丢弃，任何错误都不能让它停下
+                self._log(f"消费错误: {e}")
+                import traceback
+                self._log(traceback.format_exc())
+                time.sleep(1)
+
+    def _defer_formats(self, record_id, sequence, formats):
+        """保存格式元数据，记住尚未读取的大格式"""
+        import database
+        database.db.save_formats(record_id, formats)
+
+        pending = [f for f in formats if f["status"] == "deferred"]
+        with self.deferred_lock:
+            # 剪贴板已换成新内容，上一条的延后格式再也读不到了
+            if self.deferred and self.deferred["record_id"] != record_id:
+                database.db.expire_formats(self.deferred["record_id"])
+            self.deferred = None
+            if pending:
+                self.deferred = {
+                    "record_id": record_id,
+                    "sequence": sequence,
+                    "captured_at": time.time(),
+                    "formats": pending,
+                }
+
+    def _fetch_deferred(self, force: bool = False) -> bool:
+        """剪贴板仍是同一内容时读取延后的格式
+
+        读取失败（剪贴板被其他程序占用、数据库出错等）时记录日志，下次空闲时重试，
+        连续失败 DEFERRED_FETCH_ATTEMPTS 次后放弃，标记为已过期。
+
+        Args:
+            force: True 表示用户打开了记录，不等待、不限大小
+        """
+        with self.deferred_lock:
+            pending = self.deferred
+            if not pending:
+                return False
+            if not force and time.time() - pending["captured_at"] < config.format_fetch_delay:
+                return False
+            try:
+                return self._read_deferred(pending, force)
+            except Exception as e:
+                pending["failures"] = pending.get("failures", 0) + 1
+                self._log(f"[格式] 记录 {pending['record_id']} 补读失败 "
+                          f"({pending['failures']}/{self.DEFERRED_FETCH_ATTEMPTS}): {e}")
+                if pending["failures"] >= self.DEFERRED_FETCH_ATTEMPTS:
+                    self._expire_deferred(pending)
+                return False
+
+    def _read_deferred(self, pending: dict, force: bool) -> bool:
+        """读取延后的格式并写入数据库（调用方持有 deferred_lock）"""
+        import database
+        record_id = pending["record_id"]
+        if win32clipboard.GetClipboardSequenceNumber() != pending["sequence"]:
+            database.db.expire_formats(record_id)
+            self.deferred = None
+            return False
+
+        fetched = []
+        win32clipboard.OpenClipboard()
+        try:
+            for fmt in pending["formats"]:
+                if not force and fmt["size"] > config.format_max_size:
+                    continue
+                if fetch_into(fmt):
+                    fetched.append(fmt)
+        finally:
+            win32clipboard.CloseClipboard()
+
+        for fmt in fetched:
+            database.db.store_format_data(record_id, fmt)
+        pending["formats"] = [f for f in pending["formats"] if f["status"] == "deferred"]
+        if not pending["formats"]:
+            self.deferred = None
+        if fetched:
+            self._log(f"[格式] 记录 {record_id} 补读 {len(fetched)} 种格式")
+        return bool(fetched)
+
+    def _expire_deferred(self, pending: dict):
+        """放弃读取延后的格式（调用方持有 deferred_lock）"""
+        import database
+        if self.deferred is pending:
+            self.deferred = None
+        try:
+            database.db.expire_formats(pending["record_id"])
+        except Exception as e:
+            self._log(f"[格式] 标记过期失败: {e}")
+
+    def fetch_record_formats(self, record_id: int) -> bool:
+        """用户打开记录时调用：该记录还有未读取的格式且剪贴板未变化时立即读取"""
+        with self.deferred_lock:
+            if not self.deferred or self.deferred["record_id"] != record_id:
+                return False
+        try:
+            return self._fetch_deferred(force=True)
+        except Exception as e:
+            self._log(f"[格式] 读取失败: {e}")
+            return False
+
+    def _process_clip(self, content_type, content, formats=None, sequence=None):
+        """处理一条新剪贴板内容（消费线程）"""
+        try:
+            current_hash = self._get_hash(content_type, content)
+
+            # 检查哈希是否相同
+            if current_hash == self.last_hash:
+                self._count("duplicates")
+                return
+
+            # 没有格式标记但内容与本程序刚写入的一致（pyperclip 写入）
+            if content_type == "text" and clipboard_origin.consume(current_hash.split(":", 1)[1]):
+                self._count("own_writes")
+                self._log("[跳过] 本程序写入的内容")
+                return
+
+            # 新内容
+            self._log(f"[新内容] 类型={content_type}, 哈希={current_hash[:20]}")
+            self.last_hash = current_hash
+
+            # 处理图片
+            image_path = None
+            if content_type == "image":
+                image_path = self._save_image(content, current_hash.split(":", 1)[1])
+                if image_path:
+                    try:
+                        from global_hotkey import global_hotkey
+                        global_hotkey.set_last_image(image_path)
+                        content = f"[图片: {Path(image_path).name}]"
+                    except:
+                        content = "[图片]"
+            else:
+                content = str(content)
+
+            # 调用回调
+            self._log(f"[回调] 调用回调函数")
+            self._count("recorded")
+            record_id = self.callback(content_type, content, image_path)
+
+            if record_id and formats:
+                self._defer_formats(record_id, sequence, formats)
+
+        except Exception as e:
+            self._log(f"处理错误: {e}")
+            import traceback
+            self._log(traceback.format_exc())
+
     def start(self):
         """启动监听"""
         if not self.running:
             self.running = True
+            self.consumer_thread = threading.Thread(target=self._consume_loop, daemon=True)
+            self.consumer_thread.start()
             self.thread = threading.Thread(target=self._watch_loop, daemon=True)
             self.thread.start()
             self._log("剪贴板监听已启动")
@@ -165,4 +456,8 @@ class ClipboardWatcher:
         self.running = False
         if self.thread:
             self.thread.join(timeout=2)
-        self._log("剪贴板监听已停止")
+        if self.consumer_thread:
+            self.consumer_thread.join(timeout=2)
+        # 等待已提交的图片编码完成，避免留下未写完的文件
+        image_encoder.shutdown(wait=True)
+        self._log(f"剪贴板监听已停止，计数: {self.get_stats()}")
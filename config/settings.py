@@ -15,6 +15,39 @@ class Config:
         self.max_text_length: int = 2000
         self.auto_correct: bool = True
         self.model: str = "glm-4-air"  # 使用 GLM-4-Air 模型（质量更好，响应约5-10秒）
+        # 图片存储格式: "png"（快速压缩）/ "webp"（无损）/ "raw_zstd"（原始像素 + zstd）
+        self.image_format: str = "png"
+        # 压缩力度: png 为 zlib 级别 0-9，webp 为 method 0-6，raw_zstd 为 zstd 级别 1-22
+        self.image_effort: int = 1
+        self.encoder_workers: int = 2  # 后台编码线程数
+        self.encoder_queue_size: int = 4  # 编码队列上限，满时监听线程等待
+        # 剪贴板连发处理: "keep_all"（全部记录）/ "keep_last"（只留最后 N 条）/ "debounce"（静默后只留最后一条）
+        self.capture_burst_policy: str = "keep_all"
+        self.capture_burst_keep: int = 5  # keep_last 策略保留的条数
+        self.capture_debounce: float = 0.3  # debounce 策略的静默时间（秒）
+        self.capture_queue_size: int = 32  # 检测 -> 记录 事件队列上限，满时丢弃最旧的
+        self.capture_queue_bytes: int = 512 * 1024 * 1024  # 事件队列中剪贴板数据的总大小上限（字节），超出时丢弃最旧的
+        # 近似重复截图: 感知哈希（256 位）汉明距离不超过该值视为同一张，0 表示关闭
+        self.near_duplicate_distance: int = 6
+        self.near_duplicate_window: int = 32  # 参与比较的最近截图数
+        self.image_cache_entries: int = 2  # 内存中保留的最近截图数（Ctrl+Shift+V 直接显示）
+        self.thumbnail_cache_mb: int = 32  # 内存中缩略图缓存的上限（MB）
+        self.float_window_memory_mb: int = 256  # 所有浮窗图片占用的内存上限（MB），0 表示不限
+        # 额外记录的剪贴板格式（注册名或 CF_ 名称）
+        self.capture_formats: list = ["HTML Format", "Rich Text Format", "CF_HDROP"]
+        self.format_eager_size: int = 64 * 1024  # 不超过该大小的格式在检测时直接读取（字节）
+        self.format_fetch_delay: float = 2.0  # 剪贴板保持不变多久后在后台补读较大的格式（秒）
+        self.format_max_size: int = 16 * 1024 * 1024  # 超过该大小的格式只在打开记录时读取（字节）
+        self.search_candidates: int = 1000  # 搜索结果每批按相关度排序的命中数（从新到旧逐批）
+        self.similar_results: int = 20  # “查找相似记录”显示的条数
+        self.compress_threshold: int = 16 * 1024  # 超过该字数的文本压缩存储
+        self.archive_enabled: bool = True  # 超出 max_records 的记录移入归档库而不是删除
+        self.archive_after_days: int = 0  # 启动时把早于该天数的记录移入归档库，0 表示关闭
+        self.watchdog_threshold: float = 0.05  # 主线程卡顿超过该时间（秒）写入 watchdog.log，0 表示关闭
+        self.disk_budget_mb: int = 2048  # 数据目录总占用上限（MB），超出时删除最旧的记录和图片，0 表示不限
+        self.log_max_size: int = 1024 * 1024  # 单个日志超过该大小（字节）时轮转
+        self.log_backups: int = 2  # 每个日志保留的旧日志份数
+        self.storage_check_interval: int = 600  # 检查磁盘占用的间隔（秒）
         self.load_config()
 
     def load_config(self):
@@ -25,6 +58,7 @@ class Config:
             try:
                 with open(config_file, "r", encoding="utf-8") as f:
                     data = json.load(f)
+                    self._apply_settings(data)
                     self.api_key = data.get("api_key")
                     if self.api_key:
                         return self.api_key
@@ -39,14 +73,37 @@ class Config:
         # 3. 返回 None（首次运行时提示用户输入）
         return None
 
+    def _apply_settings(self, data: dict):
+        """用配置文件中的值覆盖默认设置（只接受已知且类型一致的项）"""
+        for key, value in data.items():
+            if key == "api_key" or key.startswith("_") or not hasattr(self, key):
+                continue
+            default = getattr(self, key)
+            if isinstance(default, bool) != isinstance(value, bool):
+                continue
+            if isinstance(default, (int, float)) and isinstance(value, (int, float)):
+                setattr(self, key, type(default)(value))
+            elif isinstance(value, type(default)):
+                setattr(self, key, value)
+
     def save_api_key(self, api_key: str):
         """保存 API Key 到本地配置"""
         config_dir = Path.home() / ".clipboard-polisher"
         config_dir.mkdir(exist_ok=True)
         config_file = config_dir / "config.json"
 
+        # 保留配置文件中的其他设置
+        data = {}
+        if config_file.exists():
+            try:
+                with open(config_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                data = {}
+        data["api_key"] = api_key
+
         with open(config_file, "w", encoding="utf-8") as f:
-            json.dump({"api_key": api_key}, f, indent=2, ensure_ascii=False)
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
         self.api_key = api_key
 
@@ -1,11 +1,209 @@
 """
 数据存储模块 - SQLite 实现
+
+读：每个线程一个长连接，WAL 模式下读不会被写阻塞。
+写：统一交给写线程，连续到达的写请求合并到同一个事务提交。
 """
+import queue
 import sqlite3
-import json
-from datetime import datetime
+import threading
+import zlib
+from concurrent.futures import Future
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from config.settings import config
+from content_hash import digest_file, digest_text, DIGEST_LENGTH
+
+# 每个连接都会设置的 pragma
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",   # WAL 下只在检查点 fsync，断电最多丢失最近的事务
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",    # 16 MB 页缓存
+    "PRAGMA mmap_size = 268435456",  # 256 MB 内存映射读取
+    "PRAGMA busy_timeout = 5000",
+)
+# 归档库（ATTACH 为 archive）也使用同样的同步策略
+ARCHIVE_PRAGMAS = (
+    "PRAGMA archive.synchronous = NORMAL",
+    "PRAGMA archive.cache_size = -4000",
+)
+STATEMENT_CACHE_SIZE = 256  # 每个连接缓存的预编译语句数
+WRITE_BATCH_LIMIT = 256  # 一个事务最多合并的写请求数
+
+# 搜索
+TRIGRAM_MIN_LENGTH = 3  # trigram 索引能匹配的最短词长，含更短的词时用二元索引
+SNIPPET_RADIUS = 30  # 摘要中命中词前后保留的字数
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_ROWID = 2 ** 63 - 1  # SQLite rowid 的上限（不限上界的 id 范围查询）
+
+PREVIEW_LENGTH = 100  # 列表摘要保存的字数
+COMPRESS_LEVEL = 6  # zlib 压缩级别
+ARCHIVE_BATCH = 1000  # 归档时每批移动的记录数
+VACUUM_STEP_PAGES = 2000  # 增量回收空闲页时每个事务释放的页数
+FTS_MERGE_PAGES = 500  # 全文索引每次合并写入的页数
+SCHEMAS = ("main", "archive")
+
+# 正文：大文本压缩存放在 content_z 中，content 为空串
+CONTENT_SQL = "coalesce(inflate(content_z), content)"
+
+# 全文索引（都是无内容表）：表名 -> (建表选项, 索引的正文, 索引的纠错结果)
+# records_fts 用 trigram 检索 3 个字以上的词；records_bigram 把文字拆成每个位置起的两个字
+# （以空格分隔，见 bigram_text），单字按前缀、两个字按词、更长的词按相邻二元组的短语检索
+FTS_TABLES = {
+    "records_fts": ("tokenize='trigram'", CONTENT_SQL, "corrected"),
+    "records_bigram": (
+        "prefix='1', tokenize='unicode61 remove_diacritics 0'",
+        f"bigram_text({CONTENT_SQL})", "bigram_text(corrected)",
+    ),
+}
+
+# 旧版本维护全文索引的触发器和视图（调用 inflate()，升级时删除）
+LEGACY_FTS_TRIGGERS = ("trg_records_fts_insert", "trg_records_fts_delete", "trg_records_fts_update")
+
+# 回填摘要、合并重复记录时读取的字段
+BACKFILL_COLUMNS = """
+    id, content_type, content, image_path, corrected, correction_status, copy_count, timestamp
+"""
+
+RECORD_COLUMNS = f"""
+    id, content_type, {CONTENT_SQL}, image_path, timestamp, corrected, correction_status, copy_count
+"""
+# 列表只需要的字段，不读取正文
+SUMMARY_COLUMNS = """
+    id, content_type, image_path, timestamp, correction_status, copy_count, preview,
+    corrected IS NOT NULL, content_length
+"""
+
+
+def _row_to_record(row) -> Dict:
+    """RECORD_COLUMNS 查询结果转为记录字典"""
+    return {
+        "id": row[0],
+        "content_type": row[1],
+        "content": row[2],
+        "image_path": row[3],
+        "timestamp": row[4],
+        "corrected": row[5],
+        "correction_status": row[6],
+        "copy_count": row[7]
+    }
+
+
+def _row_to_summary(row) -> Dict:
+    """SUMMARY_COLUMNS 查询结果转为列表项字典"""
+    return {
+        "id": row[0],
+        "content_type": row[1],
+        "image_path": row[2],
+        "timestamp": row[3],
+        "correction_status": row[4],
+        "copy_count": row[5],
+        "preview": row[6] or "",
+        "has_correction": bool(row[7]),
+        "content_length": row[8]
+    }
+
+
+def deflate_text(text: Optional[str]) -> Optional[bytes]:
+    """压缩正文（utf-8 + zlib）"""
+    if text is None:
+        return None
+    return zlib.compress(text.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def inflate_text(data: Optional[bytes]) -> Optional[str]:
+    """解压正文；data 为空时返回 None（SQL 中配合 coalesce 使用）"""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+def bigram_text(text: Optional[str]) -> Optional[str]:
+    """把文字拆成每个位置起的两个字，以空格分隔（二元索引 records_bigram 的输入）
+
+    "天气好" -> "天气 气好 好"。分词器再去掉其中的空白和标点，每段最多得到一个词，
+    同一段文字在正文和搜索词里得到相同的词序列，相邻的段就是短语中相邻的词。
+    """
+    if text is None:
+        return None
+    return " ".join(text[i:i + 2] for i in range(len(text)))
+
+
+def bigram_query(term: str) -> Optional[str]:
+    """把搜索词转成 records_bigram 的查询，词中没有字母数字（无法用索引）时返回 None"""
+    if len(term) == 1:
+        return f'"{term}"*' if term.isalnum() else None
+    if not any(c.isalnum() for c in term):
+        return None
+    pairs = [term[i:i + 2] for i in range(len(term) - 1)]
+    return '"' + " ".join(pairs).replace('"', '""') + '"'
+
+
+def _rank_window(window: List[tuple], folded_terms: List[str]) -> List[Tuple[float, int]]:
+    """计算一批候选的 BM25 分数，返回 [(分数, id)]，不含全部的词的候选被剔除
+
+    window 为 Database._search_window 的结果，folded_terms 为 casefold 后的搜索词。
+    """
+    documents = []
+    for record_id, content, corrected in window:
+        document = f"{content}\n{corrected or ''}".casefold()
+        counts = [document.count(term) for term in folded_terms]
+        if all(counts):
+            documents.append((record_id, len(document), counts))
+    if not documents:
+        return []
+
+    # 每条都包含全部的词，IDF 对批内排序没有影响，只算词频和长度归一化
+    average_length = sum(length for _, length, _ in documents) / len(documents) or 1
+    scored = []
+    for record_id, length, counts in documents:
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+        score = sum(tf * (BM25_K1 + 1) / (tf + norm) for tf in counts)
+        scored.append((round(score, 6), record_id))
+    return scored
+
+
+def make_preview(content_type: str, content: str) -> str:
+    """生成列表摘要：文本取开头一段（换行变空格），文件列表只取文件名"""
+    if content_type == "files":
+        names = [Path(p).name for p in content.split("\n")[:10]]
+        return ", ".join(names)[:PREVIEW_LENGTH]
+    return " ".join(content[:PREVIEW_LENGTH].split())
+
+
+def _escape_like(term: str) -> str:
+    """转义 LIKE 通配符"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def make_snippet(text: str, terms: List[str]) -> Optional[str]:
+    """截取第一个命中词附近的文字，命中词用【】标出；没有命中返回 None"""
+    lowered = text.lower()
+    hits = [(lowered.find(t.lower()), t) for t in terms]
+    hits = [(pos, t) for pos, t in hits if pos >= 0]
+    if not hits:
+        return None
+    first = min(pos for pos, _ in hits)
+    start = max(0, first - SNIPPET_RADIUS)
+    end = min(len(text), first + SNIPPET_RADIUS * 2)
+    snippet = text[start:end].replace("\n", " ")
+
+    # 从后往前插入标记，位置不受前面的标记影响
+    marks = []
+    lowered_snippet = snippet.lower()
+    for t in terms:
+        pos = lowered_snippet.find(t.lower())
+        while pos >= 0:
+            marks.append((pos, pos + len(t)))
+            pos = lowered_snippet.find(t.lower(), pos + len(t))
+    for begin, finish in sorted(marks, reverse=True):
+        snippet = snippet[:begin] + "【" + snippet[begin:finish] + "】" + snippet[finish:]
+
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return prefix + snippet + suffix
+
 
 class Database:
     """剪贴板记录数据库"""
@@ -15,12 +213,190 @@ class Database:
             db_path = Path.home() / ".clipboard-polisher" / "records.db"
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 归档库：超龄 / 被淘汰的记录压缩后移到这里，不拖慢主表
+        self.archive_path = self.db_path.with_suffix(".archive.db")
+        self.local = threading.local()  # 各线程的只读连接
+        self.write_queue: "queue.Queue" = queue.Queue()
+        self.writer_thread: Optional[threading.Thread] = None
+        self.writer_lock = threading.Lock()
+        self.fts_enabled = False  # init_db 中创建全文索引成功后置为 True
+        # 记录被删除（含移入归档）后在写线程调用（参数为记录 ID 列表）
+        self.remove_listeners: List[Callable[[List[int]], None]] = []
         self.init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        """打开一个长连接（自动提交模式，事务由调用方显式控制）
+
+        注册 inflate()/deflate()/bigram_text() 供本程序的查询使用（库里的触发器和视图不能用它们），
+        并挂上归档库。
+        """
+        conn = sqlite3.connect(
+            self.db_path, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.create_function("inflate", 1, inflate_text, deterministic=True)
+        conn.create_function("deflate", 1, deflate_text, deterministic=True)
+        conn.create_function("bigram_text", 1, bigram_text, deterministic=True)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute("ATTACH DATABASE ? AS archive", (str(self.archive_path),))
+        for pragma in ARCHIVE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """当前线程的读连接"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self.local.conn = conn
+        return conn
+
+    def _write(self, operation: Callable[[sqlite3.Cursor], object], solo: bool = False,
+               transaction: bool = True):
+        """把写操作交给写线程执行，等待提交后返回 operation 的结果
+
+        solo 为 True 时单独一个事务执行，不与其它请求合并（用于修改大量行的批量操作）。
+        transaction 为 False 时不开启事务（VACUUM、检查点等不能在事务中执行的语句），隐含 solo。
+        """
+        future = Future()
+        self.write_queue.put((operation, future, solo or not transaction, transaction))
+        self._ensure_writer()
+        return future.result()
+
+    def _ensure_writer(self):
+        """按需启动写线程"""
+        with self.writer_lock:
+            if self.writer_thread is None or not self.writer_thread.is_alive():
+                self.writer_thread = threading.Thread(
+                    target=self._write_loop, name="db-writer", daemon=True
+                )
+                self.writer_thread.start()
+
+    def add_remove_listener(self, callback: Callable[[List[int]], None]):
+        """注册回调：记录被删除或移入归档的事务提交后，在写线程调用 callback(记录 ID 列表)"""
+        self.remove_listeners.append(callback)
+
+    def _write_loop(self):
+        """写线程：把排队的写请求合并成一个事务（每个请求一个保存点，互不影响）"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        # 收集被删除的记录 ID：临时触发器只存在于这个连接，不写进库里
+        cursor.execute("CREATE TEMP TABLE removed_records (id INTEGER PRIMARY KEY)")
+        cursor.execute("""
+            CREATE TEMP TRIGGER trg_collect_removed
+            AFTER DELETE ON main.clipboard_records
+            BEGIN
+                INSERT OR IGNORE INTO removed_records (id) VALUES (OLD.id);
+            END
+        """)
+        while True:
+            batch = [self.write_queue.get()]
+            while len(batch) < WRITE_BATCH_LIMIT:
+                try:
+                    batch.append(self.write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is None for item in batch)
+            batch = [item for item in batch if item is not None]
+
+            # 连续的普通请求合并为一组，solo 请求各自一组
+            groups = []
+            for item in batch:
+                if item[2] or not groups or groups[-1][-1][2]:
+                    groups.append([item])
+                else:
+                    groups[-1].append(item)
+            for group in groups:
+                if not group[0][3]:
+                    results = self._run_outside_transaction(cursor, group[0])
+                else:
+                    results = self._run_write_group(conn, cursor, group)
+                self._notify_removed(cursor)
+                for future, result, error in results:
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+
+            if stop:
+                conn.close()
+                return
+
+    def _notify_removed(self, cursor):
+        """把刚提交的写操作删除的记录通知 remove_listeners（回滚的删除已随事务撤销）"""
+        record_ids = [row[0] for row in cursor.execute("SELECT id FROM temp.removed_records")]
+        if not record_ids:
+            return
+        cursor.execute("DELETE FROM temp.removed_records")
+        for callback in list(self.remove_listeners):
+            try:
+                callback(record_ids)
+            except Exception as e:
+                print(f"[数据库] 删除通知失败: {e}")
+
+    def _run_write_group(self, conn, cursor, group) -> list:
+        """在一个事务中执行一组写请求，返回 [(future, 结果, 异常)]
+
+        只有一个请求时不用保存点：失败时回滚整个事务效果相同，而大事务在保存点内
+        修改大量页面时，子日志的开销会随表的大小增长。
+        """
+        results = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            if len(group) == 1:
+                operation, future = group[0][:2]
+                results.append((future, operation(cursor), None))
+            else:
+                for operation, future, _, _ in group:
+                    cursor.execute("SAVEPOINT write_op")
+                    try:
+                        results.append((future, operation(cursor), None))
+                        cursor.execute("RELEASE write_op")
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO write_op")
+                        cursor.execute("RELEASE write_op")
+                        results.append((future, None, e))
+            cursor.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            results = [(future, None, e) for _, future, _, _ in group]
+        return results
+
+    @staticmethod
+    def _run_outside_transaction(cursor, item) -> list:
+        """在自动提交模式下执行一个写请求"""
+        operation, future = item[:2]
+        try:
+            return [(future, operation(cursor), None)]
+        except Exception as e:
+            return [(future, None, e)]
+
+    def close(self):
+        """停止写线程（等待已排队的写入提交），关闭当前线程的读连接"""
+        with self.writer_lock:
+            writer = self.writer_thread
+            self.writer_thread = None
+        if writer is not None and writer.is_alive():
+            self.write_queue.put(None)
+            writer.join()
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
     def init_db(self):
         """初始化数据库表"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        # 新建的库直接启用增量回收（已有的库由 enable_incremental_vacuum 转换）
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA archive.auto_vacuum = INCREMENTAL")
+        # WAL 模式记录在数据库文件中，设置一次即可
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA archive.journal_mode = WAL")
         cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
 
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS clipboard_records (
@@ -34,102 +410,1065 @@ class Database:
             )
         """)
 
-        conn.commit()
+        # 图片引用计数按 image_path 统计
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_records_image_path
+            ON clipboard_records (image_path)
+            WHERE image_path IS NOT NULL
+        """)
+
+        # 内容摘要去重（旧数据库升级时补列并回填）
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(clipboard_records)")}
+        if "copy_count" not in columns:
+            cursor.execute("ALTER TABLE clipboard_records ADD COLUMN copy_count INTEGER NOT NULL DEFAULT 1")
+        released: List[str] = []  # 升级时合并掉的重复记录引用的图片，提交后回收
+        if "content_hash" not in columns:
+            cursor.execute("ALTER TABLE clipboard_records ADD COLUMN content_hash TEXT")
+            released = self._backfill_content_hash(cursor)
+        if "preview" not in columns:
+            cursor.execute("ALTER TABLE clipboard_records ADD COLUMN preview TEXT")
+            self._backfill_preview(cursor)
+        # 大文本压缩存储：content_z 为 zlib 压缩后的正文，content_length 为原文字数
+        if "content_z" not in columns:
+            cursor.execute("ALTER TABLE clipboard_records ADD COLUMN content_z BLOB")
+            cursor.execute("ALTER TABLE clipboard_records ADD COLUMN content_length INTEGER")
+            cursor.execute("UPDATE clipboard_records SET content_length = length(content)")
+            self._compress_existing(cursor)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_records_content_hash
+            ON clipboard_records (content_hash)
+        """)
+
+        # 列表与 FIFO 淘汰按 (timestamp, id) 排序；按类型筛选
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_records_timestamp
+            ON clipboard_records (timestamp, id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_records_type
+            ON clipboard_records (content_type, timestamp)
+        """)
+
+        # 记录数由触发器维护，插入时不必 COUNT(*) 全表
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS record_counter (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                count INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_records_count_insert
+            AFTER INSERT ON clipboard_records
+            BEGIN
+                UPDATE record_counter SET count = count + 1 WHERE id = 0;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_records_count_delete
+            AFTER DELETE ON clipboard_records
+            BEGIN
+                UPDATE record_counter SET count = count - 1 WHERE id = 0;
+            END
+        """)
+        if cursor.execute("SELECT 1 FROM record_counter WHERE id = 0").fetchone() is None:
+            cursor.execute("INSERT INTO record_counter (id, count) SELECT 0, COUNT(*) FROM clipboard_records")
+
+        # 全文检索
+        self.fts_enabled = self._init_fts(cursor)
+
+        # 归档表：列与主表相同，正文一律压缩
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archive.archived_records (
+                id INTEGER PRIMARY KEY,
+                content_type TEXT NOT NULL,
+                content_z BLOB NOT NULL,
+                content_length INTEGER,
+                image_path TEXT,
+                timestamp DATETIME,
+                corrected TEXT,
+                correction_status TEXT,
+                copy_count INTEGER NOT NULL DEFAULT 1,
+                content_hash TEXT,
+                preview TEXT,
+                archived_at DATETIME
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS archive.idx_archived_timestamp
+            ON archived_records (timestamp, id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS archive.idx_archived_image_path
+            ON archived_records (image_path)
+            WHERE image_path IS NOT NULL
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS archive.idx_archived_content_hash
+            ON archived_records (content_hash)
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archive.archive_counter (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                count INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS archive.trg_archived_count_insert
+            AFTER INSERT ON archived_records
+            BEGIN
+                UPDATE archive_counter SET count = count + 1 WHERE id = 0;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS archive.trg_archived_count_delete
+            AFTER DELETE ON archived_records
+            BEGIN
+                UPDATE archive_counter SET count = count - 1 WHERE id = 0;
+            END
+        """)
+        if cursor.execute("SELECT 1 FROM archive.archive_counter WHERE id = 0").fetchone() is None:
+            cursor.execute("""
+                INSERT INTO archive.archive_counter (id, count)
+                SELECT 0, COUNT(*) FROM archive.archived_records
+            """)
+
+        # 旧版本的图片记录按文件内容补上摘要（在全文索引和归档表就绪后，合并时要同步索引）
+        released += self._backfill_image_hash(cursor)
+
+        # 记录附带的其他剪贴板格式（HTML、RTF、文件列表），data 为空表示延后读取
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS clipboard_formats (
+                record_id INTEGER NOT NULL,
+                format_name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT,
+                data BLOB,
+                status TEXT NOT NULL DEFAULT 'deferred',
+                PRIMARY KEY (record_id, format_name)
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_records_delete_formats
+            AFTER DELETE ON clipboard_records
+            BEGIN
+                DELETE FROM clipboard_formats WHERE record_id = OLD.id;
+            END
+        """)
+
+        cursor.execute("COMMIT")
         conn.close()
+        self._release_images(released)
+
+    def _init_fts(self, cursor) -> bool:
+        """创建 FTS5 全文索引（见 FTS_TABLES，中文不用分词即可按任意子串检索），不支持时返回 False
+
+        索引是无内容表（content=''），由修改记录的代码在同一事务中调用 _fts_add / _fts_remove 维护。
+        压缩存储的正文要用本程序注册的 inflate() 解压，库里因此不放任何触发器或视图：
+        sqlite3 命令行、DB Browser、备份脚本等没有这个函数的工具照样可以增删改记录。
+        它们插入的记录搜索不到，删除的记录留在索引里但搜索结果与主表按 id 关联，不会出现。
+        """
+        created = []
+        for table in FTS_TABLES:
+            row = cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+            if row is not None and "content=''" not in row[0]:
+                # 旧版本由调用 inflate() 的触发器和视图维护，改为无内容表后重建
+                cursor.execute(f"DROP TABLE {table}")
+                row = None
+            if row is None:
+                created.append(table)
+        for trigger in LEGACY_FTS_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP VIEW IF EXISTS records_fts_source")
+
+        try:
+            for table in created:
+                cursor.execute(f"""
+                    CREATE VIRTUAL TABLE {table} USING fts5(
+                        content, corrected,
+                        content='',
+                        {FTS_TABLES[table][0]}
+                    )
+                """)
+        except sqlite3.OperationalError as e:
+            print(f"[数据库] SQLite 不支持 FTS5 trigram，搜索使用 LIKE: {e}")
+            return False
+
+        self.fts_enabled = True
+        if created:
+            # 新建或升级：为已有记录建立索引
+            self._fts_sync(cursor, None, remove=False, tables=created)
+        return True
+
+    def _fts_add(self, cursor, record_ids: Optional[List[int]] = None):
+        """把记录加入全文索引（在插入或修改记录的同一事务中调用），record_ids 为 None 时加入全部记录"""
+        self._fts_sync(cursor, record_ids, remove=False)
+
+    def _fts_remove(self, cursor, record_ids: Optional[List[int]] = None):
+        """从全文索引中移除记录（须在删除或修改记录之前调用，无内容表删除时要提供原来的文字）"""
+        self._fts_sync(cursor, record_ids, remove=True)
+
+    def _fts_sync(self, cursor, record_ids: Optional[List[int]], remove: bool,
+                  tables: Optional[List[str]] = None):
+        """_fts_add / _fts_remove 的实现，tables 为 None 时同步 FTS_TABLES 中的全部索引"""
+        if not self.fts_enabled:
+            return
+        if record_ids is not None:
+            record_ids = list(record_ids)
+        for table in tables or FTS_TABLES:
+            _, content, corrected = FTS_TABLES[table]
+            # 只删除确实在索引中的记录、只加入还不在索引中的记录（其他工具插入的记录没有进索引，
+            # 无内容表删除不存在的文档会损坏索引）；{table}_docsize 每个已索引文档一行
+            if remove:
+                head = f"INSERT INTO {table} ({table}, rowid, content, corrected) SELECT 'delete', "
+                indexed = "EXISTS"
+            else:
+                head = f"INSERT INTO {table} (rowid, content, corrected) SELECT "
+                indexed = "NOT EXISTS"
+            sql = f"""
+                {head}id, {content}, {corrected} FROM clipboard_records r
+                WHERE {indexed} (SELECT 1 FROM {table}_docsize d WHERE d.id = r.id)
+            """
+            if record_ids is None:
+                cursor.execute(sql)
+                continue
+            # 分批执行，避免超出 SQL 参数个数上限
+            for start in range(0, len(record_ids), ARCHIVE_BATCH):
+                batch = record_ids[start:start + ARCHIVE_BATCH]
+                cursor.execute(f"{sql} AND id IN ({', '.join('?' * len(batch))})", batch)
+
+    @staticmethod
+    def content_hash_for(content_type: str, content: str, image_path: str = None) -> Optional[str]:
+        """计算记录的内容摘要：文本/文件列表按内容，图片按（以摘要命名的）图片文件"""
+        if content_type == "image":
+            if not image_path:
+                return None
+            stem = Path(image_path).stem
+            if len(stem) == DIGEST_LENGTH:
+                return f"image:{stem}"
+            # 旧版本的 clip_<时间戳>.png 不以摘要命名：按文件内容计算，文件已不存在时按路径
+            try:
+                return f"image_file:{digest_file(image_path)}"
+            except OSError:
+                return f"image_path:{digest_text(image_path)}"
+        return f"{content_type}:{digest_text(content)}"
+
+    def _backfill_content_hash(self, cursor) -> List[str]:
+        """为已有记录回填摘要，返回需要回收的图片
+
+        摘要有唯一索引，重复内容合并为最新的一条：复制次数累加，最新一条没有纠错结果时
+        沿用较早记录的，其余记录删除。
+        """
+        cursor.execute(f"""
+            SELECT {BACKFILL_COLUMNS} FROM clipboard_records
+            ORDER BY timestamp DESC, id DESC
+        """)
+        groups: Dict[str, List[tuple]] = {}
+        for row in cursor.fetchall():
+            content_hash = self.content_hash_for(row[1], row[2], row[3])
+            if content_hash:
+                groups.setdefault(content_hash, []).append(row)
+        return self._merge_duplicates(cursor, groups)
+
+    def _backfill_image_hash(self, cursor) -> List[str]:
+        """为还没有摘要的旧版本图片记录（clip_*.png）按文件内容补上摘要，返回需要回收的图片
+
+        主表中与已有记录相同的图片按 _backfill_content_hash 的规则合并；归档库只补摘要，
+        导入备份时才能认出已归档的相同图片。
+        """
+        cursor.execute(f"""
+            SELECT {BACKFILL_COLUMNS} FROM clipboard_records
+            WHERE content_hash IS NULL AND content_type = 'image'
+        """)
+        legacy = cursor.fetchall()
+        groups: Dict[str, List[tuple]] = {}
+        for row in legacy:
+            content_hash = self.content_hash_for(row[1], row[2], row[3])
+            if content_hash:
+                groups.setdefault(content_hash, []).append(row)
+        for content_hash, rows in groups.items():
+            rows += cursor.execute(
+                f"SELECT {BACKFILL_COLUMNS} FROM clipboard_records WHERE content_hash = ?", (content_hash,)
+            ).fetchall()
+            # 最新的一条在前（同 _backfill_content_hash 的 ORDER BY timestamp DESC, id DESC）
+            rows.sort(key=lambda row: (row[7] or "", row[0]), reverse=True)
+        released = self._merge_duplicates(cursor, groups)
+
+        cursor.execute("""
+            SELECT id, content_type, image_path FROM archive.archived_records
+            WHERE content_hash IS NULL AND content_type = 'image'
+        """)
+        archived = [
+            (self.content_hash_for(content_type, "", image_path), record_id)
+            for record_id, content_type, image_path in cursor.fetchall()
+        ]
+        cursor.executemany("UPDATE archive.archived_records SET content_hash = ? WHERE id = ?", archived)
+        if legacy or archived:
+            print(f"[数据库] 为 {len(legacy) + len(archived)} 条旧图片记录补上摘要")
+        return released
+
+    def _merge_duplicates(self, cursor, groups: Dict[str, List[tuple]]) -> List[str]:
+        """写入摘要并合并重复记录（groups 为 摘要 -> BACKFILL_COLUMNS 行，最新的在前），返回需要回收的图片"""
+        updates = []
+        merged = []
+        deleted = []
+        released = []
+        for content_hash, rows in groups.items():
+            kept = rows[0]
+            updates.append((content_hash, kept[0]))
+            if len(rows) == 1:
+                continue
+            corrected, status = kept[4], kept[5]
+            if corrected is None:
+                older = next((row for row in rows[1:] if row[4] is not None), None)
+                if older is not None:
+                    corrected, status = older[4], older[5]
+            merged.append((sum(row[6] or 1 for row in rows), corrected, status, kept[0]))
+            for row in rows[1:]:
+                deleted.append((row[0],))
+                if row[3] and row[3] != kept[3]:
+                    released.append(row[3])
+
+        self._fts_remove(cursor, [row[0] for row in deleted])
+        cursor.executemany("DELETE FROM clipboard_records WHERE id = ?", deleted)
+        cursor.executemany("""
+            UPDATE clipboard_records SET copy_count = ?, corrected = ?, correction_status = ?
+            WHERE id = ?
+        """, merged)
+        cursor.executemany("UPDATE clipboard_records SET content_hash = ? WHERE id = ?", updates)
+        if deleted:
+            print(f"[数据库] 合并 {len(deleted)} 条重复记录")
+        return released
+
+    def _backfill_preview(self, cursor):
+        """为已有记录生成列表摘要"""
+        cursor.execute("SELECT id, content_type, content FROM clipboard_records")
+        updates = [
+            (make_preview(content_type, content), record_id)
+            for record_id, content_type, content in cursor.fetchall()
+        ]
+        cursor.executemany("UPDATE clipboard_records SET preview = ? WHERE id = ?", updates)
+
+    def _compress_existing(self, cursor):
+        """旧数据库升级：压缩已有的大文本"""
+        cursor.execute(
+            "SELECT id, content FROM clipboard_records WHERE length(content) > ?",
+            (config.compress_threshold,)
+        )
+        updates = [(deflate_text(content), record_id) for record_id, content in cursor.fetchall()]
+        cursor.executemany(
+            "UPDATE clipboard_records SET content = '', content_z = ? WHERE id = ?", updates
+        )
 
     def add_record(self, content_type: str, content: str, image_path: str = None) -> int:
         """添加新记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # 摘要、压缩在调用线程完成，写线程只执行 SQL
+        content_hash = self.content_hash_for(content_type, content, image_path)
+        preview = make_preview(content_type, content)
+        content_length = len(content)
+        if content_length > config.compress_threshold:
+            stored_content, content_z = "", deflate_text(content)
+        else:
+            stored_content, content_z = content, None
+        max_records = config.max_records
+        archive = config.archive_enabled
+        compress_threshold = config.compress_threshold
 
-        cursor.execute("""
-            INSERT INTO clipboard_records (content_type, content, image_path)
-            VALUES (?, ?, ?)
-        """, (content_type, content, image_path))
+        def insert(cursor):
+            if content_hash is not None:
+                restored = self._restore_archived(cursor, content_hash, compress_threshold)
+                if restored is not None:
+                    record_id, restored_image = restored
+                    self._fts_add(cursor, [record_id])
+                    released = self._evict_overflow(cursor, max_records, archive)
+                    if image_path != restored_image:
+                        # 旧记录沿用自己的图片，刚保存的这张不再被引用
+                        released.append(image_path)
+                    return record_id, released
+
+            # 相同内容已有记录时只刷新时间并累加复制次数（upsert）
+            # 时间精确到毫秒，同一秒内的多条记录也能分清先后
+            cursor.execute("""
+                INSERT INTO clipboard_records
+                    (content_type, content, content_z, content_length, image_path, content_hash,
+                     preview, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                ON CONFLICT(content_hash) DO UPDATE SET
+                    timestamp = excluded.timestamp,
+                    copy_count = copy_count + 1
+            """, (content_type, stored_content, content_z, content_length, image_path, content_hash,
+                  preview))
+
+            if content_hash is None:
+                record_id = cursor.lastrowid
+            else:
+                cursor.execute(
+                    "SELECT id, copy_count FROM clipboard_records WHERE content_hash = ?", (content_hash,)
+                )
+                record_id, copy_count = cursor.fetchone()
+                if copy_count > 1:
+                    # 只是已有记录被再次复制，行数没有变化
+                    return record_id, []
+
+            self._fts_add(cursor, [record_id])
+            return record_id, self._evict_overflow(cursor, max_records, archive)
+
+        record_id, released = self._write(insert)
+        self._release_images(released)
+        return record_id
+
+    def _restore_archived(self, cursor, content_hash: str,
+                          compress_threshold: int) -> Optional[Tuple[int, Optional[str]]]:
+        """相同内容只在归档库中时把它移回主表（刷新时间、累加复制次数，保留纠错结果），
+        返回 (记录 id, 图片路径)；归档库中没有时返回 None
 
+        id 尽量沿用归档时的 id（主库重建后被占用时重新分配），正文按 compress_threshold
+        决定解压回 content 还是保持压缩。
+        """
+        row = cursor.execute("""
+            SELECT id, image_path FROM archive.archived_records
+            WHERE content_hash = ?
+              AND NOT EXISTS (SELECT 1 FROM main.clipboard_records WHERE content_hash = ?)
+        """, (content_hash, content_hash)).fetchone()
+        if row is None:
+            return None
+        archived_id, image_path = row
+        cursor.execute("""
+            INSERT INTO main.clipboard_records
+                (id, content_type, content, content_z, content_length, image_path, content_hash,
+                 preview, timestamp, corrected, correction_status, copy_count)
+            SELECT CASE WHEN EXISTS (SELECT 1 FROM main.clipboard_records r WHERE r.id = a.id)
+                        THEN NULL ELSE a.id END,
+                   content_type,
+                   CASE WHEN content_length > ? THEN '' ELSE inflate(content_z) END,
+                   CASE WHEN content_length > ? THEN content_z END,
+                   content_length, image_path, content_hash, preview,
+                   strftime('%Y-%m-%d %H:%M:%f', 'now'), corrected, correction_status, copy_count + 1
+            FROM archive.archived_records a
+            WHERE a.id = ?
+        """, (compress_threshold, compress_threshold, archived_id))
         record_id = cursor.lastrowid
-        print(f"[DEBUG] 添加记录 ID={record_id}, 类型={content_type}, 内容长度={len(content)}")
+        cursor.execute("DELETE FROM archive.archived_records WHERE id = ?", (archived_id,))
+        return record_id, image_path
+
+    def add_records_bulk(self, records: List[Dict]) -> int:
+        """批量导入记录（保留原时间戳），返回实际新增的条数
+
+        records 的字段同 get_record 的返回值（id 忽略）。内容摘要已存在于主表或归档库的
+        记录跳过；导入后超出 max_records 的最旧记录照常归档或删除。
+        """
+        rows = []
+        for record in records:
+            content_type, content = record["content_type"], record["content"]
+            image_path = record.get("image_path")
+            content_length = len(content)
+            if content_length > config.compress_threshold:
+                stored_content, content_z = "", deflate_text(content)
+            else:
+                stored_content, content_z = content, None
+            content_hash = self.content_hash_for(content_type, content, image_path)
+            rows.append((
+                content_type, stored_content, content_z, content_length, image_path, content_hash,
+                make_preview(content_type, content), record["timestamp"], record.get("corrected"),
+                record.get("correction_status") or "pending", record.get("copy_count") or 1,
+                content_hash
+            ))
+        max_records = config.max_records
+        archive = config.archive_enabled
+
+        def insert(cursor):
+            last_id = cursor.execute("SELECT ifnull(max(id), 0) FROM clipboard_records").fetchone()[0]
+            cursor.executemany("""
+                INSERT INTO clipboard_records
+                    (content_type, content, content_z, content_length, image_path, content_hash,
+                     preview, timestamp, corrected, correction_status, copy_count)
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM archive.archived_records WHERE content_hash = ?)
+                ON CONFLICT(content_hash) DO NOTHING
+            """, rows)
+            # rowcount 只计语句本身插入的行，不含触发器的修改
+            inserted = cursor.rowcount
+            # 插入完成后一次性建索引，比逐行维护 trigram 索引快约 3 倍
+            new_ids = [row[0] for row in cursor.execute(
+                "SELECT id FROM clipboard_records WHERE id > ?", (last_id,)
+            )]
+            self._fts_add(cursor, new_ids)
+            return inserted, self._evict_overflow(cursor, max_records, archive)
 
-        # 检查是否超过最大记录数，FIFO 删除
-        cursor.execute("SELECT COUNT(*) FROM clipboard_records")
+        inserted, released = self._write(insert, solo=True)
+        self._release_images(released)
+        return inserted
+
+    def _evict_overflow(self, cursor, max_records: int, archive: bool) -> List[Optional[str]]:
+        """超过最大记录数时 FIFO 淘汰（沿索引只读取被淘汰的行），返回需要回收的图片"""
+        cursor.execute("SELECT count FROM record_counter WHERE id = 0")
         count = cursor.fetchone()[0]
+        if count <= max_records:
+            return []
+
+        cursor.execute("""
+            SELECT id, image_path FROM clipboard_records
+            ORDER BY timestamp ASC, id ASC
+            LIMIT ?
+        """, (count - max_records,))
+        evicted = cursor.fetchall()
+        if archive:
+            # 移入归档库，图片仍被归档记录引用，不回收
+            self._move_to_archive(cursor, [row[0] for row in evicted])
+            return []
+        self._fts_remove(cursor, [row[0] for row in evicted])
+        cursor.executemany(
+            "DELETE FROM clipboard_records WHERE id = ?",
+            [(row[0],) for row in evicted]
+        )
+        return [row[1] for row in evicted]
+
+    def _move_to_archive(self, cursor, record_ids: List[int]):
+        """把记录移到归档库（在写线程的事务中执行）"""
+        # 分批执行，避免超出 SQL 参数个数上限
+        for start in range(0, len(record_ids), ARCHIVE_BATCH):
+            self._move_batch_to_archive(cursor, record_ids[start:start + ARCHIVE_BATCH])
+
+    def _move_batch_to_archive(self, cursor, record_ids: List[int]):
+        """_move_to_archive 的一批"""
+        if not record_ids:
+            return
+        placeholders = ", ".join("?" * len(record_ids))
+        # 主库被删除重建后 id 会从头开始，先清掉归档中的同 id 旧记录
+        cursor.execute(f"DELETE FROM archive.archived_records WHERE id IN ({placeholders})", record_ids)
+        cursor.execute(f"""
+            INSERT INTO archive.archived_records
+                (id, content_type, content_z, content_length, image_path, timestamp, corrected,
+                 correction_status, copy_count, content_hash, preview, archived_at)
+            SELECT id, content_type, coalesce(content_z, deflate(content)), content_length, image_path,
+                   timestamp, corrected, correction_status, copy_count, content_hash, preview,
+                   strftime('%Y-%m-%d %H:%M:%f', 'now')
+            FROM main.clipboard_records
+            WHERE id IN ({placeholders})
+        """, record_ids)
+        self._fts_remove(cursor, record_ids)
+        cursor.execute(f"DELETE FROM main.clipboard_records WHERE id IN ({placeholders})", record_ids)
+
+    def archive_old_records(self, days: int = None) -> int:
+        """把早于 days 天的记录移到归档库，返回移动的条数（分批提交，不长时间占用写线程）"""
+        days = config.archive_after_days if days is None else days
+        if days <= 0:
+            return 0
 
-        from config.settings import config
-        if count > config.max_records:
+        def move_batch(cursor):
             cursor.execute("""
-                DELETE FROM clipboard_records
-                WHERE id IN (
-                    SELECT id FROM clipboard_records
-                    ORDER BY timestamp ASC
-                    LIMIT ?
-                )
-            """, (count - config.max_records,))
+                SELECT id FROM clipboard_records
+                WHERE timestamp < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)
+                ORDER BY timestamp ASC, id ASC
+                LIMIT ?
+            """, (f"-{days} days", ARCHIVE_BATCH))
+            record_ids = [row[0] for row in cursor.fetchall()]
+            self._move_to_archive(cursor, record_ids)
+            return len(record_ids)
 
-        conn.commit()
-        conn.close()
+        total = 0
+        while True:
+            moved = self._write(move_batch, solo=True)
+            total += moved
+            if moved < ARCHIVE_BATCH:
+                break
+        if total:
+            print(f"[数据库] 归档 {total} 条超过 {days} 天的记录")
+        return total
 
-        return record_id
+    def schedule_archive(self):
+        """在后台线程执行一次按时间归档"""
+        threading.Thread(target=self.archive_old_records, name="db-archive", daemon=True).start()
+
+    def evict_oldest(self, limit: int, keep: int = 0) -> Tuple[int, int, List[str]]:
+        """删除最旧的 limit 条记录（先删归档库，再删主表，主表至少保留 keep 条）
+
+        用于磁盘配额：返回 (删除条数, 估计释放的字节数, 被删记录引用的图片)，
+        图片由调用方决定何时回收。
+        """
+        def evict(cursor):
+            deleted = freed = 0
+            images: List[str] = []
+            cursor.execute("""
+                SELECT id, image_path, length(content_z) + coalesce(length(corrected), 0)
+                FROM archive.archived_records
+                ORDER BY timestamp ASC, id ASC LIMIT ?
+            """, (limit,))
+            rows = cursor.fetchall()
+            cursor.executemany("DELETE FROM archive.archived_records WHERE id = ?", [(row[0],) for row in rows])
+            deleted += len(rows)
+
+            cursor.execute("SELECT count FROM record_counter WHERE id = 0")
+            main_limit = min(limit - deleted, max(0, cursor.fetchone()[0] - keep))
+            if main_limit > 0:
+                cursor.execute("""
+                    SELECT r.id, r.image_path,
+                           coalesce(length(r.content_z), 0) + length(r.content)
+                           + coalesce(length(r.corrected), 0)
+                           + coalesce((SELECT sum(length(f.data)) FROM clipboard_formats f
+                                       WHERE f.record_id = r.id), 0)
+                    FROM clipboard_records r
+                    ORDER BY r.timestamp ASC, r.id ASC LIMIT ?
+                """, (main_limit,))
+                main_rows = cursor.fetchall()
+                self._fts_remove(cursor, [row[0] for row in main_rows])
+                cursor.executemany("DELETE FROM clipboard_records WHERE id = ?", [(row[0],) for row in main_rows])
+                rows += main_rows
+                deleted += len(main_rows)
+
+            for _, image_path, size in rows:
+                freed += size or 0
+                if image_path:
+                    images.append(image_path)
+            return deleted, freed, images
+
+        return self._write(evict, solo=True)
+
+    def freelist_bytes(self) -> int:
+        """主库和归档库中空闲页占用的字节数（删除记录后未归还给文件系统的空间）"""
+        conn = self._reader()
+        total = 0
+        for schema in SCHEMAS:
+            pages = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+            total += pages * conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+        return total
+
+    def enable_incremental_vacuum(self, max_bytes: int = None) -> List[str]:
+        """把尚未启用增量回收的库转换过来（需要整库 VACUUM），返回转换了的库
+
+        超过 max_bytes 的库跳过：VACUUM 期间写线程被占用，库很大时会长时间阻塞记录写入。
+        """
+        paths = {"main": self.db_path, "archive": self.archive_path}
+
+        def convert(cursor):
+            converted = []
+            for schema in SCHEMAS:
+                if cursor.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] == 2:
+                    continue
+                if max_bytes is not None and paths[schema].stat().st_size > max_bytes:
+                    continue
+                cursor.execute(f"PRAGMA {schema}.auto_vacuum = INCREMENTAL")
+                cursor.execute(f"VACUUM {schema}")
+                converted.append(schema)
+            return converted
+
+        return self._write(convert, transaction=False)
+
+    def vacuum_step(self, max_pages: int = VACUUM_STEP_PAGES) -> int:
+        """释放最多 max_pages 个空闲页（每个库一个短事务），返回释放的页数"""
+        def step(cursor):
+            freed = 0
+            for schema in SCHEMAS:
+                if cursor.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] != 2:
+                    continue
+                before = cursor.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+                pages = min(before, max_pages - freed)
+                if pages <= 0:
+                    continue
+                # incremental_vacuum 每释放一页产生一个没有列的结果行，execute() 遇到没有列的结果
+                # 只执行一步就重置语句（fetchall() 也取不到后面的行），executescript() 会执行到底
+                cursor.executescript(f"PRAGMA {schema}.incremental_vacuum({pages})")
+                freed += before - cursor.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+            return freed
+
+        # executescript() 会先提交进行中的事务，放在事务外执行
+        return self._write(step, transaction=False)
+
+    def fts_merge_step(self, pages: int = FTS_MERGE_PAGES) -> bool:
+        """合并一部分全文索引段，返回是否还有可合并的内容
+
+        删除记录只在索引中留下删除标记，段合并后空间才变为空闲页，再由 vacuum_step 归还。
+        """
+        if not self.fts_enabled:
+            return False
+
+        def merge(cursor):
+            more = False
+            for table in FTS_TABLES:
+                before = cursor.connection.total_changes
+                # 负数：不论段的数量都合并，直到清掉删除标记
+                cursor.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('merge', ?)", (-pages,))
+                more = more or cursor.connection.total_changes - before >= 2
+            return more
+
+        return self._write(merge, solo=True)
+
+    def checkpoint(self):
+        """把 WAL 写回数据库并截断 WAL 文件"""
+        def truncate(cursor):
+            for schema in SCHEMAS:
+                cursor.execute(f"PRAGMA {schema}.wal_checkpoint(TRUNCATE)")
+
+        self._write(truncate, transaction=False)
+
+    def count_archived(self) -> int:
+        """归档记录数（读取触发器维护的计数）"""
+        return self._reader().execute("SELECT count FROM archive.archive_counter WHERE id = 0").fetchone()[0]
+
+    def get_archived_page(self, limit: int = 100, before: Optional[tuple] = None) -> List[Dict]:
+        """按时间倒序分页获取归档记录的列表项（用法同 get_record_page）"""
+        columns = """
+            id, content_type, image_path, timestamp, correction_status, copy_count, preview,
+            corrected IS NOT NULL, content_length
+        """
+        if before is None:
+            cursor = self._reader().execute(f"""
+                SELECT {columns} FROM archive.archived_records
+                ORDER BY timestamp DESC, id DESC LIMIT ?
+            """, (limit,))
+        else:
+            cursor = self._reader().execute(f"""
+                SELECT {columns} FROM archive.archived_records
+                WHERE (timestamp, id) < (?, ?)
+                ORDER BY timestamp DESC, id DESC LIMIT ?
+            """, (before[0], before[1], limit))
+        return [_row_to_summary(row) for row in cursor.fetchall()]
+
+    def get_archived_record(self, record_id: int) -> Optional[Dict]:
+        """获取一条完整的归档记录"""
+        row = self._reader().execute("""
+            SELECT id, content_type, inflate(content_z), image_path, timestamp, corrected,
+                   correction_status, copy_count
+            FROM archive.archived_records WHERE id = ?
+        """, (record_id,)).fetchone()
+        return _row_to_record(row) if row else None
+
+    def iter_all_records(self, include_archive: bool = True) -> Iterator[Dict]:
+        """逐条产出全部完整记录（导出用）：先归档库，再主表，各自按时间从旧到新
+
+        使用单独的连接和一个读事务，得到一致的快照；两张表分别沿时间索引读取，
+        不做整体排序，内存占用与记录数无关。
+        """
+        queries = []
+        if include_archive:
+            queries.append("""
+                SELECT id, content_type, inflate(content_z), image_path, timestamp, corrected,
+                       correction_status, copy_count
+                FROM archive.archived_records ORDER BY timestamp, id
+            """)
+        queries.append(f"SELECT {RECORD_COLUMNS} FROM clipboard_records ORDER BY timestamp, id")
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            for sql in queries:
+                for row in conn.execute(sql):
+                    yield _row_to_record(row)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def iter_texts(self, after_id: int = 0, up_to: int = None) -> Iterator[tuple]:
+        """按 id 顺序逐条产出主表中 id 在 (after_id, up_to] 内的文本记录 (id, 正文)（相似度索引用）"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            yield from conn.execute(f"""
+                SELECT id, {CONTENT_SQL} FROM clipboard_records
+                WHERE id > ? AND id <= ? AND content_type = 'text'
+                ORDER BY id
+            """, (after_id, up_to if up_to is not None else MAX_ROWID))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
 
     def get_recent_records(self, limit: int = 50) -> List[Dict]:
         """获取最近的记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT id, content_type, content, image_path, timestamp, corrected, correction_status
+        cursor = self._reader().execute(f"""
+            SELECT {RECORD_COLUMNS}
             FROM clipboard_records
-            ORDER BY timestamp DESC
+            ORDER BY timestamp DESC, id DESC
             LIMIT ?
         """, (limit,))
+        return [_row_to_record(row) for row in cursor.fetchall()]
 
-        records = []
-        for row in cursor.fetchall():
-            records.append({
-                "id": row[0],
-                "content_type": row[1],
-                "content": row[2],
-                "image_path": row[3],
-                "timestamp": row[4],
-                "corrected": row[5],
-                "correction_status": row[6]
-            })
+    def get_record_page(self, limit: int = 100, before: Optional[tuple] = None) -> List[Dict]:
+        """按时间倒序分页获取列表项（不含正文）
 
-        conn.close()
-        return records
+        before 传上一页最后一条的 (timestamp, id)，沿 (timestamp, id) 索引取下一页，
+        翻到第几页耗时都一样。
+        """
+        if before is None:
+            cursor = self._reader().execute(f"""
+                SELECT {SUMMARY_COLUMNS}
+                FROM clipboard_records
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, (limit,))
+        else:
+            cursor = self._reader().execute(f"""
+                SELECT {SUMMARY_COLUMNS}
+                FROM clipboard_records
+                WHERE (timestamp, id) < (?, ?)
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, (before[0], before[1], limit))
+        return [_row_to_summary(row) for row in cursor.fetchall()]
+
+    def get_record_summaries(self, record_ids: List[int]) -> List[Dict]:
+        """按 id 批量获取列表项，按时间倒序返回（已删除的 id 不在结果中）"""
+        if not record_ids:
+            return []
+        placeholders = ", ".join("?" * len(record_ids))
+        cursor = self._reader().execute(f"""
+            SELECT {SUMMARY_COLUMNS}
+            FROM clipboard_records
+            WHERE id IN ({placeholders})
+            ORDER BY timestamp DESC, id DESC
+        """, list(record_ids))
+        return [_row_to_summary(row) for row in cursor.fetchall()]
+
+    def get_record(self, record_id: int) -> Optional[Dict]:
+        """获取一条完整记录（含正文），不存在时返回 None"""
+        row = self._reader().execute(
+            f"SELECT {RECORD_COLUMNS} FROM clipboard_records WHERE id = ?", (record_id,)
+        ).fetchone()
+        return _row_to_record(row) if row else None
+
+    def get_latest_image_path(self) -> Optional[str]:
+        """最近一条图片记录的图片路径"""
+        row = self._reader().execute("""
+            SELECT image_path FROM clipboard_records
+            WHERE content_type = 'image' AND image_path IS NOT NULL
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """).fetchone()
+        return row[0] if row else None
+
+    def search(self, query: str, limit: int = 50, after: Optional[tuple] = None) -> List[Dict]:
+        """全文搜索（空格分隔的多个词须全部命中）
+
+        命中记录从新到旧每 config.search_candidates 条为一批，批内按 BM25 相关度排序
+        （分数相同时新的在前），一批取完再取更早的一批，翻页能一直翻到最早的命中。
+        BM25 只在这一批内计算：批内每条都包含全部的词，各词的 IDF 相同，
+        排序取决于词频（按 casefold 后的文字计数）和文档长度。
+        结果与 get_record_page 一样不含正文，额外带有 "snippet"（命中处摘要）和 "cursor"；
+        把上一页最后一条的 cursor 作为 after 传入即可取下一页。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        folded = [t.casefold() for t in terms]
+
+        conn = self._reader()
+        window_size = max(1, config.search_candidates)
+        # cursor = (所在批次最新一条的 id, 分数, id)，同一批次重新查询得到的范围不变
+        top = after[0] if after is not None else MAX_ROWID
+        after_key = (-after[1], -after[2]) if after is not None else None
+        page: List[tuple] = []
+        texts: Dict[int, tuple] = {}
+        while len(page) < limit:
+            window = self._search_window(conn, terms, top, window_size)
+            if not window:
+                break
+            window_top = window[0][0]
+            ranked = sorted((-score, -record_id) for score, record_id in _rank_window(window, folded))
+            if after_key is not None:
+                ranked = [key for key in ranked if key > after_key]
+                after_key = None
+            for negative_score, negative_id in ranked[:limit - len(page)]:
+                page.append((window_top, -negative_score, -negative_id))
+            texts.update((row[0], row[1:]) for row in window)
+            if len(window) < window_size:
+                break
+            top = window[-1][0] - 1
+        if not page:
+            return []
+
+        placeholders = ", ".join("?" * len(page))
+        rows = conn.execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM clipboard_records WHERE id IN ({placeholders})",
+            [record_id for _, _, record_id in page]
+        ).fetchall()
+        by_id = {row[0]: row for row in rows}
+
+        results = []
+        for window_top, score, record_id in page:
+            row = by_id.get(record_id)
+            if row is None:
+                continue
+            record = _row_to_summary(row)
+            content, corrected = texts[record_id]
+            record["snippet"] = (
+                make_snippet(content, terms)
+                or make_snippet(corrected or "", terms)
+                or record["preview"]
+            )
+            record["cursor"] = (window_top, score, record_id)
+            results.append(record)
+        return results
+
+    def _search_window(self, conn, terms: List[str], top: int, size: int) -> List[tuple]:
+        """search 的一批：id 不超过 top 的最新 size 条候选，返回 [(id, 正文, 纠错结果)]，按 id 倒序
+
+        词都在 3 个字以上时查 trigram 索引，否则全部的词都查二元索引（由 FTS5 在一个索引内求交集）。
+        二元索引会多给出大小写折叠规则不同或中间隔着标点的候选，由 _rank_window 按原文核对后剔除。
+        没有字母数字的短词（如 "#"）或不支持 FTS5 时用 LIKE 过滤，都用不上索引时从新到旧扫描。
+        """
+        match_terms: List[str] = []
+        like_terms: List[str] = []
+        if not self.fts_enabled:
+            like_terms = terms
+            table = None
+        elif all(len(t) >= TRIGRAM_MIN_LENGTH for t in terms):
+            table = "records_fts"
+            match_terms = ['"' + t.replace('"', '""') + '"' for t in terms]
+        else:
+            table = "records_bigram"
+            for term in terms:
+                query = bigram_query(term)
+                if query is None:
+                    like_terms.append(term)
+                else:
+                    match_terms.append(query)
+
+        body = "coalesce(inflate(r.content_z), r.content)"
+        filters = [f"({body} LIKE ? ESCAPE '\\' OR r.corrected LIKE ? ESCAPE '\\')"] * len(like_terms)
+        params: list = [f"%{_escape_like(t)}%" for t in like_terms for _ in range(2)]
+        if match_terms:
+            # 命中集合由索引给出，沿 rowid 倒序取到够数即停
+            sql = f"""
+                SELECT r.id, {body}, r.corrected
+                FROM {table} JOIN clipboard_records r ON r.id = {table}.rowid
+                WHERE {table} MATCH ? AND {table}.rowid <= ? {"".join(" AND " + f for f in filters)}
+                ORDER BY {table}.rowid DESC
+                LIMIT ?
+            """
+            params = [" ".join(match_terms), top] + params
+        else:
+            # 用不上索引：从新到旧扫描，取够一批即停
+            sql = f"""
+                SELECT r.id, {body}, r.corrected
+                FROM clipboard_records r
+                WHERE r.id <= ? AND {" AND ".join(filters)}
+                ORDER BY r.id DESC
+                LIMIT ?
+            """
+            params = [top] + params
+        return conn.execute(sql, params + [size]).fetchall()
 
     def update_correction(self, record_id: int, corrected_text: str, status: str = "completed"):
         """更新纠错结果"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE clipboard_records
-            SET corrected = ?, correction_status = ?
-            WHERE id = ?
-        """, (corrected_text, status, record_id))
+        def update(cursor):
+            self._fts_remove(cursor, [record_id])
+            cursor.execute("""
+                UPDATE clipboard_records
+                SET corrected = ?, correction_status = ?
+                WHERE id = ?
+            """, (corrected_text, status, record_id))
+            self._fts_add(cursor, [record_id])
 
-        conn.commit()
-        conn.close()
+        self._write(update)
 
     def delete_record(self, record_id: int):
         """删除记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        def delete(cursor):
+            cursor.execute("SELECT image_path FROM clipboard_records WHERE id = ?", (record_id,))
+            row = cursor.fetchone()
+            self._fts_remove(cursor, [record_id])
+            cursor.execute("DELETE FROM clipboard_records WHERE id = ?", (record_id,))
+            return row
 
-        cursor.execute("DELETE FROM clipboard_records WHERE id = ?", (record_id,))
-
-        conn.commit()
-        conn.close()
+        row = self._write(delete)
+        if row:
+            self._release_images([row[0]])
 
     def clear_all(self):
-        """清空所有记录"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """清空所有记录（包括归档）"""
+        def clear(cursor):
+            if self.fts_enabled:
+                for table in FTS_TABLES:
+                    cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('delete-all')")
+            cursor.execute("DELETE FROM clipboard_records")
+            cursor.execute("DELETE FROM archive.archived_records")
 
-        cursor.execute("DELETE FROM clipboard_records")
+        self._write(clear)
 
-        conn.commit()
-        conn.close()
+        # 所有记录都没了，直接全量回收图片目录
+        self._release_images([], sweep=True)
+
+    def save_formats(self, record_id: int, formats: List[Dict]):
+        """保存一条记录的格式列表（再次复制时整体替换）"""
+        rows = [(record_id, f["name"], f["size"], f["digest"], f["data"], f["status"]) for f in formats]
+
+        def save(cursor):
+            cursor.execute("DELETE FROM clipboard_formats WHERE record_id = ?", (record_id,))
+            cursor.executemany("""
+                INSERT INTO clipboard_formats (record_id, format_name, size, digest, data, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+        self._write(save)
+
+    def store_format_data(self, record_id: int, fmt: Dict):
+        """写入延后读取到的格式数据"""
+        self._write(lambda cursor: cursor.execute("""
+            UPDATE clipboard_formats
+            SET size = ?, digest = ?, data = ?, status = 'fetched'
+            WHERE record_id = ? AND format_name = ?
+        """, (fmt["size"], fmt["digest"], fmt["data"], record_id, fmt["name"])))
+
+    def expire_formats(self, record_id: int):
+        """剪贴板内容已变化，未读取的格式再也取不到了"""
+        self._write(lambda cursor: cursor.execute("""
+            UPDATE clipboard_formats SET status = 'expired'
+            WHERE record_id = ? AND status = 'deferred'
+        """, (record_id,)))
+
+    def get_formats(self, record_id: int) -> List[Dict]:
+        """获取记录的格式元数据（不含数据）"""
+        cursor = self._reader().execute("""
+            SELECT format_name, size, digest, status FROM clipboard_formats
+            WHERE record_id = ?
+            ORDER BY format_name
+        """, (record_id,))
+        return [
+            {"name": row[0], "size": row[1], "digest": row[2], "status": row[3]}
+            for row in cursor.fetchall()
+        ]
+
+    def get_format_data(self, record_id: int, format_name: str) -> Optional[bytes]:
+        """读取某种格式的数据，未读取或已过期时返回 None"""
+        row = self._reader().execute(
+            "SELECT data FROM clipboard_formats WHERE record_id = ? AND format_name = ?",
+            (record_id, format_name)
+        ).fetchone()
+        return row[0] if row else None
+
+    def count_image_refs(self, image_path: str) -> int:
+        """统计引用某张图片的记录数（包括归档记录）"""
+        return self._reader().execute("""
+            SELECT (SELECT COUNT(*) FROM clipboard_records WHERE image_path = ?)
+                 + (SELECT COUNT(*) FROM archive.archived_records WHERE image_path = ?)
+        """, (image_path, image_path)).fetchone()[0]
+
+    def count_records(self) -> int:
+        """记录总数（读取触发器维护的计数）"""
+        return self._reader().execute("SELECT count FROM record_counter WHERE id = 0").fetchone()[0]
+
+    def get_image_paths(self) -> set:
+        """获取所有被引用的图片路径（包括归档记录）"""
+        cursor = self._reader().execute("""
+            SELECT image_path FROM clipboard_records WHERE image_path IS NOT NULL
+            UNION
+            SELECT image_path FROM archive.archived_records WHERE image_path IS NOT NULL
+        """)
+        return {row[0] for row in cursor.fetchall()}
+
+    def _release_images(self, image_paths: List[Optional[str]], sweep: bool = False):
+        """通知图片仓库回收不再被引用的图片"""
+        image_paths = [p for p in image_paths if p]
+        if not image_paths and not sweep:
+            return
+        try:
+            from image_store import image_store
+            if sweep:
+                image_store.schedule_sweep()
+            else:
+                image_store.release(image_paths)
+        except Exception as e:
+            print(f"[数据库] 图片回收失败: {e}")
 
 
 # 全局数据库实例
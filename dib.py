@@ -0,0 +1,191 @@
+"""
+DIB 解码模块 - 直接从剪贴板 CF_DIB 数据构建图片
+
+解析 BITMAPINFOHEADER / V4 / V5 / CORE 头部，算出真正的像素偏移（位掩码、调色板），
+再用 Image.frombuffer 直接读取 memoryview 中的像素，不拼接 BMP 文件、不经过 BytesIO。
+"""
+import io
+import struct
+from PIL import Image
+
+# 压缩方式
+BI_RGB = 0
+BI_RLE8 = 1
+BI_RLE4 = 2
+BI_BITFIELDS = 3
+BI_JPEG = 4
+BI_PNG = 5
+BI_ALPHABITFIELDS = 6
+
+# 头部大小
+CORE_HEADER_SIZE = 12
+INFO_HEADER_SIZE = 40
+
+_INFO_HEADER = struct.Struct("<IiiHHIIiiII")
+_CORE_HEADER = struct.Struct("<IHHHH")
+_MASKS = struct.Struct("<IIII")
+
+# (R, G, B) 位掩码 -> PIL rawmode
+_RAWMODES_32 = {
+    (0x00FF0000, 0x0000FF00, 0x000000FF): "BGR",
+    (0x000000FF, 0x0000FF00, 0x00FF0000): "RGB",
+}
+_RAWMODES_16 = {
+    (0x7C00, 0x03E0, 0x001F): "BGR;15",
+    (0xF800, 0x07E0, 0x001F): "BGR;16",
+}
+_PALETTE_RAWMODES = {1: "P;1", 4: "P;4", 8: "P"}
+
+
+class DibInfo:
+    """DIB 头部信息"""
+
+    def __init__(self, header_size, width, height, bit_count, compression,
+                 colors_used, masks, palette_offset, palette_entry_size, pixel_offset):
+        self.header_size = header_size
+        self.width = width
+        self.height = abs(height)
+        self.top_down = height < 0  # 高度为负表示自上而下存储
+        self.bit_count = bit_count
+        self.compression = compression
+        self.colors_used = colors_used
+        self.masks = masks  # (R, G, B, A)
+        self.palette_offset = palette_offset
+        self.palette_entry_size = palette_entry_size
+        self.pixel_offset = pixel_offset
+
+    @property
+    def stride(self) -> int:
+        """每行字节数（4 字节对齐）"""
+        return ((self.width * self.bit_count + 31) // 32) * 4
+
+    @property
+    def has_alpha(self) -> bool:
+        """头部是否声明了 alpha 通道"""
+        return self.bit_count == 32 and bool(self.masks[3])
+
+
+def parse_dib_header(data) -> DibInfo:
+    """解析 DIB 头部，计算像素数据偏移"""
+    view = memoryview(data).cast("B")
+    if len(view) < 4:
+        raise ValueError("DIB 数据过短")
+
+    header_size = struct.unpack_from("<I", view, 0)[0]
+    if header_size == CORE_HEADER_SIZE:
+        _, width, height, _, bit_count = _CORE_HEADER.unpack_from(view, 0)
+        compression, colors_used = BI_RGB, 0
+        entry_size = 3  # RGBTRIPLE
+    elif header_size >= INFO_HEADER_SIZE:
+        (_, width, height, _, bit_count, compression,
+         _, _, _, colors_used, _) = _INFO_HEADER.unpack_from(view, 0)
+        entry_size = 4  # RGBQUAD
+    else:
+        raise ValueError(f"不支持的 DIB 头部大小: {header_size}")
+
+    if len(view) < header_size:
+        raise ValueError("DIB 头部不完整")
+
+    # 位掩码：V2 以上在头部内部，40 字节头部则紧跟在头部之后
+    masks = (0, 0, 0, 0)
+    offset = header_size
+    if compression in (BI_BITFIELDS, BI_ALPHABITFIELDS):
+        if header_size == INFO_HEADER_SIZE:
+            count = 4 if compression == BI_ALPHABITFIELDS else 3
+            raw = bytes(view[offset:offset + 4 * count]).ljust(16, b"\0")
+            masks = _MASKS.unpack(raw)
+            offset += 4 * count
+        else:
+            raw = bytes(view[INFO_HEADER_SIZE:min(header_size, INFO_HEADER_SIZE + 16)]).ljust(16, b"\0")
+            masks = _MASKS.unpack(raw)
+    elif header_size >= INFO_HEADER_SIZE + 16:
+        # V3 以上的头部即使是 BI_RGB 也带有 alpha 掩码
+        masks = (0, 0, 0, _MASKS.unpack_from(view, INFO_HEADER_SIZE)[3])
+
+    # 调色板：<=8 位必有；更高位深时 biClrUsed 个可选条目也占位
+    if bit_count <= 8:
+        palette_size = colors_used or (1 << bit_count)
+    else:
+        palette_size = colors_used
+    palette_offset = offset
+    offset += palette_size * entry_size
+
+    return DibInfo(header_size, width, height, bit_count, compression,
+                   palette_size, masks, palette_offset, entry_size, offset)
+
+
+def _read_palette(view, info: DibInfo) -> bytes:
+    """读取调色板为 PIL 需要的 RGB 序列"""
+    palette = bytearray()
+    for i in range(info.colors_used):
+        start = info.palette_offset + i * info.palette_entry_size
+        b, g, r = view[start], view[start + 1], view[start + 2]
+        palette += bytes((r, g, b))
+    return bytes(palette)
+
+
+def _decode_via_bmp(view, info: DibInfo) -> Image.Image:
+    """少见的格式（RLE、非标准掩码）交给 PIL 的 BMP 解码器，补上正确的偏移"""
+    file_header = struct.pack("<2sIHHI", b"BM", 14 + len(view), 0, 0, 14 + info.pixel_offset)
+    image = Image.open(io.BytesIO(file_header + bytes(view)))
+    image.load()
+    return image
+
+
+def decode_dib(data) -> Image.Image:
+    """把 CF_DIB 数据解码为 PIL 图片"""
+    view = memoryview(data).cast("B")
+    info = parse_dib_header(view)
+
+    if info.compression in (BI_JPEG, BI_PNG):
+        # 像素区是完整的 JPEG / PNG 文件
+        image = Image.open(io.BytesIO(view[info.pixel_offset:]))
+        image.load()
+        return image
+
+    if info.compression not in (BI_RGB, BI_BITFIELDS, BI_ALPHABITFIELDS):
+        return _decode_via_bmp(view, info)
+
+    size = info.stride * info.height
+    if len(view) < info.pixel_offset + size:
+        raise ValueError(
+            f"DIB 像素数据不完整: 需要 {info.pixel_offset + size} 字节，实际 {len(view)}"
+        )
+    pixels = view[info.pixel_offset:info.pixel_offset + size]
+    orientation = 1 if info.top_down else -1
+    dimensions = (info.width, info.height)
+    rgb_masks = info.masks[:3]
+
+    if info.bit_count == 32:
+        if info.compression == BI_RGB:
+            order = "BGR"
+        else:
+            order = _RAWMODES_32.get(rgb_masks)
+        if order is None or info.masks[3] not in (0, 0xFF000000):
+            return _decode_via_bmp(view, info)
+        if info.has_alpha:
+            image = Image.frombuffer("RGBA", dimensions, pixels, "raw", order + "A", info.stride, orientation)
+            # 有些程序声明了 alpha 掩码却没有填写，全 0 时按不透明处理
+            if image.getchannel("A").getextrema() != (0, 0):
+                return image
+        return Image.frombuffer("RGB", dimensions, pixels, "raw", order + "X", info.stride, orientation)
+
+    if info.bit_count == 24:
+        return Image.frombuffer("RGB", dimensions, pixels, "raw", "BGR", info.stride, orientation)
+
+    if info.bit_count == 16:
+        if info.compression == BI_RGB:
+            rawmode = "BGR;15"
+        else:
+            rawmode = _RAWMODES_16.get(rgb_masks)
+        if rawmode is None:
+            return _decode_via_bmp(view, info)
+        return Image.frombuffer("RGB", dimensions, pixels, "raw", rawmode, info.stride, orientation)
+
+    if info.bit_count in _PALETTE_RAWMODES:
+        image = Image.frombuffer("P", dimensions, pixels, "raw",
+                                 _PALETTE_RAWMODES[info.bit_count], info.stride, orientation)
+        image.putpalette(_read_palette(view, info))
+        return image
+
+    return _decode_via_bmp(view, info)
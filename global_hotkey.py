@@ -1,6 +1,7 @@
 """
 全局热键管理 - 使用 keyboard 库
 """
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -36,13 +37,15 @@ class GlobalHotkeyManager:
             self._log("没有可显示的图片")
             return
 
-        if not Path(self.last_image_path).exists():
+        # 刚截的图可能还在后台编码，内存缓存中有就够了
+        from image_cache import image_cache
+        if self.last_image_path not in image_cache and not Path(self.last_image_path).exists():
             self._log(f"图片文件不存在: {self.last_image_path}")
             return
 
         if self.main_window:
-            # 通过信号在主线程中创建窗口
-            self.main_window.show_float_window_requested.emit(self.last_image_path)
+            # 通过信号在主线程中创建窗口，附带触发时间用于统计延迟
+            self.main_window.show_float_window_requested.emit(self.last_image_path, time.perf_counter())
             self._log(f"触发显示浮窗信号: {Path(self.last_image_path).name}")
         else:
             self._log("主窗口引用未设置，无法显示浮窗")
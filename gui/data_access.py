@@ -0,0 +1,105 @@
+"""
+界面数据访问 - 数据库查询在后台线程执行，结果通过信号回到主线程
+"""
+import itertools
+import queue
+import threading
+import traceback
+from typing import Callable, Dict, Optional, Tuple
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class DataAccess(QObject):
+    """界面用的异步数据访问
+
+    submit() 把查询交给后台线程，立即返回请求 ID；查询完成后在主线程调用 callback。
+    同一个 key 只保留最新的请求：新请求提交后，旧请求若还在排队就不再执行，
+    已经在执行的结果到达时直接丢弃（例如连续输入搜索词时只显示最后一次的结果）。
+    请求按提交顺序执行，删除后重新加载之类的先后关系不会乱。
+    """
+
+    finished = pyqtSignal(int, object)  # 请求 ID, 结果
+    failed = pyqtSignal(int, str)  # 请求 ID, 错误信息
+
+    def __init__(self):
+        super().__init__()
+        self.request_ids = itertools.count(1)
+        self.requests: "queue.Queue" = queue.Queue()
+        # 请求 ID -> (key, callback, on_error)
+        self.callbacks: Dict[int, Tuple[Optional[str], Optional[Callable], Optional[Callable]]] = {}
+        self.latest: Dict[str, int] = {}  # key -> 最新请求 ID
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.finished.connect(self._on_finished)
+        self.failed.connect(self._on_failed)
+
+    def submit(self, func: Callable, *args, callback: Callable = None, key: str = None,
+               on_error: Callable = None) -> int:
+        """提交一个查询（在后台线程执行 func(*args)），返回请求 ID"""
+        request_id = next(self.request_ids)
+        with self.lock:
+            self.callbacks[request_id] = (key, callback, on_error)
+            if key is not None:
+                self.latest[key] = request_id
+        self.requests.put((request_id, key, func, args))
+        self._ensure_thread()
+        return request_id
+
+    def cancel(self, key: str):
+        """丢弃某个 key 上尚未返回的请求"""
+        with self.lock:
+            self.latest[key] = 0
+
+    def is_current(self, request_id: int, key: Optional[str]) -> bool:
+        """请求是否仍是该 key 上最新的"""
+        with self.lock:
+            return key is None or self.latest.get(key) == request_id
+
+    def _ensure_thread(self):
+        """按需启动后台线程"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="gui-data", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        """后台线程：依次执行查询"""
+        while True:
+            request_id, key, func, args = self.requests.get()
+            if not self.is_current(request_id, key):
+                # 已被更新的请求取代，不必查询
+                with self.lock:
+                    self.callbacks.pop(request_id, None)
+                continue
+            try:
+                result = func(*args)
+            except Exception as e:
+                print(f"[数据访问] 请求 {request_id} 失败: {e}")
+                traceback.print_exc()
+                self.failed.emit(request_id, str(e))
+                continue
+            self.finished.emit(request_id, result)
+
+    def _take_callbacks(self, request_id: int) -> Tuple[Optional[Callable], Optional[Callable]]:
+        """取出请求的回调；请求已过期时返回 (None, None)"""
+        with self.lock:
+            key, callback, on_error = self.callbacks.pop(request_id, (None, None, None))
+            if key is not None and self.latest.get(key) != request_id:
+                return None, None
+        return callback, on_error
+
+    def _on_finished(self, request_id: int, result):
+        """主线程：把结果交给回调（过期的结果丢弃）"""
+        callback, _ = self._take_callbacks(request_id)
+        if callback is not None:
+            callback(result)
+
+    def _on_failed(self, request_id: int, message: str):
+        """主线程：请求出错"""
+        _, on_error = self._take_callbacks(request_id)
+        if on_error is not None:
+            on_error(message)
+
+
+# 全局实例（在主线程创建，回调都在主线程执行）
+data_access = DataAccess()
@@ -1,15 +1,115 @@
 """
 图片浮窗 - Snippaste 风格
+
+所有浮窗由 FloatWindowManager 创建：同一张图片（按内容摘要）只解码一份，
+各浮窗共享；总占用超过 float_window_memory_mb 时，后台浮窗只保留显示尺寸的图片。
 """
 from PyQt5.QtWidgets import QWidget, QLabel, QApplication, QGraphicsDropShadowEffect, QVBoxLayout
-from PyQt5.QtCore import Qt, QPoint, QRect, QSize
+from PyQt5.QtCore import Qt, QEvent, QPoint, QRect, QSize, QTimer
 from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QCursor
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from config.settings import config
+from gui.image_loader import image_loader, image_size
+
+
+def pixmap_bytes(pixmap: Optional[QPixmap]) -> int:
+    """图片占用的内存（字节）"""
+    if pixmap is None or pixmap.isNull():
+        return 0
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class SharedImage:
+    """一张图片的解码结果，被显示它的所有浮窗共享
 
+    pixmap 从文件读取时只按需要的尺寸解码（窗口尺寸 -> 屏幕尺寸 -> 原尺寸），
+    金字塔和各窗口平滑缩放好的图片也放在这里，尺寸相同的窗口共用同一份。
+    """
 
-# 全局窗口列表，防止被垃圾回收
-_active_windows = []
+    MIP_MIN_SIZE = 64  # 缩小金字塔最小一级的边长
+
+    def __init__(self, digest: str, image_path: str):
+        self.digest = digest
+        self.image_path = image_path
+        self.image_size = QSize()  # 图片原尺寸（只读文件头得到）
+        self.pixmap: Optional[QPixmap] = None  # 已解码的图片
+        self.mip_levels: List[QPixmap] = []
+        self.scaled: Dict[Tuple[int, int], QPixmap] = {}  # 窗口尺寸 -> 平滑缩放好的图片
+        self.windows: List["ImageFloatWindow"] = []
+        self.load_request: Optional[int] = None  # 正在后台解码的请求
+        self.failed = False  # 解码失败
+        self.last_used = time.monotonic()  # 最近一次有窗口在前台使用
+
+    def set_pixmap(self, pixmap: QPixmap):
+        """换上新解码的图片（金字塔和缩放结果随之重建）"""
+        self.pixmap = pixmap
+        self.mip_levels = []
+        self.scaled.clear()
+
+    def scaled_to(self, size: QSize) -> QPixmap:
+        """平滑缩放到 size 的图片，同尺寸的窗口共用"""
+        key = (size.width(), size.height())
+        pixmap = self.scaled.get(key)
+        if pixmap is None:
+            pixmap = self.pixmap
+            if pixmap.size() != size:
+                pixmap = pixmap.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self.scaled[key] = pixmap
+        return pixmap
+
+    def prune(self):
+        """丢掉已经没有窗口在用的缩放结果"""
+        used = {
+            (window.display_pixmap.width(), window.display_pixmap.height())
+            for window in self.windows if window.display_pixmap is not None
+        }
+        self.scaled = {key: pixmap for key, pixmap in self.scaled.items() if key in used}
+
+    def build_mip_levels(self):
+        """生成缩小金字塔：原图、1/2、1/4 ... 每级由上一级平滑缩小一半"""
+        if self.mip_levels or self.pixmap is None:
+            return
+        level = self.pixmap
+        self.mip_levels.append(level)
+        while min(level.width(), level.height()) // 2 >= self.MIP_MIN_SIZE:
+            level = level.scaled(
+                level.width() // 2, level.height() // 2,
+                Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+            )
+            self.mip_levels.append(level)
+
+    def mip_level_for(self, size: QSize) -> QPixmap:
+        """不小于目标尺寸的最小一级（快速缩放时缩小比例不超过一半，不会明显锯齿）"""
+        for level in reversed(self.mip_levels):
+            if level.width() >= size.width() and level.height() >= size.height():
+                return level
+        # 金字塔还没生成（如拖动中刚换上原尺寸图片）时直接用已解码的图片
+        return self.mip_levels[0] if self.mip_levels else self.pixmap
+
+    def pixmaps(self) -> List[QPixmap]:
+        """占用内存的所有图片（含各窗口正在显示的）"""
+        result = [self.pixmap] + self.mip_levels + list(self.scaled.values())
+        result += [window.display_pixmap for window in self.windows]
+        return [pixmap for pixmap in result if pixmap is not None and not pixmap.isNull()]
+
+    def in_foreground(self) -> bool:
+        """是否有窗口在前台（激活或正在调整大小）"""
+        return any(window.isActiveWindow() or window.resizing for window in self.windows)
+
+    def drop_resolution(self):
+        """只保留各窗口显示尺寸的图片，丢掉更高分辨率的解码结果和金字塔"""
+        displays = [window.display_pixmap for window in self.windows if window.display_pixmap is not None]
+        if not displays or self.pixmap is None:
+            return
+        largest = max(displays, key=lambda pixmap: pixmap.width())
+        if largest.width() >= self.pixmap.width():
+            return
+        # 以后窗口放大时再按需重新解码
+        self.pixmap = largest
+        self.mip_levels = []
+        self.prune()
 
 
 class ImageFloatWindow(QWidget):
@@ -17,21 +117,25 @@ class ImageFloatWindow(QWidget):
 
     # 边缘检测范围
     EDGE_THRESHOLD = 10
+    BORDER_COLOR = QColor("#ccc")
+    BORDER_WIDTH = 2
 
-    def __init__(self, image_path: str, parent=None):
+    def __init__(self, image_path: str, manager: "FloatWindowManager", parent=None, requested_at: float = None):
         super().__init__(parent)
 
         self.image_path = image_path
+        self.manager = manager
+        self.requested_at = requested_at  # 热键触发时间（perf_counter），用于统计显示延迟
         self.drag_start_pos: Optional[QPoint] = None
         self.resize_edge = None
-        self.original_pixmap: Optional[QPixmap] = None
+        # 调整大小时按窗口尺寸从金字塔中取一级快速缩放绘制，松开鼠标后再平滑缩放一次
+        self.display_pixmap: Optional[QPixmap] = None  # 按当前窗口尺寸平滑缩放好的图片
+        self.resizing = False
+        self.shared: SharedImage = manager.acquire(image_path, self)
 
         self._init_ui()
         self._load_image()
 
-        # 将窗口添加到全局列表
-        _active_windows.append(self)
-
         print(f"[浮窗] 创建浮窗: {image_path}")
 
     def _init_ui(self):
@@ -50,7 +154,7 @@ class ImageFloatWindow(QWidget):
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # 图片标签
+        # 提示文字标签（图片本身在 paintEvent 中绘制）
         self.image_label = QLabel(self)
         self.image_label.setAlignment(Qt.AlignCenter)
         self.image_label.setStyleSheet("border: 2px solid #ccc; background-color: white;")
@@ -59,32 +163,74 @@ class ImageFloatWindow(QWidget):
         self.setLayout(layout)
 
     def _load_image(self):
-        """加载图片"""
+        """加载图片 - 其他浮窗或最近截图已解码的直接共用，没有再按窗口尺寸在后台解码文件"""
+        if not self.shared.image_size.isValid():
+            self._show_failure()
+            return
+
+        # 窗口尺寸由文件头决定
+        size = self._initial_size()
+        self.resize(size)
+        self.moveToCenter()
+        if self.shared.pixmap is not None:
+            self._on_image_changed()
+            print(f"[浮窗] 图片加载成功，大小: {self.width()}x{self.height()}")
+            return
+
+        # 解码完成前先显示缩略图
+        from gui.thumbnail_cache import thumbnail_cache
+        placeholder = thumbnail_cache.cached(self.image_path)
+        if placeholder is not None:
+            self.image_label.hide()
+            self.setPixmap(placeholder)
+        else:
+            self.image_label.setText("加载中...")
+        self.manager.request_resolution(self.shared, size)
+
+    def _show_failure(self):
+        """显示加载失败的提示"""
         if Path(self.image_path).exists():
-            self.original_pixmap = QPixmap(self.image_path)
-            if not self.original_pixmap.isNull():
-                # 初始大小
-                screen = QApplication.primaryScreen()
-                screen_size = screen.availableSize()
-                max_size = QSize(int(screen_size.width() * 0.5), int(screen_size.height() * 0.7))
-
-                scaled = self.original_pixmap.scaled(
-                    max_size,
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-                self.setPixmap(scaled)
-                self.resize(scaled.size())
-
-                # 移动到屏幕中心
-                self.moveToCenter()
-                print(f"[浮窗] 图片加载成功，大小: {scaled.size().width()}x{scaled.size().height()}")
-            else:
-                self.image_label.setText("图片加载失败")
-                print(f"[浮窗] 图片加载失败")
+            self.image_label.setText("图片加载失败")
+            print(f"[浮窗] 图片加载失败")
         else:
             self.image_label.setText("图片文件不存在")
             print(f"[浮窗] 图片文件不存在: {self.image_path}")
+        self.image_label.show()
+
+    def _initial_size(self) -> QSize:
+        """初始窗口尺寸：按比例缩放到屏幕可用区域的一半宽、七成高"""
+        screen_size = QApplication.primaryScreen().availableSize()
+        max_size = QSize(int(screen_size.width() * 0.5), int(screen_size.height() * 0.7))
+        return self.shared.image_size.scaled(max_size, Qt.KeepAspectRatio)
+
+    def _on_image_changed(self):
+        """共享的图片换了分辨率（解码完成）"""
+        if self.shared.pixmap is None:
+            if self.shared.failed and self.display_pixmap is None:
+                self._show_failure()
+            return
+        self.image_label.hide()
+        if self.resizing:
+            # 正在拖动，松开鼠标时再平滑缩放
+            self.display_pixmap = None
+            self.update()
+        else:
+            self.setPixmap(self.shared.scaled_to(self._image_rect().size()))
+        self._ensure_resolution()
+
+    def _ensure_resolution(self):
+        """窗口放大到超过已解码的分辨率时在后台重新解码：先按屏幕尺寸，放大到超过屏幕才解码原尺寸"""
+        loaded = self.shared.pixmap
+        target = self._image_rect().size()
+        if loaded is None or target.width() <= loaded.width():
+            return
+        screen_fit = self.shared.image_size.scaled(
+            QApplication.primaryScreen().availableSize(), Qt.KeepAspectRatio
+        )
+        if target.width() <= screen_fit.width() and loaded.width() < screen_fit.width():
+            self.manager.request_resolution(self.shared, screen_fit)
+        else:
+            self.manager.request_resolution(self.shared, None)
 
     def moveToCenter(self):
         """移动窗口到屏幕中心"""
@@ -95,15 +241,44 @@ class ImageFloatWindow(QWidget):
         print(f"[浮窗] 窗口位置: ({x}, {y})")
 
     def setPixmap(self, pixmap: QPixmap):
-        """设置图片"""
-        self.image_label.setPixmap(pixmap)
-        self.image_label.setGeometry(0, 0, pixmap.width(), pixmap.height())
+        """设置按当前尺寸缩放好的图片"""
+        self.display_pixmap = pixmap
+        self.shared.prune()
+        self.update()
+
+    def _image_rect(self) -> QRect:
+        """图片按比例缩放后在窗口中居中的区域"""
+        size = self.shared.image_size.scaled(self.size(), Qt.KeepAspectRatio)
+        return QRect(
+            (self.width() - size.width()) // 2, (self.height() - size.height()) // 2,
+            size.width(), size.height()
+        )
+
+    def _build_mip_levels(self):
+        """空闲时生成共享图片的金字塔"""
+        if self.isVisible() and not self.shared.mip_levels:
+            self.shared.build_mip_levels()
+            self.manager.update_memory()
+
+    def _finish_resize(self):
+        """调整大小结束，按最终尺寸平滑缩放一次"""
+        self.resizing = False
+        size = self._image_rect().size()
+        if self.display_pixmap is None or self.display_pixmap.size() != size:
+            self.setPixmap(self.shared.scaled_to(size))
+        else:
+            self.update()
+        self.manager.update_memory()
 
     def mousePressEvent(self, event):
         """鼠标按下"""
         if event.button() == Qt.LeftButton:
             self.drag_start_pos = event.pos()
             self.resize_edge = self._get_resize_edge(event.pos())
+            self.manager.touch(self.shared)
+            if self.resize_edge and self.shared.pixmap is not None:
+                self.resizing = True
+                self.shared.build_mip_levels()
             print(f"[浮窗] 鼠标按下: {event.pos()}, 边缘: {self.resize_edge}")
 
     def mouseMoveEvent(self, event):
@@ -121,14 +296,14 @@ class ImageFloatWindow(QWidget):
         """鼠标释放"""
         self.drag_start_pos = None
         self.resize_edge = None
+        if self.resizing:
+            self._finish_resize()
 
     def mouseDoubleClickEvent(self, event):
         """双击关闭"""
         if event.button() == Qt.LeftButton:
             print(f"[浮窗] 双击关闭")
             self.close()
-            if self in _active_windows:
-                _active_windows.remove(self)
 
     def _get_resize_edge(self, pos: QPoint) -> Optional[str]:
         """获取鼠标在哪个边缘"""
@@ -160,7 +335,7 @@ class ImageFloatWindow(QWidget):
 
     def _handle_resize(self, pos: QPoint):
         """处理调整大小"""
-        if not self.original_pixmap:
+        if self.shared.pixmap is None:
             return
 
         x, y = pos.x(), pos.y()
@@ -191,13 +366,9 @@ class ImageFloatWindow(QWidget):
                 geometry.setHeight(new_height)
 
         if geometry != self.geometry():
+            # 新尺寸的图片在 paintEvent 中绘制，不在每次鼠标移动时生成新图片
             self.setGeometry(geometry)
-            scaled = self.original_pixmap.scaled(
-                self.size(),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            self.setPixmap(scaled)
+            self._ensure_resolution()
 
     def _update_cursor(self, pos: QPoint):
         """更新鼠标样式"""
@@ -222,6 +393,40 @@ class ImageFloatWindow(QWidget):
         """鼠标离开"""
         self.setCursor(Qt.ArrowCursor)
 
+    def paintEvent(self, event):
+        """绘制图片和边框 - 第一次绘制时记录从热键到可见的延迟"""
+        super().paintEvent(event)
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+        if self.resizing:
+            # 调整大小过程中：从金字塔取一级快速缩放（不开平滑）
+            target = self._image_rect()
+            painter.drawPixmap(target, self.shared.mip_level_for(target.size()))
+        elif self.display_pixmap is not None:
+            # 缩放好的图片，或解码完成前的缩略图
+            painter.drawPixmap(self._image_rect(), self.display_pixmap)
+        painter.setPen(QPen(self.BORDER_COLOR, self.BORDER_WIDTH))
+        painter.drawRect(self.rect().adjusted(1, 1, -1, -1))
+        painter.end()
+        if not self.shared.mip_levels and self.shared.pixmap is not None and not self.resizing:
+            # 第一次显示之后空闲时生成金字塔，不影响显示延迟，也不在按下鼠标时才卡一下
+            QTimer.singleShot(0, self._build_mip_levels)
+        if self.requested_at is not None and self.shared.pixmap is not None:
+            latency = (time.perf_counter() - self.requested_at) * 1000
+            self.requested_at = None
+            print(f"[浮窗] 热键到显示耗时: {latency:.1f} ms")
+
+    def changeEvent(self, event):
+        """窗口被激活时记为前台使用"""
+        super().changeEvent(event)
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.manager.touch(self.shared)
+
+    def closeEvent(self, event):
+        """关闭时交还共享的图片"""
+        super().closeEvent(event)
+        self.manager.release(self)
+
     def showEvent(self, event):
         """显示事件"""
         super().showEvent(event)
@@ -231,26 +436,142 @@ class ImageFloatWindow(QWidget):
 
 
 class FloatWindowManager:
-    """浮窗管理器"""
+    """浮窗管理器
+
+    按图片内容摘要（图片文件名）共享解码结果并计数引用，最后一个浮窗关闭时释放。
+    总占用超过 float_window_memory_mb 时，从最久没在前台用过的图片开始丢掉高分辨率数据。
+    """
 
     def __init__(self):
-        self.windows = []
+        self.windows: List[ImageFloatWindow] = []  # 同时防止浮窗被垃圾回收
+        self.images: Dict[str, SharedImage] = {}  # 内容摘要 -> 共享图片
 
-    def show_image(self, image_path: str):
+    def show_image(self, image_path: str, requested_at: float = None) -> ImageFloatWindow:
         """显示图片浮窗"""
         print(f"[浮窗管理器] 显示图片: {image_path}")
-        window = ImageFloatWindow(image_path)
+        window = ImageFloatWindow(image_path, self, requested_at=requested_at)
+        self.windows.append(window)
         window.show()
         window.raise_()
         window.activateWindow()
-        self.windows.append(window)
+        self.update_memory()
+        return window
+
+    def acquire(self, image_path: str, window: ImageFloatWindow) -> SharedImage:
+        """浮窗取得图片的共享解码结果（引用计数 +1）"""
+        digest = Path(image_path).stem
+        shared = self.images.get(digest)
+        if shared is None:
+            shared = self.images[digest] = SharedImage(digest, image_path)
+            self._open(shared)
+        shared.windows.append(window)
+        shared.last_used = time.monotonic()
+        return shared
+
+    def _open(self, shared: SharedImage):
+        """新图片：内存里有最近截图就直接用，否则只读文件头"""
+        from image_cache import image_cache
+
+        cached = image_cache.get(shared.image_path)
+        if cached is not None:
+            shared.image_size = cached.size()
+            shared.set_pixmap(QPixmap.fromImage(cached))
+        else:
+            shared.image_size = image_size(shared.image_path)
+
+    def release(self, window: ImageFloatWindow):
+        """浮窗关闭（引用计数 -1，归零时释放图片）"""
+        if window in self.windows:
+            self.windows.remove(window)
+        shared = window.shared
+        if window not in shared.windows:
+            return
+        shared.windows.remove(window)
+        if shared.windows:
+            shared.prune()
+        else:
+            image_loader.cancel(shared.load_request)
+            self.images.pop(shared.digest, None)
+        self.update_memory()
+
+    def touch(self, shared: SharedImage):
+        """记录图片被前台窗口使用"""
+        shared.last_used = time.monotonic()
+
+    def request_resolution(self, shared: SharedImage, max_size: Optional[QSize]):
+        """已解码的分辨率不够时按 max_size（None 为原尺寸）在后台解码，完成后通知所有窗口"""
+        if shared.load_request is not None or shared.failed:
+            # 正在解码的完成后，各窗口会再检查一次分辨率
+            return
+        needed = shared.image_size if max_size is None else shared.image_size.scaled(max_size, Qt.KeepAspectRatio)
+        if shared.pixmap is not None and shared.pixmap.width() >= min(needed.width(), shared.image_size.width()):
+            return
+        shared.load_request = image_loader.request(
+            shared.image_path, max_size, lambda image: self._on_image_loaded(shared, image)
+        )
+
+    def _on_image_loaded(self, shared: SharedImage, image: QImage):
+        """后台解码完成"""
+        shared.load_request = None
+        if image.isNull():
+            # 不再重试，已有的低分辨率图片照常显示
+            shared.failed = True
+        elif shared.pixmap is None or image.width() > shared.pixmap.width():
+            shared.set_pixmap(QPixmap.fromImage(image))
+            print(f"[浮窗管理器] 图片解码完成: {shared.digest[:12]} {image.width()}x{image.height()}")
+        for window in list(shared.windows):
+            window._on_image_changed()
+        self.update_memory()
+
+    def memory_usage(self) -> int:
+        """所有浮窗图片当前占用的内存（字节，共用的图片只算一次）"""
+        seen = set()
+        total = 0
+        for shared in self.images.values():
+            for pixmap in shared.pixmaps():
+                if pixmap.cacheKey() not in seen:
+                    seen.add(pixmap.cacheKey())
+                    total += pixmap_bytes(pixmap)
+        return total
+
+    def enforce_budget(self) -> int:
+        """超出内存上限时让后台浮窗只保留显示尺寸的图片，返回处理的图片数"""
+        budget = config.float_window_memory_mb * 1024 * 1024
+        if budget <= 0:
+            return 0
+        dropped = 0
+        for shared in sorted(self.images.values(), key=lambda item: item.last_used):
+            if self.memory_usage() <= budget:
+                break
+            if shared.in_foreground() or shared.load_request is not None:
+                continue
+            before = pixmap_bytes(shared.pixmap)
+            shared.drop_resolution()
+            if pixmap_bytes(shared.pixmap) < before:
+                dropped += 1
+        return dropped
+
+    def update_memory(self):
+        """检查内存上限并报告当前占用"""
+        dropped = self.enforce_budget()
+        if dropped:
+            print(f"[浮窗管理器] 超出内存上限，{dropped} 张后台图片只保留显示尺寸")
+        print(f"[浮窗管理器] {self.report()}")
+
+    def report(self) -> str:
+        """当前占用（一行）"""
+        from storage_manager import format_size
+
+        text = f"{len(self.windows)} 个浮窗，{len(self.images)} 张图片，占用 {format_size(self.memory_usage())}"
+        if config.float_window_memory_mb > 0:
+            text += f" / 上限 {config.float_window_memory_mb} MB"
+        return text
 
     def close_all(self):
         """关闭所有浮窗"""
-        for window in self.windows:
+        for window in list(self.windows):
             window.close()
         self.windows.clear()
-        _active_windows.clear()
 
 
 # 全局管理器实例
@@ -0,0 +1,131 @@
+"""
+图片加载 - 统一读取各种存储格式为 QPixmap / QImage
+
+大图（多显示器截图可达 7680x2160 以上）先只读文件头取尺寸，再由后台线程按显示尺寸解码。
+"""
+import itertools
+import queue
+import struct
+import threading
+from PyQt5.QtCore import QCoreApplication, QObject, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QPixmap, QImage, QImageReader
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from qimage_convert import pil_to_qimage
+
+
+def load_pixmap(path) -> QPixmap:
+    """读取图片文件为 QPixmap，Qt 不认识的格式（raw_zstd）走 PIL 解码"""
+    from image_encoder import FORMAT_EXTENSIONS, load_image
+
+    if Path(path).suffix != FORMAT_EXTENSIONS["raw_zstd"]:
+        return QPixmap(str(path))
+
+    try:
+        return QPixmap.fromImage(pil_to_qimage(load_image(path)))
+    except Exception as e:
+        print(f"[图片] 读取失败 {path}: {e}")
+        return QPixmap()
+
+
+def image_size(path) -> QSize:
+    """只读文件头取图片尺寸（不解码像素），读取失败返回无效的 QSize"""
+    from image_encoder import FORMAT_EXTENSIONS, RAW_HEADER, RAW_MAGIC
+
+    if Path(path).suffix != FORMAT_EXTENSIONS["raw_zstd"]:
+        return QImageReader(str(path)).size()
+    try:
+        with open(path, "rb") as f:
+            magic, _, _, width, height = RAW_HEADER.unpack(f.read(RAW_HEADER.size))
+    except (OSError, struct.error):
+        return QSize()
+    return QSize(width, height) if magic == RAW_MAGIC else QSize()
+
+
+def read_image(path, max_size: QSize = None) -> QImage:
+    """读取图片为 QImage（可在后台线程调用），读取失败返回空 QImage
+
+    给出 max_size 时按不超过该尺寸（保持比例）解码：WebP 等支持的格式在解码时直接缩小，
+    其他格式由 QImageReader 解码后平滑缩小，原尺寸的像素不会留在内存里。
+    """
+    from image_encoder import FORMAT_EXTENSIONS, load_image
+
+    if Path(path).suffix == FORMAT_EXTENSIONS["raw_zstd"]:
+        try:
+            image = load_image(path)
+            if max_size is not None:
+                image.thumbnail((max_size.width(), max_size.height()))
+            return pil_to_qimage(image)
+        except Exception as e:
+            print(f"[图片] 读取失败 {path}: {e}")
+            return QImage()
+
+    reader = QImageReader(str(path))
+    size = reader.size()
+    if max_size is not None and size.isValid() and (
+        size.width() > max_size.width() or size.height() > max_size.height()
+    ):
+        reader.setScaledSize(size.scaled(max_size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        print(f"[图片] 读取失败 {path}: {reader.errorString()}")
+    return image
+
+
+class ImageLoader(QObject):
+    """后台解码服务
+
+    request() 把解码交给后台线程（QImageReader 解码时不占 GIL，主线程照常响应），
+    解码完成后在主线程调用回调；cancel() 之后的结果直接丢弃。
+    回调靠排队信号回到主线程，对象必须属于主线程（有事件循环），在其他线程创建时移回主线程。
+    """
+
+    _image_ready = pyqtSignal(int, QImage)  # 后台线程 -> 主线程
+
+    def __init__(self):
+        super().__init__()
+        self.callbacks: Dict[int, Callable] = {}  # 请求编号 -> 回调
+        self.request_ids = itertools.count(1)
+        self.queue: "queue.Queue" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        app = QCoreApplication.instance()
+        if app is not None and QObject.thread(self) is not app.thread():
+            self.moveToThread(app.thread())
+        self._image_ready.connect(self._on_image_ready)
+
+    def request(self, path, max_size: Optional[QSize], callback: Callable) -> int:
+        """按不超过 max_size 的尺寸解码（None 为原尺寸），完成后调用 callback(image)，返回请求编号"""
+        request_id = next(self.request_ids)
+        self.callbacks[request_id] = callback
+        self.queue.put((request_id, str(path), max_size))
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="image-loader", daemon=True)
+            self.thread.start()
+        return request_id
+
+    def cancel(self, request_id: Optional[int]):
+        """取消请求（还没解码的跳过，已解码的结果丢弃）"""
+        self.callbacks.pop(request_id, None)
+
+    def _run(self):
+        """后台解码线程"""
+        while True:
+            request_id, path, max_size = self.queue.get()
+            if request_id not in self.callbacks:
+                continue
+            try:
+                image = read_image(path, max_size)
+            except Exception as e:
+                print(f"[图片] 读取失败 {path}: {e}")
+                image = QImage()
+            self._image_ready.emit(request_id, image)
+
+    def _on_image_ready(self, request_id: int, image: QImage):
+        """主线程：回调"""
+        callback = self.callbacks.pop(request_id, None)
+        if callback is not None:
+            callback(image)
+
+
+# 全局图片解码服务实例
+image_loader = ImageLoader()
@@ -2,31 +2,46 @@
 主窗口界面
 """
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QListWidget, QListWidgetItem, QPushButton, QLabel,
+                             QListView, QPushButton, QLabel,
                              QMenu, QAction, QInputDialog, QMessageBox, QSplitter,
-                             QTextEdit, QSystemTrayIcon, QStyle)
+                             QTextEdit, QSystemTrayIcon, QStyle, QLineEdit, QShortcut)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
-from PyQt5.QtGui import QFont, QIcon, QPixmap, QTextDocumentFragment
-from typing import List, Dict
-from datetime import datetime
+from PyQt5.QtGui import QFont, QIcon, QPixmap, QTextDocumentFragment, QKeySequence
+from typing import List, Dict, Optional
+from config.settings import config
 from pathlib import Path
 import database
 from gui.result_window import ResultWindow
+from gui.thumbnail_cache import thumbnail_cache, ICON_SIZE
+from gui.record_model import RecordListModel
+from gui.data_access import data_access
 
 
 class MainWindow(QMainWindow):
     """主窗口"""
 
-    record_added = pyqtSignal()  # 记录添加信号
+    record_added = pyqtSignal(int)  # 记录添加信号（记录 ID）
     refresh_requested = pyqtSignal()  # 刷新请求信号
-    show_float_window_requested = pyqtSignal(str)  # 显示浮窗信号
+    show_float_window_requested = pyqtSignal(str, float)  # 显示浮窗信号（图片路径, 触发时间）
 
     def __init__(self):
         super().__init__()
-        self.records: List[Dict] = []
+        self.record_model = RecordListModel(self)
         self.auto_correct_enabled = True
+        self.clipboard_watcher = None  # 用于打开记录时读取延后的剪贴板格式
+        self.search_query = ""  # 当前搜索词，为空时显示最近记录
+        self.similar_to: Optional[int] = None  # 正在显示与该记录相似的记录
+        self.preview_record_id: Optional[int] = None  # 预览区正在显示的记录
+        self.pending_record_ids: List[int] = []  # 等待合并插入列表的新记录
+
+        # 同一帧内到达的多条新记录合并成一次列表更新
+        self.pending_timer = QTimer(self)
+        self.pending_timer.setSingleShot(True)
+        self.pending_timer.setInterval(16)
+        self.pending_timer.timeout.connect(self._flush_new_records)
 
         self._init_ui()
+        self.record_model.page_loaded.connect(self._update_status)
         self._load_records()
 
         # 连接信号
@@ -74,10 +89,29 @@ class MainWindow(QMainWindow):
 
         # 左侧：记录列表
         left_panel = QVBoxLayout()
-        self.record_list = QListWidget()
+
+        # 搜索框：输入停顿后再查询，避免每个按键都查一次
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("🔍 搜索记录（多个词用空格分隔）")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self._on_search_text_changed)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self._run_search)
+        left_panel.addWidget(self.search_box)
+
+        # Esc 从相似记录返回
+        QShortcut(QKeySequence(Qt.Key_Escape), self, activated=self._exit_similar)
+
+        # 列表只渲染可见行，模型滚动到底部时再取下一页
+        self.record_list = QListView()
         self.record_list.setFont(QFont("Microsoft YaHei", 10))
-        self.record_list.itemDoubleClicked.connect(self._open_record)
-        self.record_list.itemClicked.connect(self._on_item_clicked)  # 添加单击预览
+        self.record_list.setUniformItemSizes(True)
+        self.record_list.setIconSize(ICON_SIZE)  # 图片行的缩略图图标
+        self.record_list.setModel(self.record_model)
+        self.record_list.doubleClicked.connect(self._open_record)
+        self.record_list.clicked.connect(self._on_item_clicked)  # 添加单击预览
         self.record_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.record_list.customContextMenuRequested.connect(self._show_context_menu)
 
@@ -125,127 +159,207 @@ class MainWindow(QMainWindow):
         central.setLayout(layout)
 
     def _load_records(self):
-        """加载记录"""
-        self.records = database.db.get_recent_records()
-        self._refresh_list()
+        """重新加载列表第一页（搜索中则重新执行搜索），页面取回后更新状态栏"""
+        self.similar_to = None
+        self.record_model.reload(self.search_query)
 
-    def _refresh_list(self):
-        """刷新列表"""
-        self.record_list.clear()
+    def _on_search_text_changed(self, text: str):
+        """搜索框内容变化"""
+        self.search_timer.start()
 
-        for i, record in enumerate(self.records):
-            content_type = record["content_type"]
-            content = record["content"]
-            timestamp = record["timestamp"]
-
-            # 格式化时间
-            try:
-                dt = datetime.fromisoformat(timestamp)
-                time_str = dt.strftime("%H:%M:%S")
-            except:
-                time_str = timestamp
-
-            # 格式化内容
-            if content_type == "text":
-                preview = content[:50].replace("\n", " ")
-                if len(content) > 50:
-                    preview += "..."
-                icon = "📝"
-            else:
-                preview = content[:50]
-                icon = ""
+    def _run_search(self):
+        """执行搜索"""
+        self.search_query = self.search_box.text().strip()
+        self._load_records()
 
-            # 检查是否已纠错
-            status = ""
-            if record.get("corrected"):
-                status = " "
+    def _update_status(self):
+        """更新底部记录数"""
+        if self.similar_to is not None:
+            self.status_label.setText(f"相似记录: {self.record_model.rowCount()} 条（按 Esc 返回）")
+        elif self.search_query:
+            count = self.record_model.rowCount()
+            more = "" if self.record_model.exhausted else "+"
+            self.status_label.setText(f"搜索“{self.search_query}”: {count}{more} 条结果")
+        else:
+            data_access.submit(
+                lambda: (database.db.count_records(), database.db.count_archived()),
+                callback=self._show_record_count, key="record_count"
+            )
+
+    def _show_record_count(self, counts: tuple):
+        """显示记录数（_update_status 的查询结果）"""
+        if self.search_query or self.similar_to is not None:
+            return
+        count, archived = counts
+        text = f"共 {count} 条记录"
+        if archived:
+            text += f"（归档 {archived} 条）"
+        self.status_label.setText(text)
+
+    def _load_record(self, index, callback, key: str):
+        """在后台按列表行读取完整记录（含正文），读到后调用 callback(record)"""
+        summary = self.record_model.record_at(index.row())
+        if summary is None:
+            return
+        data_access.submit(
+            database.db.get_record, summary["id"],
+            callback=lambda record: record and callback(record), key=key
+        )
 
-            item_text = f"[{time_str}] {icon} {preview}{status}"
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.UserRole, i)
-            self.record_list.addItem(item)
+    def set_clipboard_watcher(self, watcher):
+        """设置剪贴板监听器"""
+        self.clipboard_watcher = watcher
 
-        self.status_label.setText(f"共 {len(self.records)} 条记录")
+    def _show_formats(self, record: Dict):
+        """打开记录时在后台读取延后的格式，读完后在预览标题中列出附带的格式"""
+        data_access.submit(
+            self._read_formats, record["id"], callback=self._show_format_labels, key="formats"
+        )
 
-    def _on_record_added(self):
-        """新记录添加"""
-        self._load_records()
+    def _read_formats(self, record_id: int) -> List[Dict]:
+        """读取延后的格式并返回格式列表（后台线程）"""
+        if self.clipboard_watcher is not None:
+            self.clipboard_watcher.fetch_record_formats(record_id)
+        return database.db.get_formats(record_id)
+
+    def _show_format_labels(self, formats: List[Dict]):
+        """在预览标题中列出格式"""
+        parts = []
+        for fmt in formats:
+            size_kb = max(fmt["size"], 0) / 1024
+            label = f"{fmt['name']} {size_kb:.1f} KB"
+            if fmt["status"] == "expired":
+                label += "（已过期）"
+            elif fmt["status"] == "deferred":
+                label += "（未读取）"
+            parts.append(label)
+
+        if parts:
+            self.preview_label.setText("[预览] " + " · ".join(parts))
+        else:
+            self.preview_label.setText("[预览]")
+
+    def _on_record_added(self, record_id: int):
+        """新记录添加：先攒起来，下一帧统一插入"""
+        if record_id not in self.pending_record_ids:
+            self.pending_record_ids.append(record_id)
+        if not self.pending_timer.isActive():
+            self.pending_timer.start()
+
+    def _flush_new_records(self):
+        """只查询新记录这几行，插到列表顶部"""
+        record_ids, self.pending_record_ids = self.pending_record_ids, []
+        if self.search_query or self.similar_to is not None:
+            # 搜索结果不插入新记录（不一定匹配），清空搜索后自然可见
+            return
+        data_access.submit(
+            database.db.get_record_summaries, record_ids, callback=self._on_new_records
+        )
+
+    def _on_new_records(self, records: List[Dict]):
+        """新记录的列表数据取回后插到顶部"""
+        if self.search_query or self.similar_to is not None:
+            return
+        self.record_model.prepend_records(records, config.max_records)
+        self._update_status()
+
+    def _refresh_record(self, record_id: int):
+        """在后台重新读取一行（纠错结果等更新后）"""
+        def apply(records: List[Dict]):
+            if records:
+                self.record_model.update_record(records[0])
+            else:
+                self.record_model.remove_record(record_id)
+
+        data_access.submit(database.db.get_record_summaries, [record_id], callback=apply)
 
     def add_new_record(self, record_id: int):
         """添加新记录（由剪贴板监听器调用）"""
-        print(f"[DEBUG] 主窗口收到刷新请求, record_id={record_id}")
-        # 使用信号触发刷新（线程安全）
-        self.refresh_requested.emit()
+        print(f"[DEBUG] 主窗口收到新记录, record_id={record_id}")
+        # 使用信号切换到主线程（线程安全）
+        self.record_added.emit(record_id)
 
     def _do_refresh(self):
         """执行刷新"""
         print(f"[DEBUG] 刷新记录列表...")
         self._load_records()
-        print(f"[DEBUG] 刷新完成，共 {len(self.records)} 条记录")
+        print(f"[DEBUG] 刷新完成，已加载 {self.record_model.rowCount()} 条记录")
 
-    def _on_item_clicked(self, item):
-        """列表项单击 - 显示预览"""
+    def _on_item_clicked(self, index):
+        """列表项单击 - 显示预览（此时才在后台读取正文）"""
+        self._load_record(index, self._show_record_preview, key="preview")
+
+    def _show_record_preview(self, record: Dict):
+        """显示一条完整记录的预览"""
         try:
-            index = item.data(Qt.UserRole)
-            if 0 <= index < len(self.records):
-                record = self.records[index]
+            if record:
                 content_type = record.get("content_type", "text")
                 image_path = record.get("image_path")
+                self.preview_record_id = record.get("id")
+                self._show_formats(record)
 
-                if content_type == "text":
-                    # 显示文本预览
+                if content_type in ("text", "files"):
+                    # 显示文本预览（文件列表每行一个路径）
                     self.preview_text.setPlainText(record.get("content", ""))
-                elif image_path and Path(image_path).exists():
-                    # 显示图片预览
-                    try:
-                        pixmap = QPixmap(str(image_path))
-                        if not pixmap.isNull():
-                            # 缩放图片以适应预览区域
-                            scaled_pixmap = pixmap.scaled(
-                                300, 200,
-                                Qt.KeepAspectRatio,
-                                Qt.SmoothTransformation
-                            )
-                            # 使用文档片段插入图片
-                            document = self.preview_text.document()
-                            document.clear()
-                            cursor = self.preview_text.textCursor()
-                            cursor.insertImage(scaled_pixmap.toImage())
-                            # 添加图片路径说明
-                            cursor.insertText(f"\n\n图片: {Path(image_path).name}")
-                        else:
-                            self.preview_text.setPlainText(f"[图片文件已删除: {Path(image_path).name}]")
-                    except Exception as e:
-                        self.preview_text.setPlainText(f"[图片加载失败: {e}]")
+                elif image_path:
+                    # 显示缩略图预览（后台读取，读完时仍选中这条记录才显示）
+                    self.preview_text.setPlainText("[图片加载中...]")
+                    thumbnail_cache.request(
+                        image_path,
+                        lambda pixmap: self._show_preview_image(record["id"], image_path, pixmap)
+                    )
                 else:
                     self.preview_text.setPlainText(f"[图片]\n{record.get('content', '')}")
         except Exception as e:
             print(f"预览错误: {e}")
             self.preview_text.setPlainText(f"[预览错误: {e}]")
 
-    def _open_record(self, item):
-        """打开记录"""
-        index = item.data(Qt.UserRole)
-        record = self.records[index]
+    def _show_preview_image(self, record_id: int, image_path: str, pixmap: QPixmap):
+        """缩略图读取完成后显示在预览区"""
+        if self.preview_record_id != record_id:
+            return
+        if pixmap.isNull():
+            self.preview_text.setPlainText(f"[图片文件已删除: {Path(image_path).name}]")
+            return
+        # 缩略图按纠错窗口的尺寸生成，预览区再缩小一些
+        scaled_pixmap = pixmap.scaled(300, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        document = self.preview_text.document()
+        document.clear()
+        cursor = self.preview_text.textCursor()
+        cursor.insertImage(scaled_pixmap.toImage())
+        cursor.insertText(f"\n\n图片: {Path(image_path).name}")
+
+    def _open_record(self, index):
+        """打开记录（正文读取完成后弹出纠错窗口）"""
+        self._load_record(index, self._open_record_window, key="open")
+
+    def _open_record_window(self, record: Dict):
+        """弹出纠错窗口"""
+        self._show_formats(record)
 
         window = ResultWindow(record, self)
         window.exec_()
+        # 纠错结果可能已写入数据库，只刷新这一行
+        self._refresh_record(record["id"])
 
     def _show_context_menu(self, pos):
         """右键菜单"""
-        item = self.record_list.itemAt(pos)
-        if not item:
+        index = self.record_list.indexAt(pos)
+        record = self.record_model.record_at(index.row()) if index.isValid() else None
+        if not record:
             return
 
-        index = item.data(Qt.UserRole)
-        record = self.records[index]
-
         menu = QMenu(self)
 
         open_action = QAction(" 查看详情", self)
-        open_action.triggered.connect(lambda: self._open_record(item))
+        open_action.triggered.connect(lambda: self._open_record(index))
         menu.addAction(open_action)
 
+        if record["content_type"] == "text":
+            similar_action = QAction(" 查找相似记录", self)
+            similar_action.triggered.connect(lambda: self._find_similar(record["id"]))
+            menu.addAction(similar_action)
+
         menu.addSeparator()
 
         delete_action = QAction(" 删除", self)
@@ -254,6 +368,42 @@ class MainWindow(QMainWindow):
 
         menu.exec_(self.record_list.mapToGlobal(pos))
 
+    def _find_similar(self, record_id: int):
+        """在后台查找与该记录相似的记录，结果显示在列表中"""
+        self.status_label.setText("正在查找相似记录...")
+        data_access.submit(
+            self._similar_records, record_id, callback=self._show_similar_records, key="similar"
+        )
+
+    @staticmethod
+    def _similar_records(record_id: int) -> tuple:
+        """相似记录的列表数据，按相似度降序（后台线程）"""
+        from similarity_index import similarity_index
+
+        record = database.db.get_record(record_id)
+        if record is None:
+            return record_id, []
+        hits = similarity_index.similar(record["content"], config.similar_results, exclude_id=record_id)
+        scores = dict(hits)
+        records = database.db.get_record_summaries(list(scores))
+        for item in records:
+            preview = item["preview"][:50]
+            item["snippet"] = f"[{scores[item['id']]:.0%}] {preview}"
+        records.sort(key=lambda item: scores[item["id"]], reverse=True)
+        return record_id, records
+
+    def _show_similar_records(self, result: tuple):
+        """显示相似记录"""
+        record_id, records = result
+        self.similar_to = record_id
+        self.record_model.show_records(records)
+        self._update_status()
+
+    def _exit_similar(self):
+        """从相似记录返回原来的列表"""
+        if self.similar_to is not None:
+            self._load_records()
+
     def _delete_record(self, record_id: int):
         """删除记录"""
         reply = QMessageBox.question(
@@ -262,8 +412,10 @@ class MainWindow(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            database.db.delete_record(record_id)
-            self._load_records()
+            self.record_model.remove_record(record_id)
+            data_access.submit(
+                database.db.delete_record, record_id, callback=lambda _: self._update_status()
+            )
 
     def _clear_all(self):
         """清空所有记录"""
@@ -273,8 +425,7 @@ class MainWindow(QMainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            database.db.clear_all()
-            self._load_records()
+            data_access.submit(database.db.clear_all, callback=lambda _: self._load_records())
 
     def _toggle_auto_correct(self):
         """切换自动纠错"""
@@ -286,34 +437,31 @@ class MainWindow(QMainWindow):
             self.auto_correct_label.setText(" 自动纠错: 关闭")
 
     def _show_float_window(self):
-        """显示图片浮窗"""
-        # 查找最后一张图片
-        last_image_path = None
-        for record in reversed(self.records):
-            if record.get("content_type") == "image" and record.get("image_path"):
-                last_image_path = record.get("image_path")
-                break
+        """显示图片浮窗（在后台查找最后一张图片）"""
+        data_access.submit(
+            database.db.get_latest_image_path, callback=self._show_latest_image, key="latest_image"
+        )
 
+    def _show_latest_image(self, last_image_path: Optional[str]):
+        """为最后一张图片打开浮窗"""
         if not last_image_path:
             QMessageBox.information(self, "提示", "没有找到图片记录。请先复制一张图片。")
             return
 
         try:
-            from gui.image_float_window import ImageFloatWindow
-            window = ImageFloatWindow(last_image_path)
-            window.show()
+            from gui.image_float_window import float_window_manager
+            float_window_manager.show_image(last_image_path)
             print(f"[主窗口] 显示浮窗: {last_image_path}")
         except Exception as e:
             QMessageBox.critical(self, "错误", f"无法显示浮窗: {e}")
 
-    def _show_float_window_from_signal(self, image_path: str):
+    def _show_float_window_from_signal(self, image_path: str, requested_at: float = None):
         """从信号显示图片浮窗（在主线程中执行）"""
         try:
-            from gui.image_float_window import ImageFloatWindow
-            from pathlib import Path
-            if Path(image_path).exists():
-                window = ImageFloatWindow(image_path)
-                window.show()
+            from gui.image_float_window import float_window_manager
+            from image_cache import image_cache
+            if image_path in image_cache or Path(image_path).exists():
+                float_window_manager.show_image(image_path, requested_at=requested_at)
                 print(f"[主窗口] 通过信号显示浮窗: {image_path}")
             else:
                 print(f"[主窗口] 图片文件不存在: {image_path}")
@@ -322,11 +470,19 @@ class MainWindow(QMainWindow):
 
     def show_preview(self, index: int):
         """显示预览"""
-        if 0 <= index < len(self.records):
-            record = self.records[index]
+        summary = self.record_model.record_at(index)
+        if summary:
+            data_access.submit(
+                database.db.get_record, summary["id"], callback=self._show_plain_preview, key="preview"
+            )
+
+    def _show_plain_preview(self, record: Optional[Dict]):
+        """只显示文字的预览"""
+        if record:
             content_type = record["content_type"]
+            self.preview_record_id = record["id"]
 
-            if content_type == "text":
+            if content_type in ("text", "files"):
                 self.preview_text.setPlainText(record["content"])
             else:
                 self.preview_text.setPlainText(f"[图片]\n{record['content']}")
@@ -0,0 +1,219 @@
+"""
+记录列表模型 - 只保存列表需要的摘要字段，滚动到底部时按键集分页加载
+"""
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal
+from datetime import datetime
+from typing import List, Dict, Optional
+import database
+from gui.data_access import data_access
+from gui.thumbnail_cache import thumbnail_cache
+
+TYPE_ICONS = {"text": "📝", "files": "📁", "image": "🖼"}
+LONG_CONTENT_LENGTH = 1000  # 超过该字数的记录在列表中显示字数
+
+
+def format_record(record: Dict) -> str:
+    """列表项显示文字"""
+    try:
+        time_str = datetime.fromisoformat(record["timestamp"]).strftime("%H:%M:%S")
+    except (TypeError, ValueError):
+        time_str = record["timestamp"]
+
+    content_type = record["content_type"]
+    icon = TYPE_ICONS.get(content_type, "")
+    if record.get("snippet") and content_type != "image":
+        # 搜索结果显示命中处摘要
+        preview = record["snippet"]
+    else:
+        preview = record["preview"][:50]
+        if len(record["preview"]) > 50:
+            preview += "..."
+
+    # 长文本显示字数，已纠错的记录加标记，多次复制的内容显示次数
+    status = ""
+    content_length = record.get("content_length") or 0
+    if content_type != "image" and content_length > LONG_CONTENT_LENGTH:
+        status += f" ({content_length} 字)"
+    if record.get("has_correction"):
+        status += " ✓"
+    copy_count = record.get("copy_count") or 1
+    if copy_count > 1:
+        status += f" ×{copy_count}"
+
+    return f"[{time_str}] {icon} {preview}{status}"
+
+
+class RecordListModel(QAbstractListModel):
+    """剪贴板记录列表模型
+
+    行数据只有 id、类型、时间、状态和摘要（不含正文），正文在选中时按 id 读取。
+    视图滚动到底部时 QListView 调用 fetchMore，在后台线程取下一页，取回后追加。
+    """
+
+    RecordRole = Qt.UserRole
+    PAGE_SIZE = 200
+
+    page_loaded = pyqtSignal()  # 一页数据已追加到列表
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows: List[Dict] = []
+        self.query = ""  # 搜索词，为空时按时间列出
+        self.exhausted = False  # 已经取完所有页
+        self.loading = False  # 正在后台取下一页
+        self.request_key = f"record_page:{id(self)}"
+        thumbnail_cache.loaded.connect(self._on_thumbnail_loaded)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.rows):
+            return None
+        record = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            # 显示文字缓存在行数据中，滚动时不重复格式化
+            text = record.get("display")
+            if text is None:
+                text = record["display"] = format_record(record)
+            return text
+        if role == Qt.DecorationRole:
+            # 图片行显示缩略图，还没读入缓存时先不显示，读完后刷新该行
+            if record["content_type"] == "image" and record.get("image_path"):
+                return thumbnail_cache.icon(record["image_path"])
+            return None
+        if role == Qt.ToolTipRole:
+            return record["timestamp"]
+        if role == self.RecordRole:
+            return record
+        return None
+
+    def _on_thumbnail_loaded(self, image_path: str):
+        """缩略图读入后刷新用到它的行"""
+        for row, record in enumerate(self.rows):
+            if record.get("image_path") == image_path:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self.exhausted and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted or self.loading:
+            return
+        self.loading = True
+        last = self.rows[-1] if self.rows else None
+        data_access.submit(
+            self._fetch_page, self.query, last,
+            callback=self._on_page_loaded, key=self.request_key,
+            on_error=self._on_page_failed
+        )
+
+    @classmethod
+    def _fetch_page(cls, query: str, last: Optional[Dict]) -> List[Dict]:
+        """按当前模式取下一页（后台线程）"""
+        if query:
+            after = last["cursor"] if last else None
+            return database.db.search(query, cls.PAGE_SIZE, after)
+        before = (last["timestamp"], last["id"]) if last else None
+        return database.db.get_record_page(cls.PAGE_SIZE, before)
+
+    def _on_page_loaded(self, page: List[Dict]):
+        """追加取回的一页"""
+        self.loading = False
+        if len(page) < self.PAGE_SIZE:
+            self.exhausted = True
+        # 取第一页期间插到顶部的新记录可能也在这一页里
+        if page and self.rows:
+            existing = {record["id"] for record in self.rows}
+            page = [record for record in page if record["id"] not in existing]
+        if page:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+        self.page_loaded.emit()
+
+    def _on_page_failed(self, message: str):
+        """取页失败：清除加载标记，下次滚动到底部时重试"""
+        self.loading = False
+        print(f"[记录列表] 加载下一页失败: {message}")
+
+    def reload(self, query: str = None):
+        """清空并重新加载第一页；query 不为 None 时切换搜索词（还没返回的旧页会被丢弃）"""
+        self.beginResetModel()
+        if query is not None:
+            self.query = query
+        self.rows = []
+        self.exhausted = False
+        self.loading = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def show_records(self, records: List[Dict]):
+        """显示一组固定的记录（如相似记录），不再分页"""
+        data_access.cancel(self.request_key)
+        self.beginResetModel()
+        self.rows = list(records)
+        self.exhausted = True
+        self.loading = False
+        self.endResetModel()
+
+    def _row_of(self, record_id: int) -> int:
+        """记录所在行，不在已加载的行中返回 -1"""
+        for row, record in enumerate(self.rows):
+            if record["id"] == record_id:
+                return row
+        return -1
+
+    def prepend_records(self, records: List[Dict], max_rows: int = None):
+        """把新记录（按时间倒序）插到顶部；已在列表中的记录（再次复制）先移除
+
+        max_rows 为数据库保留的记录数，超出的尾部行已被数据库淘汰，一并移除。
+        """
+        if not records:
+            return
+        for record in records:
+            row = self._row_of(record["id"])
+            if row >= 0:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), 0, len(records) - 1)
+        self.rows[:0] = records
+        self.endInsertRows()
+
+        if max_rows is not None and len(self.rows) > max_rows:
+            self.beginRemoveRows(QModelIndex(), max_rows, len(self.rows) - 1)
+            del self.rows[max_rows:]
+            self.endRemoveRows()
+            self.exhausted = True
+
+    def update_record(self, record: Dict):
+        """替换一行的数据（纠错结果、复制次数变化）"""
+        row = self._row_of(record["id"])
+        if row < 0:
+            return
+        # 搜索结果保留原来的摘要和分页位置
+        for key in ("snippet", "cursor"):
+            if key in self.rows[row]:
+                record[key] = self.rows[row][key]
+        self.rows[row] = record
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_record(self, record_id: int):
+        """移除一行"""
+        row = self._row_of(record_id)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self.endRemoveRows()
+
+    def record_at(self, row: int) -> Optional[Dict]:
+        """第 row 行的摘要数据"""
+        if 0 <= row < len(self.rows):
+            return self.rows[row]
+        return None
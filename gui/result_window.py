@@ -6,7 +6,12 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTextEdit,
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QTextCursor
 from typing import Dict
+from pathlib import Path
 import ai_service
+from gui.thumbnail_cache import thumbnail_cache
+
+# 纠错线程的调试日志，和其他日志放在一起（由存储管理统一轮转）
+DEBUG_LOG_PATH = Path.home() / ".clipboard-polisher" / "debug_worker.log"
 
 
 class CorrectionWorker(QThread):
@@ -23,21 +28,21 @@ class CorrectionWorker(QThread):
         """在后台线程中执行纠错"""
         import traceback
         print(f"[DEBUG] Worker thread started, mode={self.mode}, text_length={len(self.text)}")
-        with open('debug_worker.log', 'a', encoding='utf-8') as f:
+        with open(DEBUG_LOG_PATH, 'a', encoding='utf-8') as f:
             f.write(f"\n[DEBUG] Worker thread started, mode={self.mode}, text_length={len(self.text)}\n")
         try:
             result = ai_service.ai_service.correct_text(self.text, self.mode)
             corrected = result.get('corrected', '')
             print(f"[DEBUG] AI service returned, corrected_length={len(corrected)}")
-            with open('debug_worker.log', 'a', encoding='utf-8') as f:
+            with open(DEBUG_LOG_PATH, 'a', encoding='utf-8') as f:
                 f.write(f"[DEBUG] AI returned, corrected_length={len(corrected)}, preview={corrected[:100] if corrected else 'EMPTY'}\n")
                 f.write(f"[DEBUG] About to emit signal...\n")
             self.finished.emit(result)
-            with open('debug_worker.log', 'a', encoding='utf-8') as f:
+            with open(DEBUG_LOG_PATH, 'a', encoding='utf-8') as f:
                 f.write(f"[DEBUG] Signal emitted\n")
         except Exception as e:
             print(f"[DEBUG] Worker thread error: {e}")
-            with open('debug_worker.log', 'a', encoding='utf-8') as f:
+            with open(DEBUG_LOG_PATH, 'a', encoding='utf-8') as f:
                 f.write(f"[DEBUG] Exception: {e}\n{traceback.format_exc()}\n")
             self.error.emit(str(e))
 
@@ -164,6 +169,21 @@ class ResultWindow(QDialog):
 
         self.setLayout(layout)
 
+    def _show_image(self, image_path: str, pixmap):
+        """缩略图读取完成"""
+        try:
+            if pixmap.isNull():
+                self.original_text.setPlainText(f"[图片文件已删除: {Path(image_path).name}]")
+                return
+            document = self.original_text.document()
+            document.clear()
+            cursor = self.original_text.textCursor()
+            cursor.insertImage(pixmap.toImage())
+            cursor.insertText(f"\n\n图片: {Path(image_path).name}")
+        except RuntimeError:
+            # 读取完成前窗口已关闭
+            pass
+
     def _load_content(self):
         """加载内容"""
         try:
@@ -171,31 +191,12 @@ class ResultWindow(QDialog):
             content_type = self.record_data.get("content_type", "text")
             image_path = self.record_data.get("image_path")
 
-            if content_type == "image" and image_path and Path(image_path).exists():
-                # 显示图片
-                from PyQt5.QtGui import QPixmap
-                from pathlib import Path
-
-                try:
-                    pixmap = QPixmap(str(image_path))
-                    if not pixmap.isNull():
-                        # 缩放图片
-                        scaled_pixmap = pixmap.scaled(
-                            400, 300,
-                            Qt.KeepAspectRatio,
-                            Qt.SmoothTransformation
-                        )
-                        document = self.original_text.document()
-                        document.clear()
-                        cursor = self.original_text.textCursor()
-                        cursor.insertImage(scaled_pixmap)
-                        cursor.insertText(f"\n\n图片: {Path(image_path).name}")
-                    else:
-                        self.original_text.setPlainText(f"[图片文件损坏: {Path(image_path).name}]")
-                except Exception as e:
-                    self.original_text.setPlainText(f"[图片加载失败: {e}]")
-            elif content_type == "text":
-                # 显示文本
+            if content_type == "image" and image_path:
+                # 显示缩略图（后台读取，不在主线程解码原图）
+                self.original_text.setPlainText("[图片加载中...]")
+                thumbnail_cache.request(image_path, lambda pixmap: self._show_image(image_path, pixmap))
+            elif content_type in ("text", "files"):
+                # 显示文本（文件列表每行一个路径）
                 self.original_text.setPlainText(original)
 
             # 如果已有纠错结果，直接显示
@@ -204,9 +205,12 @@ class ResultWindow(QDialog):
                 self.corrected_text.setPlainText(corrected)
                 self.changes_text.setText("已保存的纠错结果")
             else:
-                # 图片不自动执行纠错
-                if content_type != "image":
+                # 只有文本自动执行纠错
+                if content_type == "text":
                     QTimer.singleShot(100, self._auto_correct)
+                elif content_type == "files":
+                    self.corrected_text.setPlainText("[文件列表无需文字纠错]")
+                    self.changes_text.setText("文件列表已记录")
                 else:
                     self.corrected_text.setPlainText("[图片内容无需文字纠错]")
                     self.changes_text.setText("图片已记录，可使用 Ctrl+Shift+V 粘贴")
@@ -253,7 +257,7 @@ class ResultWindow(QDialog):
     def _on_correction_finished(self, result: dict):
         """纠错完成回调"""
         print(f"[DEBUG] _on_correction_finished called")
-        with open('debug_worker.log', 'a', encoding='utf-8') as f:
+        with open(DEBUG_LOG_PATH, 'a', encoding='utf-8') as f:
             f.write(f"\n[DEBUG] _on_correction_finished called!\n")
             f.write(f"[DEBUG] Result keys: {list(result.keys())}\n")
         self.result_data = result
@@ -267,14 +271,11 @@ class ResultWindow(QDialog):
         else:
             self.changes_text.setText("无需修改")
 
-        # 更新数据库（在主线程中）
+        # 在后台更新数据库（与之后的列表刷新同在一个队列，先后顺序不变）
         from database import db
-        db.update_correction(
-            self.record_data["id"],
-            corrected,
-            "completed"
-        )
-        with open('debug_worker.log', 'a', encoding='utf-8') as f:
+        from gui.data_access import data_access
+        data_access.submit(db.update_correction, self.record_data["id"], corrected, "completed")
+        with open(DEBUG_LOG_PATH, 'a', encoding='utf-8') as f:
             f.write(f"[DEBUG] Database updated, corrected_length={len(corrected)}\n")
         print(f"[DEBUG] Database updated")
 
@@ -287,8 +288,9 @@ class ResultWindow(QDialog):
     def _copy_result(self):
         """复制纠错结果"""
         text = self.corrected_text.toPlainText()
-        import pyperclip
-        pyperclip.copy(text)
+        # 标记为本程序写入，监听器不会再把它记录成新内容
+        from clipboard_origin import clipboard_origin
+        clipboard_origin.copy_text(text, self.record_data.get("id"))
 
         self.copy_btn.setText("[已复制!]")
         QTimer.singleShot(2000, lambda: self.copy_btn.setText("[复制纠错结果]"))
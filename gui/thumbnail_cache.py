@@ -0,0 +1,146 @@
+"""
+缩略图缓存 - 后台线程读取磁盘缩略图，主线程用 QPixmapCache 按字节上限缓存
+
+预览区、纠错窗口和列表行图标都从这里取图，不在主线程解码原图。
+"""
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Set
+from PyQt5.QtCore import QCoreApplication, QObject, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QPixmapCache
+from config.settings import config
+from image_cache import image_cache
+from image_store import image_store
+from thumbnails import thumbnail_store, THUMBNAIL_SIZE
+
+ICON_SIZE = QSize(32, 18)  # 列表行图标尺寸（不超过一行文字的高度）
+
+
+class ThumbnailCache(QObject):
+    """缩略图的内存缓存
+
+    request() 缓存命中时立即回调，否则交给后台线程读取，读完在主线程回调。
+    后台线程按后进先出处理请求，快速滚动时先加载最新出现在视野里的行。
+    对象必须属于主线程，排队信号才有事件循环接收，在其他线程创建时移回主线程。
+    """
+
+    loaded = pyqtSignal(str)  # 一张缩略图已读入缓存（参数为原图路径）
+    _image_ready = pyqtSignal(str, QImage, bool)  # 后台线程 -> 主线程（路径, 图片, 原图是否还在编码）
+    _generated = pyqtSignal(str)  # 缩略图仓库的生成线程 -> 主线程
+
+    def __init__(self):
+        super().__init__()
+        QPixmapCache.setCacheLimit(config.thumbnail_cache_mb * 1024)
+        self.callbacks: Dict[str, List[Callable]] = {}  # 正在读取的路径 -> 等待的回调
+        self.failed: Set[str] = set()  # 原图已不存在的路径，不再重复读取
+        self.waiting: Set[str] = set()  # 原图还在编码、等缩略图生成后再读的路径（回调保留在 callbacks 中）
+        self.queue: "queue.LifoQueue" = queue.LifoQueue()
+        self.thread: Optional[threading.Thread] = None
+        app = QCoreApplication.instance()
+        if app is not None and QObject.thread(self) is not app.thread():
+            self.moveToThread(app.thread())
+        self._image_ready.connect(self._on_image_ready)
+        self._generated.connect(self._on_generated)
+        thumbnail_store.add_listener(self._generated.emit)
+
+    def cached(self, image_path: str) -> Optional[QPixmap]:
+        """缓存中的缩略图，没有返回 None"""
+        return QPixmapCache.find("thumbnail:" + image_path)
+
+    def request(self, image_path: str, callback: Callable = None):
+        """取缩略图，取到后在主线程调用 callback(pixmap)；原图不存在时 pixmap 为空"""
+        pixmap = self.cached(image_path)
+        if pixmap is None and image_path in self.failed:
+            pixmap = QPixmap()
+        if pixmap is not None:
+            if callback:
+                callback(pixmap)
+            return
+
+        waiting = self.callbacks.get(image_path)
+        if waiting is not None:
+            if callback:
+                waiting.append(callback)
+            return
+        self.callbacks[image_path] = [callback] if callback else []
+        self._start_load(image_path)
+
+    def _start_load(self, image_path: str):
+        """交给后台线程读取"""
+        self.queue.put(image_path)
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="thumbnail-loader", daemon=True)
+            self.thread.start()
+
+    def icon(self, image_path: str) -> Optional[QPixmap]:
+        """列表行图标；缩略图还没读入时发起读取并返回 None，读完后发出 loaded"""
+        key = "icon:" + image_path
+        icon = QPixmapCache.find(key)
+        if icon is not None:
+            return icon
+        pixmap = self.cached(image_path)
+        if pixmap is None:
+            if image_path not in self.failed:
+                self.request(image_path)
+            return None
+        icon = pixmap.scaled(ICON_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        QPixmapCache.insert(key, icon)
+        return icon
+
+    def _run(self):
+        """后台读取线程"""
+        while True:
+            image_path = self.queue.get()
+            # 先记下是否还在编码：编码完成后才会生成缩略图，读取失败时据此决定等待还是放弃
+            encoding = image_path in image_store.pending
+            try:
+                image = self._load(image_path)
+            except Exception as e:
+                print(f"[缩略图] 读取失败 {image_path}: {e}")
+                image = QImage()
+            self._image_ready.emit(image_path, image, encoding)
+
+    def _load(self, image_path: str) -> QImage:
+        """读取缩略图（后台线程）"""
+        path = thumbnail_store.find(image_path)
+        if path is None:
+            # 刚复制的截图可能还在编码，内存里有解码好的原图
+            recent = image_cache.get(image_path)
+            if recent is not None:
+                return recent.scaled(*THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            path = thumbnail_store.ensure(image_path)
+            if path is None:
+                return QImage()
+        return QImage(str(path))
+
+    def _on_image_ready(self, image_path: str, image: QImage, encoding: bool):
+        """主线程：放入缓存并回调"""
+        if image.isNull() and encoding:
+            # 原图还在编码队列里（最近图片缓存中也已被挤掉），等缩略图生成后再读
+            if thumbnail_store.find(image_path) is not None:
+                self._start_load(image_path)
+            else:
+                self.waiting.add(image_path)
+            return
+        callbacks = self.callbacks.pop(image_path, [])
+        if image.isNull():
+            self.failed.add(image_path)
+            pixmap = QPixmap()
+        else:
+            pixmap = QPixmap.fromImage(image)
+            QPixmapCache.insert("thumbnail:" + image_path, pixmap)
+        for callback in callbacks:
+            callback(pixmap)
+        self.loaded.emit(image_path)
+
+    def _on_generated(self, image_path: str):
+        """主线程：缩略图仓库处理完一张图片，重新读取等待中的路径"""
+        # 之前判定失败的也可能已经有缩略图了（如丢失的图片被再次复制），下次请求时重新读取
+        self.failed.discard(image_path)
+        if image_path in self.waiting:
+            self.waiting.discard(image_path)
+            self._start_load(image_path)
+
+
+# 全局缩略图缓存实例
+thumbnail_cache = ThumbnailCache()
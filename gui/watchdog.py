@@ -0,0 +1,99 @@
+"""
+主线程卡顿监测 - 主线程超过阈值没有响应时把它的调用栈写入日志
+"""
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from PyQt5.QtCore import QObject, pyqtSignal
+from config.settings import config
+
+
+class MainThreadWatchdog(QObject):
+    """主线程卡顿监测
+
+    后台线程每隔 1/4 阈值检查一次：没有未处理的 ping 就发一个新的，
+    主线程处理到 ping 时记下等待时长。ping 等待超过阈值说明主线程被占住，
+    此时记录主线程的调用栈；主线程恢复后再补记卡顿总时长。
+    """
+
+    ping = pyqtSignal()
+
+    def __init__(self, threshold: float = None):
+        super().__init__()
+        self.threshold = config.watchdog_threshold if threshold is None else threshold
+        self.log_path = Path.home() / ".clipboard-polisher" / "watchdog.log"
+        self.main_thread_id = threading.get_ident()
+        self.pending_since: Optional[float] = None  # 未处理的 ping 的发送时间
+        self.last_latency = 0.0  # 最近一次 ping 的等待时长（秒）
+        self.stalls = 0  # 已记录的卡顿次数
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.ping.connect(self._pong)
+
+    def _log(self, message: str):
+        """写入日志"""
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} {message}\n")
+        print(f"[卡顿] {message.splitlines()[0]}")
+
+    def start(self):
+        """开始监测（须在主线程调用）"""
+        if self.threshold <= 0 or self.thread is not None:
+            return
+        self.main_thread_id = threading.get_ident()
+        self.pending_since = None
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """停止监测"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    def _pong(self):
+        """主线程：处理到 ping，记下它等了多久"""
+        if self.pending_since is not None:
+            self.last_latency = time.perf_counter() - self.pending_since
+            self.pending_since = None
+
+    def _main_stack(self) -> str:
+        """主线程当前的调用栈"""
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return ""
+        return "".join(traceback.format_stack(frame))
+
+    def _run(self):
+        """后台线程：定时 ping 并检查主线程是否按时响应"""
+        interval = self.threshold / 4
+        reported = False  # 当前这次卡顿是否已记录调用栈
+        while not self.stop_event.wait(interval):
+            pending = self.pending_since
+            if pending is None:
+                # 上一个 ping 已处理
+                if self.last_latency > self.threshold:
+                    self.stalls += 1
+                    if reported:
+                        self._log(f"主线程恢复，卡顿 {self.last_latency * 1000:.0f}ms")
+                    else:
+                        # 卡顿在两次检查之间就结束了，来不及取调用栈
+                        self._log(f"主线程卡顿 {self.last_latency * 1000:.0f}ms")
+                self.last_latency = 0.0
+                reported = False
+                self.pending_since = time.perf_counter()
+                self.ping.emit()
+            elif not reported and time.perf_counter() - pending > self.threshold:
+                reported = True
+                self._log(f"主线程超过 {self.threshold * 1000:.0f}ms 无响应，调用栈:\n{self._main_stack()}")
+
+
+# 全局实例
+main_thread_watchdog = MainThreadWatchdog()
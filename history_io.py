@@ -0,0 +1,222 @@
+"""
+历史记录导入导出 - 记录写成 JSONL，连同引用的图片打包为一个 zip
+
+导出和导入都是流式的：逐条读写记录，导入按批写入数据库，内存占用与记录数无关。
+用法:
+    python history_io.py export backup.zip [--no-archive]
+    python history_io.py import backup.zip
+"""
+import argparse
+import json
+import shutil
+import sys
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+RECORDS_NAME = "records.jsonl"
+IMAGES_DIR = "images/"
+
+WRITE_CHUNK = 1000  # 导出时每次写入 zip 的行数
+IMPORT_BATCH = 5000  # 导入时每个事务写入的记录数
+PROGRESS_EVERY = 100000  # 每处理这么多条打印一次进度
+
+
+def _image_arcname(image_path: str, store_root: Path) -> str:
+    """图片在 zip 中的路径：保持仓库内的相对路径（按摘要分目录）"""
+    path = Path(image_path)
+    try:
+        return IMAGES_DIR + path.relative_to(store_root).as_posix()
+    except ValueError:
+        return IMAGES_DIR + path.name
+
+
+def _default_db():
+    from database import db
+    return db
+
+
+def _default_store_root() -> Path:
+    from image_store import image_store
+    return image_store.root
+
+
+def export_history(zip_path, db=None, store_root: Path = None, include_archive: bool = True) -> Dict:
+    """导出全部记录和引用的图片，返回统计信息"""
+    db = db or _default_db()
+    store_root = Path(store_root or _default_store_root())
+    start = time.perf_counter()
+    records = 0
+    images = set()
+
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        with zf.open(RECORDS_NAME, "w", force_zip64=True) as stream:
+            lines: List[str] = []
+            for record in db.iter_all_records(include_archive):
+                image = None
+                if record["image_path"]:
+                    image = _image_arcname(record["image_path"], store_root)
+                    images.add((record["image_path"], image))
+                lines.append(json.dumps({
+                    "type": record["content_type"],
+                    "content": record["content"],
+                    "image": image,
+                    "timestamp": record["timestamp"],
+                    "corrected": record["corrected"],
+                    "status": record["correction_status"],
+                    "copy_count": record["copy_count"],
+                }, ensure_ascii=False))
+                records += 1
+                if len(lines) >= WRITE_CHUNK:
+                    stream.write(("\n".join(lines) + "\n").encode("utf-8"))
+                    lines = []
+                if records % PROGRESS_EVERY == 0:
+                    print(f"[导出] {records} 条")
+            if lines:
+                stream.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+        # 图片已经是压缩格式，直接存储
+        written = set()
+        missing = 0
+        for image_path, arcname in sorted(images):
+            if arcname in written:
+                continue
+            if not Path(image_path).is_file():
+                missing += 1
+                continue
+            zf.write(image_path, arcname, compress_type=zipfile.ZIP_STORED)
+            written.add(arcname)
+
+        stats = {
+            "records": records,
+            "images": len(written),
+            "missing_images": missing,
+            "seconds": time.perf_counter() - start,
+        }
+        zf.writestr(MANIFEST_NAME, json.dumps({
+            "version": FORMAT_VERSION,
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+            "records": records,
+            "images": len(written),
+        }, ensure_ascii=False, indent=2))
+    return stats
+
+
+def _extract_image(zf: zipfile.ZipFile, arcname: str, store_root: Path) -> Optional[str]:
+    """把图片放回仓库（已存在则复用），返回本机路径；zip 中没有该图片时返回 None
+
+    arcname 来自备份里的 records.jsonl，不可信：必须是 images/ 下真实存在的成员，
+    且解压目标必须落在仓库目录内（拒绝 ../ 和绝对路径，防止写出或关联仓库外的文件）。
+    """
+    if not isinstance(arcname, str) or not arcname.startswith(IMAGES_DIR):
+        print(f"[导入] 忽略非法图片路径: {arcname!r}")
+        return None
+    try:
+        zf.getinfo(arcname)
+    except KeyError:
+        return None
+    target = store_root / arcname[len(IMAGES_DIR):]
+    if store_root.resolve() not in target.resolve().parents:
+        print(f"[导入] 忽略仓库目录之外的图片路径: {arcname!r}")
+        return None
+    if target.exists():
+        return str(target)
+    source = zf.open(arcname)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with source, open(target, "wb") as f:
+        shutil.copyfileobj(source, f)
+    return str(target)
+
+
+def import_history(zip_path, db=None, store_root: Path = None) -> Dict:
+    """导入备份，内容已存在的记录跳过，返回统计信息"""
+    db = db or _default_db()
+    store_root = Path(store_root or _default_store_root())
+    start = time.perf_counter()
+    records = inserted = skipped_images = 0
+
+    with zipfile.ZipFile(zip_path) as zf:
+        try:
+            manifest = json.loads(zf.read(MANIFEST_NAME))
+        except KeyError:
+            manifest = {"version": FORMAT_VERSION}
+        if manifest.get("version", FORMAT_VERSION) > FORMAT_VERSION:
+            raise ValueError(f"备份格式版本 {manifest['version']} 高于当前支持的 {FORMAT_VERSION}")
+
+        extracted: Dict[str, Optional[str]] = {}
+        batch: List[Dict] = []
+        with zf.open(RECORDS_NAME) as stream:
+            for line in stream:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                image_path = None
+                if item.get("image"):
+                    arcname = item["image"]
+                    if arcname not in extracted:
+                        extracted[arcname] = _extract_image(zf, arcname, store_root)
+                    image_path = extracted[arcname]
+                    if image_path is None:
+                        skipped_images += 1
+                        continue
+                batch.append({
+                    "content_type": item["type"],
+                    "content": item["content"],
+                    "image_path": image_path,
+                    "timestamp": item["timestamp"],
+                    "corrected": item.get("corrected"),
+                    "correction_status": item.get("status"),
+                    "copy_count": item.get("copy_count"),
+                })
+                records += 1
+                if len(batch) >= IMPORT_BATCH:
+                    inserted += db.add_records_bulk(batch)
+                    batch = []
+                if records % PROGRESS_EVERY == 0:
+                    print(f"[导入] {records} 条")
+        if batch:
+            inserted += db.add_records_bulk(batch)
+
+    return {
+        "records": records,
+        "inserted": inserted,
+        "duplicates": records - inserted,
+        "images": sum(1 for path in extracted.values() if path),
+        "missing_images": skipped_images,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="导入/导出剪贴板历史记录")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="导出到 zip 文件")
+    export_parser.add_argument("path", help="备份文件路径")
+    export_parser.add_argument("--no-archive", action="store_true", help="不导出归档库中的记录")
+    import_parser = subparsers.add_parser("import", help="从 zip 文件导入")
+    import_parser.add_argument("path", help="备份文件路径")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        stats = export_history(args.path, include_archive=not args.no_archive)
+        rate = stats["records"] / stats["seconds"] if stats["seconds"] else 0
+        print(f"导出 {stats['records']} 条记录、{stats['images']} 张图片，"
+              f"用时 {stats['seconds']:.1f}s（{rate:.0f} 条/秒）")
+        if stats["missing_images"]:
+            print(f"{stats['missing_images']} 张图片文件已不存在，未导出")
+    else:
+        stats = import_history(args.path)
+        rate = stats["records"] / stats["seconds"] if stats["seconds"] else 0
+        print(f"读取 {stats['records']} 条记录，新增 {stats['inserted']} 条，"
+              f"跳过重复 {stats['duplicates']} 条，用时 {stats['seconds']:.1f}s（{rate:.0f} 条/秒）")
+        if stats["missing_images"]:
+            print(f"{stats['missing_images']} 条图片记录在备份中找不到图片，已跳过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+最近图片缓存 - 监听线程从 DIB 直接生成的 QImage 交给浮窗，不经过磁盘
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional
+from config.settings import config
+
+
+class RecentImageCache:
+    """按图片路径缓存最近几张已解码的图片（LRU，QImage 可跨线程传递）"""
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or config.image_cache_entries
+        self.images: "OrderedDict[str, object]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, image_path: str, image):
+        """放入一张已解码的图片"""
+        with self.lock:
+            self.images[image_path] = image
+            self.images.move_to_end(image_path)
+            while len(self.images) > self.capacity:
+                self.images.popitem(last=False)
+
+    def get(self, image_path: str):
+        """取出图片，不存在返回 None"""
+        with self.lock:
+            image = self.images.get(image_path)
+            if image is not None:
+                self.images.move_to_end(image_path)
+            return image
+
+    def __contains__(self, image_path: str) -> bool:
+        with self.lock:
+            return image_path in self.images
+
+    def discard(self, image_path: Optional[str]):
+        """移除一张图片"""
+        with self.lock:
+            self.images.pop(image_path, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.images.clear()
+
+
+# 全局缓存实例
+image_cache = RecentImageCache()
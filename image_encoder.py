@@ -0,0 +1,146 @@
+"""
+图片编码模块 - 后台编码线程池，支持多种存储格式
+"""
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from PIL import Image
+from config.settings import config
+from dib import decode_dib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 存储格式 -> 文件扩展名
+FORMAT_EXTENSIONS = {
+    "png": ".png",
+    "webp": ".webp",
+    "raw_zstd": ".rawz",
+}
+
+# raw_zstd 文件头: 魔数, 压缩算法(z=zstd, d=deflate), 像素模式, 宽, 高
+RAW_MAGIC = b"CPRZ"
+RAW_HEADER = struct.Struct("<4s1s4sII")
+
+
+def extension_for(image_format: str) -> str:
+    """获取存储格式对应的扩展名"""
+    return FORMAT_EXTENSIONS.get(image_format, ".png")
+
+
+def encode_image(image: Image.Image, path: Path, image_format: str, effort: int):
+    """按指定格式编码并写入文件"""
+    if image_format == "webp":
+        image.save(str(path), "WEBP", lossless=True, method=max(0, min(effort, 6)))
+    elif image_format == "raw_zstd":
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA")
+        raw = image.tobytes()
+        if zstandard is not None:
+            codec = b"z"
+            payload = zstandard.ZstdCompressor(level=max(1, min(effort, 22))).compress(raw)
+        else:
+            # 未安装 zstandard 时退回 deflate
+            codec = b"d"
+            payload = zlib.compress(raw, max(1, min(effort, 9)))
+        with open(path, "wb") as f:
+            f.write(RAW_HEADER.pack(RAW_MAGIC, codec, image.mode.encode("ascii").ljust(4, b"\0"),
+                                    image.width, image.height))
+            f.write(payload)
+    else:
+        image.save(str(path), "PNG", compress_level=max(0, min(effort, 9)))
+
+
+def load_image(path) -> Image.Image:
+    """读取已存储的图片（支持 raw_zstd 格式）"""
+    path = Path(path)
+    if path.suffix != FORMAT_EXTENSIONS["raw_zstd"]:
+        image = Image.open(str(path))
+        image.load()
+        return image
+
+    with open(path, "rb") as f:
+        magic, codec, mode, width, height = RAW_HEADER.unpack(f.read(RAW_HEADER.size))
+        payload = f.read()
+    if magic != RAW_MAGIC:
+        raise ValueError(f"不是有效的 raw 图片文件: {path.name}")
+
+    if codec == b"z":
+        if zstandard is None:
+            raise RuntimeError("读取该图片需要安装 zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    else:
+        raw = zlib.decompress(payload)
+    return Image.frombytes(mode.rstrip(b"\0").decode("ascii"), (width, height), raw)
+
+
+class ImageEncoder:
+    """后台图片编码器 - 有界线程池"""
+
+    def __init__(self, workers: int = None, queue_size: int = None):
+        self.workers = workers or config.encoder_workers
+        self.queue_size = queue_size or config.encoder_queue_size
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # 限制排队 + 执行中的任务数，防止连续截图占满内存
+        self.slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self.lock = threading.Lock()
+        self.log_path = Path.home() / ".clipboard-polisher" / "encoder.log"
+
+    def _log(self, message):
+        """写入日志"""
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().strftime('%H:%M:%S')} {message}\n")
+        print(f"[编码] {message}")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """按需创建线程池"""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="image-encoder"
+                )
+            return self.executor
+
+    def submit(self, source, path: Path) -> Future:
+        """提交一张图片（DIB 数据或已解码的 PIL 图片）编码到 path，队列满时阻塞等待"""
+        self.slots.acquire()
+        try:
+            future = self._get_executor().submit(
+                self._encode, source, Path(path), config.image_format, config.image_effort
+            )
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def _encode(self, source, path: Path, image_format: str, effort: int) -> Optional[str]:
+        """编码任务（工作线程）"""
+        try:
+            image = source if isinstance(source, Image.Image) else decode_dib(source)
+            # 先写临时文件再重命名，读取方不会看到写了一半的文件
+            tmp_path = path.with_name(path.name + ".tmp")
+            encode_image(image, tmp_path, image_format, effort)
+            os.replace(tmp_path, path)
+            return str(path)
+        except Exception as e:
+            self._log(f"编码图片失败 {path.name}: {e}")
+            return None
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池"""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=wait)
+                self.executor = None
+
+
+# 全局编码器实例
+image_encoder = ImageEncoder()
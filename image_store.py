@@ -0,0 +1,199 @@
+"""
+图片存储模块 - 按内容摘要寻址，引用计数 + 后台回收
+"""
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+from config.settings import config
+from image_encoder import image_encoder, extension_for, FORMAT_EXTENSIONS
+from thumbnails import thumbnail_store
+
+
+class ImageStore:
+    """内容寻址的图片仓库
+
+    图片文件名即 DIB 数据的摘要，同一张图片再次复制时直接复用已有文件。
+    引用计数来自 clipboard_records.image_path，没有记录引用的文件由后台线程删除。
+    """
+
+    # 刚写入/复用的文件在该时间内不回收（记录可能还没写入数据库）
+    GRACE_SECONDS = 60
+
+    def __init__(self, root: str = None):
+        if root is None:
+            root = Path.home() / ".clipboard-polisher" / "images"
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.pending = set()  # 正在编码的文件路径
+        self.recent = {}  # 路径 -> 最近一次写入/复用的时间
+        self.gc_queue: "queue.Queue" = queue.Queue()
+        self.gc_thread: Optional[threading.Thread] = None
+        self.log_path = Path.home() / ".clipboard-polisher" / "image_store.log"
+
+    def _log(self, message):
+        """写入日志"""
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().strftime('%H:%M:%S')} {message}\n")
+        print(f"[图片仓库] {message}")
+
+    def path_for(self, digest: str, image_format: str = None) -> Path:
+        """摘要对应的存储路径（按前两位分目录，避免单目录文件过多）"""
+        image_format = image_format or config.image_format
+        return self.root / digest[:2] / f"{digest}{extension_for(image_format)}"
+
+    def find(self, digest: str) -> Optional[Path]:
+        """查找已存储的图片（任意格式）"""
+        for image_format in FORMAT_EXTENSIONS:
+            path = self.path_for(digest, image_format)
+            if path.exists() or str(path) in self.pending:
+                return path
+        return None
+
+    def store(self, digest: str, source) -> str:
+        """保存图片（DIB 数据或 PIL 图片），已存在则直接复用，返回路径"""
+        with self.lock:
+            path = self.find(digest)
+            if path is None:
+                path = self.path_for(digest)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self.pending.add(str(path))
+                reused = False
+            else:
+                reused = True
+            self.recent[str(path)] = time.time()
+
+        if reused:
+            self._log(f"复用已有图片: {path.name}")
+            # 旧版本保存的图片可能还没有缩略图
+            thumbnail_store.schedule(str(path))
+        else:
+            future = image_encoder.submit(source, path)
+            future.add_done_callback(lambda _, key=str(path): self._on_encoded(key))
+        return str(path)
+
+    def reuse(self, path: str) -> bool:
+        """复用一张已有图片（刷新保护期），图片已不可用时返回 False"""
+        with self.lock:
+            if path not in self.pending and not Path(path).exists():
+                return False
+            self.recent[path] = time.time()
+            return True
+
+    def _on_encoded(self, key: str):
+        """编码完成，接着在后台生成缩略图"""
+        with self.lock:
+            self.pending.discard(key)
+            self.recent[key] = time.time()
+        thumbnail_store.schedule(key)
+
+    def _is_protected(self, key: str, now: float) -> bool:
+        """是否在保护期内（正在编码或刚被使用）"""
+        if key in self.pending:
+            return True
+        return now - self.recent.get(key, 0) < self.GRACE_SECONDS
+
+    def release(self, paths: Iterable[Optional[str]]):
+        """记录被删除后调用，把可能失去引用的图片交给后台回收"""
+        paths = [p for p in paths if p]
+        if not paths:
+            return
+        self.gc_queue.put(paths)
+        self._ensure_collector()
+
+    def schedule_sweep(self):
+        """安排一次全量扫描（回收所有未被引用的文件）"""
+        self.gc_queue.put(None)
+        self._ensure_collector()
+
+    def _ensure_collector(self):
+        """按需启动回收线程"""
+        with self.lock:
+            if self.gc_thread is None or not self.gc_thread.is_alive():
+                self.gc_thread = threading.Thread(
+                    target=self._collect_loop, name="image-gc", daemon=True
+                )
+                self.gc_thread.start()
+
+    def _collect_loop(self):
+        """回收线程"""
+        while True:
+            paths = self.gc_queue.get()
+            try:
+                if paths is None:
+                    self.sweep()
+                else:
+                    self.collect(paths)
+            except Exception as e:
+                self._log(f"回收失败: {e}")
+
+    def _is_in_store(self, path: Path) -> bool:
+        """只回收仓库目录下的文件"""
+        try:
+            path.resolve().relative_to(self.root.resolve())
+            return True
+        except ValueError:
+            return False
+
+    def collect(self, paths: Iterable[str]) -> int:
+        """删除引用计数为 0 的图片，返回释放的字节数"""
+        from database import db
+
+        now = time.time()
+        removed = freed = 0
+        for key in set(paths):
+            path = Path(key)
+            with self.lock:
+                if self._is_protected(key, now):
+                    continue
+            if not self._is_in_store(path) or db.count_image_refs(key) > 0:
+                continue
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                removed += 1
+                freed += size
+                thumbnail_store.discard(key)
+            except FileNotFoundError:
+                pass
+        if removed:
+            self._log(f"回收 {removed} 张未被引用的图片")
+        return freed
+
+    def sweep(self):
+        """全量扫描，删除所有未被引用且过了保护期的文件"""
+        from database import db
+
+        referenced = db.get_image_paths()
+        now = time.time()
+        removed = 0
+        for path in self.root.rglob("*"):
+            if not path.is_file():
+                continue
+            key = str(path)
+            if key in referenced:
+                continue
+            with self.lock:
+                if self._is_protected(key, now):
+                    continue
+            try:
+                if now - path.stat().st_mtime < self.GRACE_SECONDS:
+                    continue
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+        # 清理过期的保护记录
+        with self.lock:
+            self.recent = {k: t for k, t in self.recent.items() if now - t < self.GRACE_SECONDS}
+            kept = set(referenced) | set(self.recent) | self.pending
+        thumbnails = thumbnail_store.sweep(kept)
+        self._log(f"全量扫描完成，回收 {removed} 个文件、{thumbnails} 张缩略图")
+
+
+# 全局图片仓库实例
+image_store = ImageStore()
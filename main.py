@@ -16,6 +16,8 @@ from config.settings import config
 from clipboard_watcher import ClipboardWatcher
 from gui import MainWindow, SystemTray
 from global_hotkey import global_hotkey
+from image_store import image_store
+from similarity_index import similarity_index
 import database
 
 
@@ -47,6 +49,7 @@ class ClipboardPolisherApp:
 
         # 创建剪贴板监听器
         self.clipboard_watcher = ClipboardWatcher(self._on_clipboard_change)
+        self.main_window.set_clipboard_watcher(self.clipboard_watcher)
 
         # 设置热键管理器的主窗口引用
         global_hotkey.set_main_window(self.main_window)
@@ -91,7 +94,7 @@ class ClipboardPolisherApp:
         dialog.exec_()
 
     def _on_clipboard_change(self, content_type: str, content: str, image_path: str = None):
-        """剪贴板内容变化回调"""
+        """剪贴板内容变化回调，返回记录 ID（忽略时返回 None）"""
         log_path = Path.home() / ".clipboard-polisher" / "main.log"
         with open(log_path, 'a', encoding='utf-8') as f:
             f.write(f"\n[DEBUG] _on_clipboard_change called: type={content_type}, len={len(content) if content else 0}\n")
@@ -99,7 +102,7 @@ class ClipboardPolisherApp:
         if not content or len(content) < 2:
             with open(log_path, 'a', encoding='utf-8') as f:
                 f.write(f"[DEBUG] Content too short or empty, returning\n")
-            return  # 忽略太短的内容
+            return None  # 忽略太短的内容
 
         print(f"[DEBUG] 剪贴板变化: 类型={content_type}, 内容长度={len(content)}")
 
@@ -108,12 +111,16 @@ class ClipboardPolisherApp:
         print(f"[DEBUG] 调用主窗口刷新, record_id={record_id}")
         with open(log_path, 'a', encoding='utf-8') as f:
             f.write(f"[DEBUG] Record saved with id={record_id}\n")
+        if content_type == "text":
+            similarity_index.add(record_id, content)
 
         # 通知主窗口
         self.main_window.add_new_record(record_id)
         with open(log_path, 'a', encoding='utf-8') as f:
             f.write(f"[DEBUG] add_new_record called\n")
 
+        return record_id
+
         # 注释掉托盘提示，避免频繁打扰
         # # 显示托盘提示
         # if content_type == "text":
@@ -127,6 +134,26 @@ class ClipboardPolisherApp:
         # 启动剪贴板监听
         self.clipboard_watcher.start()
 
+        # 回收旧版本遗留的、未被任何记录引用的图片
+        image_store.schedule_sweep()
+
+        # 删除和归档的记录从相似记录结果中去掉（在归档开始前注册）
+        database.db.add_remove_listener(similarity_index.remove)
+
+        # 把超龄记录移入归档库
+        database.db.schedule_archive()
+
+        # 打开相似记录索引（没有时在后台重建）
+        similarity_index.schedule_load()
+
+        # 后台管理磁盘占用（配额、日志轮转、数据库空间回收）
+        from storage_manager import storage_manager
+        storage_manager.start()
+
+        # 监测界面主线程卡顿
+        from gui.watchdog import main_thread_watchdog
+        main_thread_watchdog.start()
+
         # 启动全局热键
         global_hotkey.start()
 
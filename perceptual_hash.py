@@ -0,0 +1,77 @@
+"""
+感知哈希模块 - 近似重复截图检测
+
+对缩小后的灰度图做 dHash（相邻像素比较），同一窗口隔一秒再截、光标闪烁、
+时钟跳动这类差异只会改变少数几位，用汉明距离即可判断是否“几乎相同”。
+"""
+import threading
+from typing import Optional, Tuple
+import numpy as np
+from PIL import Image
+
+# 哈希边长：16x16 = 256 位，比常见的 64 位更能区分布局相似但内容不同的窗口
+HASH_SIZE = 16
+HASH_WORDS = HASH_SIZE * HASH_SIZE // 64
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        """按行统计置位数"""
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+else:
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        """按行统计置位数（numpy < 2.0）"""
+        return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int32)
+
+
+def dhash(image: Image.Image) -> np.ndarray:
+    """计算 256 位 dHash，返回 HASH_WORDS 个 uint64"""
+    # 先在原色彩模式下缩小（reducing_gap 走快速整数缩放），再转灰度
+    small = image.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR, reducing_gap=2.0)
+    gray = np.asarray(small.convert("L"), dtype=np.int16)
+    bits = gray[:, 1:] > gray[:, :-1]
+    return np.packbits(bits.ravel()).view(">u8").astype(np.uint64)
+
+
+class RecentHashIndex:
+    """最近图片的感知哈希索引（环形缓冲，向量化汉明距离查询）"""
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self.hashes = np.zeros((capacity, HASH_WORDS), dtype=np.uint64)
+        self.sizes = np.zeros((capacity, 2), dtype=np.int32)
+        self.keys = [None] * capacity
+        self.count = 0
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    def add(self, image_hash: np.ndarray, size: Tuple[int, int], key: str):
+        """加入一张图片，满了覆盖最旧的"""
+        with self.lock:
+            slot = self.next_slot
+            self.hashes[slot] = image_hash
+            self.sizes[slot] = size
+            self.keys[slot] = key
+            self.next_slot = (slot + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def find(self, image_hash: np.ndarray, size: Tuple[int, int], max_distance: int) -> Optional[Tuple[str, int]]:
+        """查找尺寸相同且汉明距离 <= max_distance 的最近图片，返回 (key, 距离)"""
+        with self.lock:
+            if self.count == 0:
+                return None
+            hashes = self.hashes[:self.count]
+            distances = _popcount(hashes ^ image_hash)
+            # 只和尺寸完全相同的截图比较
+            same_size = (self.sizes[:self.count] == size).all(axis=1)
+            distances = np.where(same_size, distances, HASH_WORDS * 64 + 1)
+            best = int(np.argmin(distances))
+            if distances[best] > max_distance:
+                return None
+            return self.keys[best], int(distances[best])
+
+    def clear(self):
+        """清空索引"""
+        with self.lock:
+            self.count = 0
+            self.next_slot = 0
+            self.keys = [None] * self.capacity
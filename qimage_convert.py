@@ -0,0 +1,33 @@
+"""
+QImage 转换 - PIL 图片 / 剪贴板 DIB 转 QImage
+
+只用到 QImage，不创建任何 QObject，监听线程等非 GUI 线程可以直接导入调用。
+"""
+from PyQt5.QtGui import QImage
+
+
+def pil_to_qimage(image) -> QImage:
+    """PIL 图片转 QImage（深拷贝，不依赖原缓冲区）"""
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    data = image.tobytes("raw", "BGRA")
+    qimage = QImage(data, image.width, image.height, image.width * 4, QImage.Format_ARGB32)
+    return qimage.copy()
+
+
+def dib_to_qimage(dib_data) -> QImage:
+    """剪贴板 DIB 直接转 QImage（可在非 GUI 线程调用）
+
+    最常见的 32 位 BGRX 截图与 QImage.Format_RGB32 内存布局一致，只需一次拷贝 + 翻转；
+    其他位深 / 带 alpha 的图片走 PIL 解码。
+    """
+    from dib import decode_dib, parse_dib_header, BI_RGB
+
+    info = parse_dib_header(dib_data)
+    if info.bit_count == 32 and info.compression == BI_RGB and not info.has_alpha:
+        size = info.stride * info.height
+        pixels = bytes(memoryview(dib_data)[info.pixel_offset:info.pixel_offset + size])
+        image = QImage(pixels, info.width, info.height, info.stride, QImage.Format_RGB32)
+        # 自下而上存储的 DIB 需要上下翻转，翻转同时完成深拷贝
+        return image.copy() if info.top_down else image.mirrored()
+    return pil_to_qimage(decode_dib(dib_data))
@@ -0,0 +1,407 @@
+"""
+相似记录索引 - 字符 n-gram 哈希 TF-IDF 向量，余弦相似度找“改写过的同一段文字”
+
+全文检索只能找到包含相同词的记录，改过措辞、调整过语序的段落找不到。
+这里把每条文本切成 2/3 字符 n-gram，哈希到固定维度，按 TF-IDF 加权并归一化。
+
+存储为按 n-gram 分列的稀疏矩阵（CSC：indptr / 行号 / 权重三个数组），
+保存在 ~/.clipboard-polisher/similarity/，以内存映射方式打开，启动时不读入内存。
+查询时只读取查询向量中权重最高的若干列，用 bincount 累加得分。
+新记录先放在内存中的增量段里，积累到一定数量后在后台重建整个索引（顺带更新 IDF）。
+删除或归档的记录记为删除标记，重建前查询时跳过。
+"""
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+FORMAT_VERSION = 1
+DIM_BITS = 20
+DIM = 1 << DIM_BITS  # 哈希后的特征维度
+NGRAM_SIZES = (2, 3)
+MAX_CHARS = 8000  # 只索引每条记录的前这么多字
+MAX_DOC_TERMS = 256  # 每条记录保留权重最高的特征数
+QUERY_TERMS = 256  # 查询时使用的特征数
+MIN_SCORE = 0.1  # 相似度低于该值的结果不返回
+MIN_REBUILD_DELTA = 2000  # 增量段超过该条数（且超过索引的 10%）时后台重建
+
+_PRIME = np.uint64(1099511628211)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+
+def ngram_hashes(text: str) -> np.ndarray:
+    """文本的 n-gram 哈希桶号（含重复）"""
+    text = " ".join(text.lower().split())[:MAX_CHARS]
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    parts = []
+    with np.errstate(over="ignore"):
+        for n in NGRAM_SIZES:
+            count = len(codes) - n + 1
+            if count <= 0:
+                continue
+            h = np.full(count, n, dtype=np.uint64)
+            for i in range(n):
+                h = h * _PRIME + codes[i:i + count]
+            parts.append(h)
+        if not parts:
+            return np.zeros(0, dtype=np.int32)
+        h = np.concatenate(parts)
+        h ^= h >> np.uint64(31)
+        h *= _MIX
+        h ^= h >> np.uint64(29)
+    return (h & np.uint64(DIM - 1)).astype(np.int32)
+
+
+def term_counts(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """文本的特征（升序、去重）及各自出现次数"""
+    terms, counts = np.unique(ngram_hashes(text), return_counts=True)
+    return terms.astype(np.int32), counts.astype(np.float32)
+
+
+def make_idf(df: np.ndarray, docs: int) -> np.ndarray:
+    """平滑 IDF"""
+    return (np.log((1.0 + docs) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+def weigh(terms: np.ndarray, counts: np.ndarray, idf: np.ndarray,
+          limit: int = MAX_DOC_TERMS) -> Tuple[np.ndarray, np.ndarray]:
+    """TF-IDF 加权，只保留权重最高的 limit 个特征并做 L2 归一化（特征按升序返回）"""
+    weights = (1.0 + np.log(counts)) * idf[terms]
+    if len(terms) > limit:
+        keep = np.sort(np.argpartition(weights, -limit)[-limit:])
+        terms, weights = terms[keep], weights[keep]
+    norm = float(np.sqrt(np.dot(weights, weights)))
+    if norm > 0:
+        weights = weights / norm
+    return terms, weights.astype(np.float32)
+
+
+def _open(path: Path) -> np.ndarray:
+    """以内存映射方式打开数组（旧版 numpy 不能映射空数组，直接读入）"""
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        return np.load(path)
+
+
+class SimilarityIndex:
+    """相似记录索引（主段 + 增量段）"""
+
+    def __init__(self, root: Path = None):
+        if root is None:
+            root = Path.home() / ".clipboard-polisher" / "similarity"
+        self.root = Path(root)
+        self.lock = threading.Lock()
+        # 主段（内存映射）
+        self.generation = 0
+        self.record_ids = np.zeros(0, dtype=np.int64)  # 行号 -> 记录 ID
+        self.indptr = np.zeros(DIM + 1, dtype=np.int64)  # 第 t 列的数据在 [indptr[t], indptr[t+1])
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float16)
+        self.idf = make_idf(np.zeros(DIM, dtype=np.float32), 0)
+        self.last_id = 0  # 主段包含的最大记录 ID
+        # 增量段：主段之后新增的记录
+        self.delta_ids: List[int] = []
+        self.delta_terms: List[np.ndarray] = []
+        self.delta_weights: List[np.ndarray] = []
+        self.delta_cache: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        # 删除标记：已删除或移入归档、但还留在主段或增量段中的记录 ID
+        self.removed: Set[int] = set()
+        self.pending: "queue.Queue" = queue.Queue()  # 等待向量化的 (记录 ID, 文本)
+        self.worker: Optional[threading.Thread] = None
+        self.building = False
+        self.loaded = False
+
+    # ---------- 写入 ----------
+
+    def add(self, record_id: int, text: str):
+        """新文本记录入库后调用（在后台线程向量化）"""
+        with self.lock:
+            # 从归档库移回主表的记录沿用原来的 ID，向量仍在索引中
+            self.removed.discard(record_id)
+        self.pending.put((record_id, text))
+        self._ensure_worker()
+
+    def remove(self, record_ids: List[int]):
+        """记录被删除或移入归档后调用（database.db.add_remove_listener），重建前查询时跳过它们"""
+        with self.lock:
+            self.removed.update(record_ids)
+
+    def _ensure_worker(self):
+        """按需启动后台线程（首次启动时先加载或重建索引）"""
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._work_loop, name="similarity", daemon=True)
+                self.worker.start()
+
+    def _work_loop(self):
+        """后台线程：加载索引，然后依次把新记录加入增量段"""
+        from storage_manager import lower_thread_priority
+        lower_thread_priority()
+        if not self.loaded:
+            self.load()
+        while True:
+            record_id, text = self.pending.get()
+            try:
+                self._add_to_delta(record_id, text)
+                if self._needs_rebuild():
+                    self.build()
+            except Exception as e:
+                print(f"[相似索引] 添加记录 {record_id} 失败: {e}")
+
+    def _add_to_delta(self, record_id: int, text: str):
+        """向量化一条记录放入增量段（再次复制的旧记录已在索引中，跳过）"""
+        with self.lock:
+            if record_id <= self.last_id or (self.delta_ids and record_id <= self.delta_ids[-1]):
+                return
+            idf = self.idf
+        terms, weights = weigh(*term_counts(text), idf)
+        if len(terms) == 0:
+            return
+        with self.lock:
+            self.delta_ids.append(record_id)
+            self.delta_terms.append(terms)
+            self.delta_weights.append(weights)
+            self.delta_cache = None
+
+    def _needs_rebuild(self) -> bool:
+        """增量段或删除标记过多时重建（增量段查询是逐项扫描，删除标记让查询多取候选，且 IDF 只在重建时更新）"""
+        with self.lock:
+            changes = len(self.delta_ids) + len(self.removed)
+            return changes >= max(MIN_REBUILD_DELTA, len(self.record_ids) // 10)
+
+    # ---------- 构建与加载 ----------
+
+    def _path(self, generation: int, name: str) -> Path:
+        return self.root / f"{generation}.{name}.npy"
+
+    def load(self):
+        """打开已保存的主段，并把之后新增的记录补进增量段；索引不存在或已过期时重建"""
+        from database import db
+
+        self.loaded = True
+        meta_path = self.root / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("version") != FORMAT_VERSION or meta.get("dim") != DIM:
+                raise ValueError("索引格式已变化")
+            generation = meta["generation"]
+            arrays = {
+                name: _open(self._path(generation, name))
+                for name in ("record_ids", "indptr", "rows", "weights", "df")
+            }
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[相似索引] 没有可用的索引（{e}），开始重建")
+            self.build()
+            return
+
+        with self.lock:
+            self._install(generation, arrays, meta["last_id"], meta["docs"])
+        self._remove_stale_files()
+        caught_up = 0
+        for record_id, text in db.iter_texts(self.last_id):
+            self._add_to_delta(record_id, text)
+            caught_up += 1
+        print(f"[相似索引] 已加载 {len(self.record_ids)} 条，补充 {caught_up} 条新记录")
+        if self._needs_rebuild():
+            self.build()
+
+    def _install(self, generation: int, arrays: Dict[str, np.ndarray], last_id: int, docs: int):
+        """换上新的主段（调用方持有锁）"""
+        self.generation = generation
+        self.record_ids = arrays["record_ids"]
+        self.indptr = arrays["indptr"]
+        self.rows = arrays["rows"]
+        self.weights = arrays["weights"]
+        self.idf = make_idf(np.asarray(arrays["df"], dtype=np.float32), docs)
+        self.last_id = last_id
+        # 主段已包含的增量记录
+        keep = [i for i, record_id in enumerate(self.delta_ids) if record_id > last_id]
+        self.delta_ids = [self.delta_ids[i] for i in keep]
+        self.delta_terms = [self.delta_terms[i] for i in keep]
+        self.delta_weights = [self.delta_weights[i] for i in keep]
+        self.delta_cache = None
+        # 只保留仍在新主段或增量段中的删除标记
+        if self.removed:
+            removed = np.fromiter(self.removed, dtype=np.int64, count=len(self.removed))
+            kept = set(removed[np.isin(removed, self.record_ids)].tolist())
+            kept.update(record_id for record_id in self.delta_ids if record_id in self.removed)
+            self.removed = kept
+
+    def build(self):
+        """从数据库重建主段，写入新一代文件后替换
+
+        两遍读取：第一遍统计文档频率和特征总数，第二遍加权后写入预先分配的数组，
+        再按列排序直接写进内存映射文件，峰值内存约为每个特征 16 字节。
+        """
+        from database import db
+
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        try:
+            start = time.perf_counter()
+            df = np.zeros(DIM, dtype=np.int32)
+            docs = total = last_id = 0
+            for record_id, text in db.iter_texts():
+                terms = np.unique(ngram_hashes(text))
+                if len(terms) == 0:
+                    continue
+                df[terms] += 1
+                docs += 1
+                total += min(len(terms), MAX_DOC_TERMS)
+                last_id = record_id
+
+            # 第二遍只读第一遍见过的范围；两遍之间被删除的记录留下的空位截掉
+            idf = make_idf(df.astype(np.float32), docs)
+            record_ids = np.zeros(docs, dtype=np.int64)
+            doc_starts = np.zeros(docs + 1, dtype=np.int64)
+            columns = np.zeros(total, dtype=np.int32)
+            weights = np.zeros(total, dtype=np.float16)
+            row = filled = 0
+            for record_id, text in db.iter_texts(0, last_id):
+                terms, doc_weights = weigh(*term_counts(text), idf)
+                if len(terms) == 0 or row == docs:
+                    continue
+                end = filled + len(terms)
+                columns[filled:end] = terms
+                weights[filled:end] = doc_weights
+                record_ids[row] = record_id
+                doc_starts[row] = filled
+                row += 1
+                filled = end
+            doc_starts[row] = filled
+            record_ids, doc_starts = record_ids[:row], doc_starts[:row + 1]
+            columns, weights = columns[:filled], weights[:filled]
+
+            # 新一代写到新文件名，正在被映射的旧文件之后再删
+            generation = self.generation + 1
+            self.root.mkdir(parents=True, exist_ok=True)
+            # 按列稳定排序（同一列内按行号升序）
+            order = np.argsort(columns, kind="stable")
+            indptr = np.zeros(DIM + 1, dtype=np.int64)
+            np.cumsum(np.bincount(columns, minlength=DIM), out=indptr[1:])
+            del columns
+            sorted_weights = np.lib.format.open_memmap(
+                self._path(generation, "weights"), mode="w+", dtype=np.float16, shape=(filled,))
+            np.take(weights, order, out=sorted_weights)
+            sorted_weights.flush()
+            del weights, sorted_weights
+            # 行号由数据下标反查所属文档得到，分块计算避免大的临时数组
+            rows = np.lib.format.open_memmap(
+                self._path(generation, "rows"), mode="w+", dtype=np.int32, shape=(filled,))
+            for chunk in range(0, filled, 1 << 20):
+                part = order[chunk:chunk + (1 << 20)]
+                rows[chunk:chunk + len(part)] = np.searchsorted(doc_starts, part, side="right") - 1
+            rows.flush()
+            del rows, order
+            np.save(self._path(generation, "indptr"), indptr)
+            np.save(self._path(generation, "record_ids"), record_ids)
+            np.save(self._path(generation, "df"), df)
+
+            last_id = int(record_ids[-1]) if row else 0
+            meta = {"version": FORMAT_VERSION, "dim": DIM, "generation": generation,
+                    "docs": row, "last_id": last_id}
+            meta_path = self.root / "meta.json"
+            tmp_path = meta_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+            tmp_path.replace(meta_path)
+
+            mapped = {
+                name: _open(self._path(generation, name))
+                for name in ("record_ids", "indptr", "rows", "weights", "df")
+            }
+            with self.lock:
+                self._install(generation, mapped, last_id, row)
+            self._remove_stale_files()
+            print(f"[相似索引] 重建完成: {row} 条，{filled} 个特征，"
+                  f"用时 {time.perf_counter() - start:.1f}s")
+        finally:
+            with self.lock:
+                self.building = False
+
+    def _remove_stale_files(self):
+        """删除旧一代的文件（Windows 上仍被映射的文件删不掉，下次再删）"""
+        for path in self.root.glob("*.npy"):
+            if not path.name.startswith(f"{self.generation}."):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def schedule_load(self):
+        """在后台加载（或重建）索引"""
+        self._ensure_worker()
+
+    # ---------- 查询 ----------
+
+    def _delta_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """增量段拼成 (行号, 特征, 权重) 三个数组（调用方持有锁）"""
+        if self.delta_cache is None:
+            if self.delta_ids:
+                self.delta_cache = (
+                    np.repeat(np.arange(len(self.delta_ids), dtype=np.int32),
+                              [len(terms) for terms in self.delta_terms]),
+                    np.concatenate(self.delta_terms),
+                    np.concatenate(self.delta_weights),
+                )
+            else:
+                empty = np.zeros(0, dtype=np.int32)
+                self.delta_cache = (empty, empty, np.zeros(0, dtype=np.float32))
+        return self.delta_cache
+
+    def similar(self, text: str, k: int = 20, exclude_id: int = None) -> List[Tuple[int, float]]:
+        """与 text 最相似的 k 条记录，返回 [(记录 ID, 余弦相似度)]，按相似度降序"""
+        with self.lock:
+            record_ids, indptr, rows, weights = self.record_ids, self.indptr, self.rows, self.weights
+            idf = self.idf
+            delta_ids = list(self.delta_ids)
+            delta_rows, delta_terms, delta_weights = self._delta_arrays()
+            removed = set(self.removed)
+
+        terms, query = weigh(*term_counts(text), idf, limit=QUERY_TERMS)
+        if len(terms) == 0:
+            return []
+
+        candidates: List[Tuple[np.ndarray, np.ndarray]] = []
+        # 主段：只读取查询特征所在的列
+        if len(record_ids):
+            starts, ends = indptr[terms], indptr[terms + 1]
+            lengths = ends - starts
+            hit = lengths > 0
+            if hit.any():
+                starts, lengths, column_weights = starts[hit], lengths[hit], query[hit]
+                # 拼出所有命中列的数据下标，一次取出
+                offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                contributions = weights[offsets].astype(np.float32) * np.repeat(column_weights, lengths)
+                scores = np.bincount(rows[offsets], weights=contributions, minlength=len(record_ids))
+                candidates.append((record_ids, scores))
+
+        # 增量段：查询向量展开成稠密数组后逐项相乘
+        if delta_ids:
+            dense = np.zeros(DIM, dtype=np.float32)
+            dense[terms] = query
+            scores = np.bincount(delta_rows, weights=dense[delta_terms] * delta_weights,
+                                 minlength=len(delta_ids))
+            candidates.append((np.array(delta_ids, dtype=np.int64), scores))
+
+        results: List[Tuple[int, float]] = []
+        for ids, scores in candidates:
+            if exclude_id is not None:
+                scores = np.where(ids == exclude_id, 0.0, scores)
+            # 多取与删除标记同样多的候选，跳过已删除的记录后仍能凑满 k 条
+            count = min(k + len(removed), len(scores))
+            top = np.argpartition(scores, -count)[-count:]
+            top = top[np.argsort(scores[top])[::-1]]
+            hits = [(int(ids[i]), float(scores[i])) for i in top if scores[i] >= MIN_SCORE]
+            results.extend([hit for hit in hits if hit[0] not in removed][:k])
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:k]
+
+
+# 全局相似度索引实例
+similarity_index = SimilarityIndex()
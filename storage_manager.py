@@ -0,0 +1,275 @@
+"""
+存储管理 - 磁盘配额、日志轮转与数据库空间回收
+
+后台低优先级线程定期检查 ~/.clipboard-polisher 的占用：
+  - 日志超过 log_max_size 时轮转，只保留 log_backups 份旧日志
+  - 总占用超过 disk_budget_mb 时，从最旧的记录开始删除（先归档库、再主表），
+    连同不再被引用的图片
+  - 删除记录后空出的数据库页分小批归还给文件系统（incremental vacuum）
+用法: python storage_manager.py [--run]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from config.settings import config
+
+DATA_DIR = Path.home() / ".clipboard-polisher"
+CATEGORIES = ("images", "thumbnails", "database", "archive", "logs", "other")
+CATEGORY_NAMES = {
+    "images": "图片", "thumbnails": "缩略图", "database": "数据库", "archive": "归档库", "logs": "日志", "other": "其他"
+}
+
+STARTUP_DELAY = 30  # 启动后等待多久再做第一次检查（秒），避开启动时的读写高峰
+EVICT_BATCH = 500  # 超出配额时每批删除的记录数
+EVICT_SLACK = 0.05  # 超出配额时多释放的比例，避免刚清理完又超出
+KEEP_RECENT = 100  # 配额再紧也保留的最近记录数
+STEP_PAUSE = 0.05  # 两批删除/回收之间让出的时间（秒）
+# 超过该大小的旧库不自动转换为增量回收（转换需要整库 VACUUM，期间记录写入会被阻塞）
+VACUUM_CONVERT_LIMIT = 256 * 1024 * 1024
+
+
+def lower_thread_priority():
+    """降低当前线程的调度优先级"""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), -2)  # THREAD_PRIORITY_LOWEST
+        elif sys.platform.startswith("linux"):
+            # Linux 上 nice 值按线程生效
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (OSError, AttributeError):
+        pass
+
+
+def format_size(size: int) -> str:
+    """字节数转为便于阅读的字符串"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+
+class StorageManager:
+    """~/.clipboard-polisher 的磁盘配额管理"""
+
+    def __init__(self, root: Path = None):
+        self.root = Path(root or DATA_DIR)
+        self.log_path = self.root / "storage.log"
+        self.lock = threading.Lock()  # 同一时间只做一次检查
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.incremental_checked = False
+
+    def _log(self, message: str):
+        """写入日志"""
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {message}\n")
+        print(f"[存储] {message}")
+
+    def _category(self, path: Path) -> str:
+        """文件所属的统计类别"""
+        from database import db
+        from image_store import image_store
+        from thumbnails import thumbnail_store
+
+        name = path.name
+        if name.startswith(db.archive_path.name):
+            return "archive"
+        if name.startswith(db.db_path.name):
+            return "database"
+        if name.endswith(".log") or ".log." in name:
+            return "logs"
+        for category, root in (("images", image_store.root), ("thumbnails", thumbnail_store.root)):
+            try:
+                path.relative_to(root)
+                return category
+            except ValueError:
+                pass
+        return "other"
+
+    def usage(self) -> Dict[str, int]:
+        """各类别当前占用的字节数（含 total）"""
+        result = {category: 0 for category in CATEGORIES}
+        for path in self.root.rglob("*"):
+            try:
+                if path.is_file():
+                    result[self._category(path)] += path.stat().st_size
+            except OSError:
+                # 统计期间被删除
+                pass
+        result["total"] = sum(result[category] for category in CATEGORIES)
+        return result
+
+    def report(self, usage: Dict[str, int] = None) -> str:
+        """占用报告（一行）"""
+        usage = usage or self.usage()
+        parts = [f"{CATEGORY_NAMES[c]} {format_size(usage[c])}" for c in CATEGORIES if usage[c]]
+        text = f"共 {format_size(usage['total'])}"
+        if config.disk_budget_mb > 0:
+            text += f" / 配额 {config.disk_budget_mb} MB"
+        return text + "（" + "，".join(parts) + "）"
+
+    def rotate_logs(self) -> int:
+        """轮转超过大小的日志，返回轮转的文件数"""
+        rotated = 0
+        for path in self.root.glob("*.log"):
+            try:
+                if path.stat().st_size <= config.log_max_size:
+                    continue
+                # name.log.N 依次后移，最旧的一份被覆盖
+                for index in range(config.log_backups, 0, -1):
+                    older = path.with_name(f"{path.name}.{index}")
+                    if index == config.log_backups:
+                        older.unlink(missing_ok=True)
+                    elif older.exists():
+                        older.replace(path.with_name(f"{path.name}.{index + 1}"))
+                if config.log_backups > 0:
+                    path.replace(path.with_name(f"{path.name}.1"))
+                else:
+                    path.unlink()
+                rotated += 1
+            except OSError:
+                # Windows 上文件正被写入时无法改名，下次再试
+                continue
+        # 调小 log_backups 后多出来的旧日志
+        for path in self.root.glob("*.log.*"):
+            suffix = path.name.rsplit(".", 1)[-1]
+            if suffix.isdigit() and int(suffix) > config.log_backups:
+                path.unlink(missing_ok=True)
+        return rotated
+
+    def _database_bytes(self) -> int:
+        """数据库和归档库文件（含 WAL）的总大小"""
+        from database import db
+
+        total = 0
+        for path in (db.db_path, db.archive_path):
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    total += path.with_name(path.name + suffix).stat().st_size
+                except OSError:
+                    pass
+        return total
+
+    def enforce_budget(self, usage: Dict[str, int]) -> int:
+        """总占用超出配额时删除最旧的记录和图片，返回删除的记录数
+
+        每批删除后立即回收数据库空间并按文件的实际缩小量计数（全文索引等附带的
+        空间无法从行本身估计）；库未启用增量回收时退回按行大小估计。
+        """
+        from database import db
+        from image_store import image_store
+
+        budget = config.disk_budget_mb * 1024 * 1024
+        if budget <= 0 or usage["total"] <= budget:
+            return 0
+
+        # 已删除但尚未归还的数据库空闲页，回收后自然会释放
+        target = usage["total"] - budget * (1 - EVICT_SLACK) - db.freelist_bytes()
+        deleted = freed = 0
+        while freed < target and not self.stop_event.is_set():
+            before = self._database_bytes()
+            count, row_bytes, images = db.evict_oldest(EVICT_BATCH, keep=KEEP_RECENT)
+            if count == 0:
+                break
+            deleted += count
+            image_bytes = image_store.collect(images)
+            self.reclaim_database_space()
+            freed += max(row_bytes, before - self._database_bytes()) + image_bytes
+            time.sleep(STEP_PAUSE)
+        if deleted:
+            self._log(f"超出配额，删除最旧的 {deleted} 条记录，约释放 {format_size(freed)}")
+        return deleted
+
+    def ensure_incremental_vacuum(self):
+        """旧库启用增量回收（每次启动只检查一次）"""
+        from database import db
+
+        if self.incremental_checked:
+            return
+        self.incremental_checked = True
+        converted = db.enable_incremental_vacuum(VACUUM_CONVERT_LIMIT)
+        if converted:
+            # VACUUM 在 WAL 模式下把整个库写进 WAL，截断后才真正变小
+            db.checkpoint()
+            self._log(f"已为 {', '.join(converted)} 启用增量回收")
+
+    def reclaim_database_space(self) -> int:
+        """合并全文索引段，再把数据库空闲页分批归还给文件系统，返回释放的页数"""
+        from database import db
+
+        while not self.stop_event.is_set() and db.fts_merge_step():
+            time.sleep(STEP_PAUSE)
+        total = 0
+        while not self.stop_event.is_set():
+            pages = db.vacuum_step()
+            if pages == 0:
+                break
+            total += pages
+            time.sleep(STEP_PAUSE)
+        # 截断 WAL，释放的页才真正从磁盘上消失
+        db.checkpoint()
+        return total
+
+    def run_once(self) -> Dict[str, int]:
+        """做一次完整的检查，返回检查后的占用"""
+        with self.lock:
+            self.rotate_logs()
+            self.ensure_incremental_vacuum()
+            self.enforce_budget(self.usage())
+            self.reclaim_database_space()
+            usage = self.usage()
+            self._log(self.report(usage))
+            return usage
+
+    def start(self):
+        """启动后台检查线程"""
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="storage", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """停止后台检查"""
+        self.stop_event.set()
+        self.thread = None
+
+    def _run(self):
+        """后台线程：低优先级定期检查"""
+        lower_thread_priority()
+        if self.stop_event.wait(STARTUP_DELAY):
+            return
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                self._log(f"检查失败: {e}")
+            if self.stop_event.wait(config.storage_check_interval):
+                return
+
+
+# 全局存储管理实例
+storage_manager = StorageManager()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="查看/整理剪贴板工具的磁盘占用")
+    parser.add_argument("--run", action="store_true", help="立即执行一次日志轮转、配额清理和空间回收")
+    args = parser.parse_args(argv)
+    if args.run:
+        storage_manager.run_once()
+    else:
+        print(storage_manager.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
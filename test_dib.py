@@ -0,0 +1,164 @@
+"""
+测试脚本 - 验证 DIB 解码（各种头部、位深、方向、调色板、alpha）
+用法: python test_dib.py  或  python -m pytest test_dib.py
+"""
+import sys
+import struct
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from dib import decode_dib, parse_dib_header, BI_RGB, BI_BITFIELDS
+
+# 2x2 测试图案（自上而下）: 红 绿 / 蓝 白
+PATTERN = [
+    [(255, 0, 0), (0, 255, 0)],
+    [(0, 0, 255), (255, 255, 255)],
+]
+
+
+def info_header(width, height, bit_count, compression=BI_RGB, colors_used=0, size=40):
+    """构造 BITMAPINFOHEADER，size > 40 时补齐到 V4 / V5 长度"""
+    header = struct.pack("<IiiHHIIiiII", size, width, height, 1, bit_count, compression, 0, 0, 0, colors_used, 0)
+    return header
+
+
+def v5_header(width, height, masks):
+    """构造 BITMAPV5HEADER（124 字节，掩码在头部内）"""
+    header = info_header(width, height, 32, BI_BITFIELDS, size=124)
+    header += struct.pack("<IIII", *masks)
+    return header.ljust(124, b"\0")
+
+
+def rows_of(pixel_bytes, stride, bottom_up=True):
+    """按行拼接像素，补齐 4 字节对齐，默认自下而上"""
+    rows = [row.ljust(stride, b"\0") for row in pixel_bytes]
+    if bottom_up:
+        rows.reverse()
+    return b"".join(rows)
+
+
+def assert_pattern(image):
+    """检查解码结果与测试图案一致"""
+    rgb = image.convert("RGB")
+    assert rgb.size == (2, 2)
+    for y in range(2):
+        for x in range(2):
+            assert rgb.getpixel((x, y)) == PATTERN[y][x], (x, y, rgb.getpixel((x, y)))
+
+
+def test_24bit_bottom_up():
+    pixels = [b"".join(bytes((b, g, r)) for r, g, b in row) for row in PATTERN]
+    data = info_header(2, 2, 24) + rows_of(pixels, 8)
+    assert parse_dib_header(data).pixel_offset == 40
+    assert_pattern(decode_dib(data))
+
+
+def test_32bit_top_down():
+    pixels = [b"".join(bytes((b, g, r, 0)) for r, g, b in row) for row in PATTERN]
+    data = info_header(2, -2, 32) + rows_of(pixels, 8, bottom_up=False)
+    image = decode_dib(data)
+    assert image.mode == "RGB"
+    assert_pattern(image)
+
+
+def test_32bit_bitfields_after_info_header():
+    # 40 字节头部 + 3 个掩码，像素偏移是 52 而不是 54 - 14
+    masks = struct.pack("<III", 0x00FF0000, 0x0000FF00, 0x000000FF)
+    pixels = [b"".join(bytes((b, g, r, 0)) for r, g, b in row) for row in PATTERN]
+    data = info_header(2, 2, 32, BI_BITFIELDS) + masks + rows_of(pixels, 8)
+    assert parse_dib_header(data).pixel_offset == 52
+    assert_pattern(decode_dib(data))
+
+
+def test_v5_with_alpha():
+    alphas = [[255, 128], [64, 0]]
+    pixels = [
+        b"".join(bytes((b, g, r, alphas[y][x])) for x, (r, g, b) in enumerate(row))
+        for y, row in enumerate(PATTERN)
+    ]
+    data = v5_header(2, 2, (0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000)) + rows_of(pixels, 8)
+    info = parse_dib_header(data)
+    assert info.pixel_offset == 124 and info.has_alpha
+    image = decode_dib(data)
+    assert image.mode == "RGBA"
+    assert image.getpixel((1, 0))[3] == 128
+    assert image.getpixel((0, 1))[3] == 64
+    assert_pattern(image)
+
+
+def test_v5_alpha_mask_without_alpha_is_opaque():
+    pixels = [b"".join(bytes((b, g, r, 0)) for r, g, b in row) for row in PATTERN]
+    data = v5_header(2, 2, (0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000)) + rows_of(pixels, 8)
+    image = decode_dib(data)
+    assert image.mode == "RGB"
+    assert_pattern(image)
+
+
+def test_16bit_565_bitfields():
+    def pack565(r, g, b):
+        return struct.pack("<H", ((r >> 3) << 11) | ((g >> 2) << 5) | (b >> 3))
+    masks = struct.pack("<III", 0xF800, 0x07E0, 0x001F)
+    pixels = [b"".join(pack565(*rgb) for rgb in row) for row in PATTERN]
+    data = info_header(2, 2, 16, BI_BITFIELDS) + masks + rows_of(pixels, 4)
+    image = decode_dib(data).convert("RGB")
+    # 565 量化后白色为 (248, 252, 248)
+    assert image.getpixel((0, 0))[0] >= 248
+    assert image.getpixel((1, 0))[1] >= 252
+    assert image.getpixel((0, 1))[2] >= 248
+
+
+def test_8bit_palette():
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)]
+    palette = b"".join(bytes((b, g, r, 0)) for r, g, b in colors)
+    index_rows = [bytes((0, 1)), bytes((2, 3))]
+    data = info_header(2, 2, 8, colors_used=4) + palette + rows_of(index_rows, 4)
+    info = parse_dib_header(data)
+    assert info.pixel_offset == 40 + 16
+    image = decode_dib(data)
+    assert image.mode == "P"
+    assert_pattern(image)
+
+
+def test_1bit_monochrome():
+    palette = bytes((0, 0, 0, 0, 255, 255, 255, 0))
+    # 第一行: 黑 白；第二行: 白 黑
+    index_rows = [bytes((0b01000000,)), bytes((0b10000000,))]
+    data = info_header(2, 2, 1) + palette + rows_of(index_rows, 4)
+    image = decode_dib(data).convert("RGB")
+    assert image.getpixel((0, 0)) == (0, 0, 0)
+    assert image.getpixel((1, 0)) == (255, 255, 255)
+    assert image.getpixel((0, 1)) == (255, 255, 255)
+
+
+def test_core_header():
+    header = struct.pack("<IHHHH", 12, 2, 2, 1, 24)
+    pixels = [b"".join(bytes((b, g, r)) for r, g, b in row) for row in PATTERN]
+    data = header + rows_of(pixels, 8)
+    assert parse_dib_header(data).pixel_offset == 12
+    assert_pattern(decode_dib(data))
+
+
+def test_truncated_data_raises():
+    data = info_header(100, 100, 32) + b"\0" * 10
+    try:
+        decode_dib(data)
+    except ValueError:
+        return
+    raise AssertionError("截断的 DIB 应当报错")
+
+
+if __name__ == "__main__":
+    tests = [(name, func) for name, func in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, func in tests:
+        try:
+            func()
+            print(f"[OK] {name}")
+        except Exception as e:
+            failed += 1
+            print(f"[X] {name}: {e!r}")
+    print(f"\n{len(tests) - failed}/{len(tests)} 通过")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,78 @@
+"""
+测试脚本 - 验证记录列表模型的分页加载（取页失败后可以重试）
+用法: python test_record_model.py  或  python -m pytest test_record_model.py
+需要 PyQt5；没有显示器时设置 QT_QPA_PLATFORM=offscreen
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from PyQt5.QtCore import QCoreApplication
+
+app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+from gui.record_model import RecordListModel
+
+
+def make_page(start, count):
+    """按时间倒序的一页摘要记录"""
+    return [
+        {"id": start - i, "content_type": "text", "timestamp": f"2024-01-01T00:00:{(start - i) % 60:02d}",
+         "preview": f"记录 {start - i}", "content_length": 4}
+        for i in range(count)
+    ]
+
+
+def wait_until(condition, timeout=5.0):
+    """处理事件直到条件成立（后台线程的结果通过信号回到主线程）"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        app.processEvents()
+        time.sleep(0.01)
+
+
+class FlakyModel(RecordListModel):
+    """第一次取页失败，之后正常返回"""
+
+    calls = 0
+
+    @classmethod
+    def _fetch_page(cls, query, last):
+        cls.calls += 1
+        if cls.calls == 1:
+            raise RuntimeError("database is locked")
+        return make_page(1000, 10)
+
+
+def test_fetch_more_retries_after_error():
+    model = FlakyModel()
+    model.fetchMore()
+    assert model.loading
+    wait_until(lambda: not model.loading)
+    assert model.rowCount() == 0
+    assert model.canFetchMore()
+
+    model.fetchMore()
+    wait_until(lambda: model.rowCount() == 10)
+    assert not model.loading
+    assert model.exhausted
+
+
+if __name__ == "__main__":
+    tests = [(name, func) for name, func in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, func in tests:
+        try:
+            func()
+            print(f"[OK] {name}")
+        except Exception as e:
+            failed += 1
+            print(f"[X] {name}: {e!r}")
+    print(f"\n{len(tests) - failed}/{len(tests)} 通过")
+    sys.exit(1 if failed else 0)
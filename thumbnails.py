@@ -0,0 +1,126 @@
+"""
+缩略图模块 - 截图入库后在后台生成缩略图，按图片摘要存放在磁盘上
+
+预览、纠错窗口和列表行只读取几十 KB 的缩略图，不再反复解码整张截图。
+"""
+import os
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+from PIL import Image
+from image_encoder import load_image
+
+THUMBNAIL_SIZE = (400, 300)  # 缩略图最大尺寸（纠错窗口的预览尺寸）
+THUMBNAIL_EXTENSION = ".webp"
+THUMBNAIL_QUALITY = 80
+
+
+class ThumbnailStore:
+    """磁盘缩略图仓库
+
+    缩略图以原图文件名（即内容摘要）命名，同一张图片只生成一次；原图被回收时一并删除。
+    """
+
+    def __init__(self, root: str = None):
+        if root is None:
+            root = Path.home() / ".clipboard-polisher" / "thumbnails"
+        self.root = Path(root)
+        self.queue: "queue.Queue" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.listeners: List[Callable[[str], None]] = []  # 后台生成结束后调用（参数为原图路径）
+        self.log_path = Path.home() / ".clipboard-polisher" / "image_store.log"
+
+    def _log(self, message):
+        """写入日志（与图片仓库共用）"""
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().strftime('%H:%M:%S')} {message}\n")
+        print(f"[缩略图] {message}")
+
+    def path_for(self, image_path: str) -> Path:
+        """图片对应的缩略图路径"""
+        stem = Path(image_path).stem
+        return self.root / stem[:2] / f"{stem}{THUMBNAIL_EXTENSION}"
+
+    def find(self, image_path: str) -> Optional[Path]:
+        """已生成的缩略图，没有时返回 None"""
+        path = self.path_for(image_path)
+        return path if path.exists() else None
+
+    def ensure(self, image_path: str) -> Optional[Path]:
+        """返回缩略图路径，还没有时立即生成（在调用线程解码原图）；原图读取失败返回 None"""
+        return self.find(image_path) or self.generate(image_path)
+
+    def generate(self, image_path: str) -> Optional[Path]:
+        """解码原图生成缩略图"""
+        path = self.path_for(image_path)
+        try:
+            image = load_image(image_path)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            # reducing_gap 先按整数倍快速缩小，再做高质量重采样
+            image.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS, reducing_gap=2.0)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 各线程写各自的临时文件，可能同时生成同一张缩略图
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            image.save(str(tmp_path), "WEBP", quality=THUMBNAIL_QUALITY)
+            os.replace(tmp_path, path)
+            return path
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self._log(f"生成缩略图失败 {Path(image_path).name}: {e}")
+            return None
+
+    def schedule(self, image_path: str):
+        """在后台生成缩略图（已存在则跳过）"""
+        self.queue.put(image_path)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="thumbnail", daemon=True)
+                self.thread.start()
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """注册回调：schedule() 的图片处理完（无论成功与否）后在后台线程调用 callback(原图路径)"""
+        self.listeners.append(callback)
+
+    def _run(self):
+        """后台线程"""
+        from storage_manager import lower_thread_priority
+        lower_thread_priority()
+        while True:
+            image_path = self.queue.get()
+            self.ensure(image_path)
+            for callback in list(self.listeners):
+                try:
+                    callback(image_path)
+                except Exception as e:
+                    print(f"[缩略图] 通知失败 {image_path}: {e}")
+
+    def discard(self, image_path: str):
+        """原图被删除时删除缩略图"""
+        try:
+            self.path_for(image_path).unlink()
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, image_paths: Iterable[str]) -> int:
+        """删除原图已不在 image_paths 中的缩略图，返回删除的个数"""
+        stems = {Path(p).stem for p in image_paths}
+        removed = 0
+        if not self.root.exists():
+            return 0
+        for path in self.root.rglob(f"*{THUMBNAIL_EXTENSION}"):
+            if path.stem not in stems:
+                try:
+                    path.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+# 全局缩略图仓库实例
+thumbnail_store = ThumbnailStore()